@@ -0,0 +1,20 @@
+@echo off
+chcp 65001 >nul
+cls
+echo ========================================
+echo   항적 테이블 인덱스 생성
+echo ========================================
+echo.
+
+REM Anaconda Python 찾기
+set PYTHON_EXE=python
+
+if exist "C:\Users\%USERNAME%\anaconda3\python.exe" (
+    set PYTHON_EXE=C:\Users\%USERNAME%\anaconda3\python.exe
+) else if exist "C:\ProgramData\Anaconda3\python.exe" (
+    set PYTHON_EXE=C:\ProgramData\Anaconda3\python.exe
+)
+
+"%PYTHON_EXE%" migrate_db.py %*
+
+pause
@@ -0,0 +1,11 @@
+"""
+성능 측정 도구
+- synthetic: 실제 항적 DB 와 같은 스키마의 합성 AIS 항적 DB 생성 (100만 ~ 5억 행)
+- run: main.py 전체 엔드포인트의 지연 시간 / 처리량 / 최대 메모리 측정, 결과 JSON 저장
+- compare: 두 결과 JSON 비교 (회귀 판정)
+
+사용법 (fastapi_fishing_app 폴더에서):
+    python -m benchmarks.synthetic bench_1m.db --rows 1000000 --prepare
+    python -m benchmarks.run bench_1m.db --output benchmarks/results/base.json
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/new.json
+"""
@@ -0,0 +1,105 @@
+"""
+성능 측정 결과 비교
+두 결과 JSON(benchmarks.run 출력)의 측정별 지연 시간 / 처리량 / 메모리 변화율을 표로 출력하고
+기준보다 threshold 이상 나빠진 항목이 있으면 회귀로 판정 (종료 코드 1)
+
+측정 환경(행 수, 동시 요청 수, 캐시 모드 등)이 다르면 경고만 출력
+
+사용법 (fastapi_fishing_app 폴더에서):
+    python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/new.json [--threshold 0.2]
+"""
+
+import argparse
+import json
+import sys
+
+DEFAULT_THRESHOLD = 0.2
+
+# (항목 이름, 값 추출 함수, 클수록 나쁨, 무시할 절대 변화량)
+# 수 ms 미만의 지연 시간 / 1MB 미만의 메모리 변화는 측정 잡음으로 봄
+METRICS = [
+    ("p50 ms", lambda c: (c.get("latency_ms") or {}).get("p50"), True, 2.0),
+    ("p95 ms", lambda c: (c.get("latency_ms") or {}).get("p95"), True, 5.0),
+    ("req/s", lambda c: c.get("throughput_rps"), False, 0.5),
+    ("peak MB", lambda c: c.get("peak_memory_mb"), True, 1.0),
+]
+
+# 값이 다르면 비교 결과를 그대로 믿기 어려운 측정 환경
+COMPARABLE_META = ("mode", "iterations", "concurrency", "cache", "window", "bbox", "cpu_count")
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """측정별 비교 [(측정 이름, 항목, 기준 값, 현재 값, 변화율, 회귀 여부)]"""
+    rows = []
+    for name, case in current["cases"].items():
+        base_case = baseline["cases"].get(name)
+        if base_case is None:
+            continue
+        for label, value, higher_is_worse, noise in METRICS:
+            before, after = value(base_case), value(case)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else 0.0
+            worse = change > threshold if higher_is_worse else change < -threshold
+            regression = worse and abs(after - before) >= noise
+            rows.append((name, label, before, after, change, regression))
+    return rows
+
+
+def meta_differences(baseline, current):
+    """비교에 영향을 주는 측정 환경 차이 [(키, 기준 값, 현재 값)]"""
+    base_meta, meta = baseline.get("meta", {}), current.get("meta", {})
+    diffs = [(key, base_meta.get(key), meta.get(key)) for key in COMPARABLE_META
+             if base_meta.get(key) != meta.get(key)]
+    base_rows = (base_meta.get("dataset") or {}).get("rows")
+    rows = (meta.get("dataset") or {}).get("rows")
+    if base_rows != rows:
+        diffs.append(("dataset.rows", base_rows, rows))
+    return diffs
+
+
+def report(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """비교 표 출력 -> 회귀가 없으면 True"""
+    for key, before, after in meta_differences(baseline, current):
+        print(f"⚠️ 측정 환경이 다름: {key} {before} -> {after}")
+
+    base_meta, meta = baseline.get("meta", {}), current.get("meta", {})
+    print(f"기준: {base_meta.get('created_at')} ({base_meta.get('commit')})  "
+          f"현재: {meta.get('created_at')} ({meta.get('commit')})  기준치 {threshold:.0%}")
+    print(f"{'측정':24s}{'항목':>10s}{'기준':>12s}{'현재':>12s}{'변화':>9s}")
+
+    rows = compare(baseline, current, threshold)
+    for name, label, before, after, change, regression in rows:
+        mark = "  ❌ 회귀" if regression else ""
+        print(f"{name:24s}{label:>10s}{before:12.1f}{after:12.1f}{change:+9.1%}{mark}")
+
+    missing = sorted(set(baseline["cases"]) - set(current["cases"]))
+    if missing:
+        print(f"⚠️ 현재 결과에 없는 측정: {', '.join(missing)}")
+
+    regressions = [row for row in rows if row[5]]
+    if regressions:
+        print(f"\n❌ 회귀 {len(regressions)}건")
+        return False
+    print("\n✅ 회귀 없음")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="성능 측정 결과 비교")
+    parser.add_argument("baseline", help="기준 결과 JSON")
+    parser.add_argument("current", help="비교할 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="회귀로 판정할 변화율 (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    sys.exit(0 if report(baseline, current, args.threshold) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+엔드포인트 성능 측정
+main.py 의 모든 엔드포인트를 같은 조회 조건으로 반복 호출해
+지연 시간(p50/p95/p99), 동시 요청 처리량, 요청당 최대 메모리를 측정하고 결과를 JSON 으로 저장
+
+- 기본: 앱을 같은 프로세스에서 ASGI 로 직접 호출 (FISHING_DB_PATH 로 DB 지정, 미들웨어 포함)
+  요청마다 결과/타일 캐시를 비워 실제 조회 비용을 측정 (--warm-cache 이면 캐시 유지)
+  최대 메모리는 tracemalloc 으로 요청 1회의 Python 할당 최대치 (SQLite 페이지 캐시 제외)
+- --url: 실행 중인 서버를 HTTP 로 호출 (서버 캐시는 비울 수 없고 메모리는 측정하지 않음)
+
+사용법 (fastapi_fishing_app 폴더에서):
+    python -m benchmarks.run bench_1m.db --output benchmarks/results/base.json
+    python -m benchmarks.run bench_1m.db --only trajectory_all,stats --iterations 20
+    python -m benchmarks.run --url http://127.0.0.1:8000 --start 2023-01-11
+    python -m benchmarks.run bench_1m.db --baseline benchmarks/results/base.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+from migrate_db import find_trajectory_table
+from benchmarks import compare
+from benchmarks.synthetic import read_info
+
+DEFAULT_ITERATIONS = 10
+DEFAULT_WARMUP = 1
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 600
+DEFAULT_BBOX = (34.5, 35.5, 128.0, 129.5)   # lat_min, lat_max, lon_min, lon_max (남해 동부)
+TILE_ZOOMS = (7, 10, 13)
+VESSEL_COUNT = 5
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def tile_for(lat, lon, z):
+    """위경도를 포함하는 XYZ 타일 번호"""
+    n = 2 ** z
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return x, y
+
+
+def dataset_window(db_path, start=None, days=7):
+    """측정 기간 (day: 첫날, week: 첫날부터 days 일, DB 마지막 날짜까지) + DB 정보"""
+    info = {}
+    end = None
+    if db_path:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            info = read_info(conn) or {}
+            if not info:
+                table = find_trajectory_table(conn)
+                first, last, rows = conn.execute(
+                    f'SELECT MIN(datetime), MAX(datetime), MAX(rowid) FROM "{table}"').fetchone()
+                info = {"table": table, "rows": rows,
+                        "start_date": str(first)[:10], "end_date": str(last)[:10]}
+        finally:
+            conn.close()
+        start = start or info.get("start_date")
+        end = info.get("end_date")
+    if not start:
+        raise ValueError("측정 시작 날짜를 알 수 없습니다 (DB 경로 또는 --start 지정)")
+
+    first = date.fromisoformat(start[:10])
+    last = first + timedelta(days=days - 1)
+    if end:
+        last = max(first, min(last, date.fromisoformat(end[:10])))
+    return {"day": [first.isoformat(), first.isoformat()],
+            "week": [first.isoformat(), last.isoformat()]}, info
+
+
+def build_cases(window, mmsi_list, bbox):
+    """측정 대상 [(이름, 메서드, 경로, 쿼리 파라미터, JSON 본문)]"""
+    day_start, day_end = window["day"]
+    week_start, week_end = window["week"]
+    day = {"start_date": day_start, "end_date": day_end}
+    week = {"start_date": week_start, "end_date": week_end}
+    bbox_text = ",".join(str(v) for v in bbox)
+    vessels = dict(day, mmsi_list=mmsi_list)
+
+    cases = [
+        ("root", "GET", "/", None, None),
+        ("health", "GET", "/api/health", None, None),
+        ("tables", "GET", "/api/tables", None, None),
+        ("metrics", "GET", "/metrics", None, None),
+        ("mmsi", "GET", "/api/mmsi", dict(week, limit=100), None),
+        ("trajectory_vessels", "POST", "/api/trajectory", None, vessels),
+        ("trajectory_all", "POST", "/api/trajectory", None, day),
+        ("trajectory_binary", "POST", "/api/trajectory", {"format": "binary"}, day),
+        ("trajectory_get", "GET", "/api/trajectory", day, None),
+        ("trajectory_page", "POST", "/api/trajectory", None, dict(day, page_size=10000)),
+        ("trajectory_stream", "POST", "/api/trajectory/stream", {"format": "binary"}, day),
+        ("trajectory_simplify", "POST", "/api/trajectory", None, dict(vessels, simplify="dp")),
+        ("trajectory_bbox", "POST", "/api/trajectory", None, dict(week, bbox=list(bbox))),
+        ("download_mmsi", "GET", "/api/download/mmsi", day, None),
+        ("download_trajectory", "POST", "/api/download/trajectory", None, vessels),
+        ("download_columnar", "POST", "/api/download/trajectory/columnar", {"format": "npz"}, vessels),
+        ("density_grid", "GET", "/api/density", week, None),
+        ("density_hex", "GET", "/api/density", dict(week, mode="hex"), None),
+        ("stats", "GET", "/api/stats", week, None),
+        ("stats_bbox", "GET", "/api/stats", dict(week, bbox=bbox_text), None),
+    ]
+    center = ((bbox[0] + bbox[1]) / 2, (bbox[2] + bbox[3]) / 2)
+    for z in TILE_ZOOMS:
+        x, y = tile_for(*center, z)
+        cases.append((f"tile_z{z}", "GET", f"/api/tiles/trajectory/{z}/{x}/{y}.mvt", week, None))
+    return cases
+
+
+def summarize(latencies):
+    """지연 시간(초) 목록 -> 밀리초 통계"""
+    if not latencies:
+        return None
+    ms = np.asarray(latencies) * 1000
+    return {
+        "min": round(float(ms.min()), 3),
+        "p50": round(float(np.percentile(ms, 50)), 3),
+        "p95": round(float(np.percentile(ms, 95)), 3),
+        "p99": round(float(np.percentile(ms, 99)), 3),
+        "mean": round(float(ms.mean()), 3),
+        "max": round(float(ms.max()), 3),
+    }
+
+
+class Target:
+    """측정 대상 앱 (같은 프로세스 ASGI 또는 HTTP 서버)"""
+
+    def __init__(self, db_path=None, url=None, warm_cache=False, timeout=DEFAULT_TIMEOUT):
+        self.in_process = url is None
+        self.warm_cache = warm_cache
+        self.main = None
+        if self.in_process:
+            # main 을 import 하기 전에 DB 경로 / 로그 수준 지정
+            os.environ["FISHING_DB_PATH"] = os.path.abspath(db_path)
+            os.environ.setdefault("FISHING_LOG_LEVEL", "WARNING")
+            import main
+            self.main = main
+            transport = httpx.ASGITransport(app=main.app)
+            self.client = httpx.AsyncClient(transport=transport, base_url="http://benchmark",
+                                            timeout=timeout)
+        else:
+            self.client = httpx.AsyncClient(base_url=url.rstrip("/"), timeout=timeout)
+
+    def reset(self):
+        """콜드 측정: 결과/타일 캐시 비우기 (같은 프로세스일 때만)"""
+        if self.main is not None and not self.warm_cache:
+            self.main.result_cache.clear()
+            self.main.tile_cache.clear()
+
+    async def call(self, case):
+        name, method, path, params, body = case
+        self.reset()
+        started = time.perf_counter()
+        response = await self.client.request(method, path, params=params, json=body)
+        elapsed = time.perf_counter() - started
+        return response.status_code, response.num_bytes_downloaded, elapsed
+
+    async def close(self):
+        await self.client.aclose()
+
+
+async def measure_latency(target, case, iterations, warmup):
+    for _ in range(warmup):
+        await target.call(case)
+    statuses, latencies, size = {}, [], 0
+    for _ in range(iterations):
+        status, size, elapsed = await target.call(case)
+        statuses[status] = statuses.get(status, 0) + 1
+        latencies.append(elapsed)
+    return statuses, latencies, size
+
+
+async def measure_throughput(target, case, concurrency, requests):
+    """concurrency 개의 동시 클라이언트가 requests 건을 나눠 보낼 때 초당 완료 건수"""
+    remaining = [requests]
+    statuses = {}
+
+    async def client():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            status, _, _ = await target.call(case)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return statuses, requests / (time.perf_counter() - started)
+
+
+async def measure_memory(target, case):
+    """요청 1회의 Python 메모리 할당 최대치 (MB)"""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        await target.call(case)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024 / 1024, 3)
+
+
+async def pick_vessels(target, window, count=VESSEL_COUNT):
+    """측정 첫날 행이 많은 선박 MMSI"""
+    start, end = window["day"]
+    response = await target.client.get("/api/mmsi", params={
+        "start_date": start, "end_date": end, "limit": count})
+    response.raise_for_status()
+    return [item["mmsi"] for item in response.json()]
+
+
+async def run_cases(target, cases, args):
+    results = {}
+    for case in cases:
+        name, method, path = case[:3]
+        print(f"   - {name:22s}", end="", flush=True)
+        statuses, latencies, size = await measure_latency(target, case, args.iterations, args.warmup)
+
+        throughput = None
+        if args.concurrency > 1:
+            tp_statuses, throughput = await measure_throughput(
+                target, case, args.concurrency, args.throughput_requests or args.concurrency * 4)
+            for status, count in tp_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+        memory = await measure_memory(target, case) if target.in_process else None
+
+        latency = summarize(latencies)
+        errors = sum(count for status, count in statuses.items() if status >= 400)
+        results[name] = {
+            "method": method,
+            "path": path,
+            "status": {str(k): v for k, v in sorted(statuses.items())},
+            "errors": errors,
+            "bytes": size,
+            "latency_ms": latency,
+            "throughput_rps": round(throughput, 3) if throughput is not None else None,
+            "peak_memory_mb": memory,
+        }
+        line = f" p50 {latency['p50']:9.1f} ms  p95 {latency['p95']:9.1f} ms"
+        if throughput is not None:
+            line += f"  {throughput:8.1f} req/s"
+        if memory is not None:
+            line += f"  {memory:8.1f} MB"
+        if errors:
+            line += f"  ⚠️ 오류 {errors}건 {results[name]['status']}"
+        print(line)
+    return results
+
+
+def environment(args, db_path, info, window, mmsi_list):
+    """결과 비교 시 함께 봐야 하는 측정 환경"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "mode": "in-process" if args.url is None else "http",
+        "url": args.url,
+        "db_path": os.path.abspath(db_path) if db_path else None,
+        "db_bytes": os.path.getsize(db_path) if db_path else None,
+        "dataset": info,
+        "window": window,
+        "mmsi_list": mmsi_list,
+        "bbox": list(args.bbox),
+        "iterations": args.iterations,
+        "warmup": args.warmup,
+        "concurrency": args.concurrency,
+        "cache": "warm" if args.warm_cache else "cold",
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def max_rss_mb():
+    """측정 프로세스의 최대 RSS (MB, 측정 불가이면 None)"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 는 KB, macOS 는 바이트
+    return round(rss / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+
+
+async def run(args):
+    window, info = dataset_window(args.db_path, args.start, args.days)
+    target = Target(args.db_path, args.url, args.warm_cache)
+    try:
+        mmsi_list = args.mmsi or await pick_vessels(target, window)
+        cases = build_cases(window, mmsi_list, args.bbox)
+        if args.only:
+            wanted = set(args.only.split(","))
+            unknown = wanted - {case[0] for case in cases}
+            if unknown:
+                raise ValueError(f"알 수 없는 측정 이름: {', '.join(sorted(unknown))}")
+            cases = [case for case in cases if case[0] in wanted]
+
+        print(f"📅 기간: 하루 {window['day'][0]}, 일주일 {window['week'][0]} ~ {window['week'][1]}")
+        print(f"🚢 선박: {', '.join(mmsi_list)}")
+        print(f"🔁 반복 {args.iterations}회 (워밍업 {args.warmup}), 동시 {args.concurrency}, "
+              f"캐시 {'유지' if args.warm_cache else '비움'}\n")
+
+        results = await run_cases(target, cases, args)
+    finally:
+        await target.close()
+
+    meta = environment(args, args.db_path, info, window, mmsi_list)
+    meta["max_rss_mb"] = max_rss_mb()
+    return {"meta": meta, "cases": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="엔드포인트 지연 시간 / 처리량 / 메모리 측정")
+    parser.add_argument("db_path", nargs="?", help="측정할 DB (같은 프로세스 실행 시 필수)")
+    parser.add_argument("--url", help="실행 중인 서버 주소 (예: http://127.0.0.1:8000)")
+    parser.add_argument("--start", help="측정 시작 날짜 (기본: DB 의 첫 날짜)")
+    parser.add_argument("--days", type=int, default=7, help="긴 기간 조회의 일 수")
+    parser.add_argument("--mmsi", action="append", help="선박별 조회에 쓸 MMSI (반복 지정, 기본: 행이 많은 5척)")
+    parser.add_argument("--bbox", type=float, nargs=4, default=DEFAULT_BBOX,
+                        metavar=("LAT_MIN", "LAT_MAX", "LON_MIN", "LON_MAX"), help="영역 조회 / 타일 위치")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS, help="지연 시간 측정 반복 횟수")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="측정 전 워밍업 횟수")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="처리량 측정 동시 요청 수 (1 이면 생략)")
+    parser.add_argument("--throughput-requests", type=int, help="처리량 측정 요청 수 (기본: 동시 요청 수 × 4)")
+    parser.add_argument("--only", help="측정할 이름만 (쉼표 구분, 예: trajectory_all,stats)")
+    parser.add_argument("--warm-cache", action="store_true", help="결과 캐시를 비우지 않고 측정")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/<DB>-<시각>.json)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON (회귀가 있으면 종료 코드 1)")
+    parser.add_argument("--threshold", type=float, default=compare.DEFAULT_THRESHOLD,
+                        help="회귀로 판정할 변화율 (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if httpx is None:
+        print("❌ httpx 패키지가 필요합니다 (pip install httpx)")
+        sys.exit(1)
+    if args.url is None and not args.db_path:
+        parser.error("DB 경로 또는 --url 을 지정하세요")
+    if args.db_path and not os.path.exists(args.db_path):
+        print(f"❌ 파일 없음: {args.db_path}")
+        sys.exit(1)
+    if args.iterations < 1 or args.concurrency < 1:
+        parser.error("--iterations, --concurrency 는 1 이상이어야 합니다")
+
+    print("=" * 60)
+    print("엔드포인트 성능 측정")
+    print("=" * 60)
+
+    try:
+        result = asyncio.run(run(args))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    output = args.output
+    if output is None:
+        name = os.path.splitext(os.path.basename(args.db_path or "server"))[0]
+        output = os.path.join(RESULTS_DIR, f"{name}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 결과 저장: {output}")
+
+    failed = [name for name, case in result["cases"].items() if case["errors"]]
+    if failed:
+        print(f"⚠️ 오류 응답이 있는 측정: {', '.join(failed)}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print()
+        ok = compare.report(baseline, result, args.threshold)
+        sys.exit(0 if ok and not failed else 1)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
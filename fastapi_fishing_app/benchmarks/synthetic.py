@@ -0,0 +1,385 @@
+"""
+합성 AIS 항적 DB 생성
+실제 항적 DB 와 같은 스키마(mmsi, datetime, lat/lon ×1e7 정수, status, sog, cog, heading)로
+한반도 연안 어선의 입출항 / 조업 항적을 시뮬레이션해 원하는 행 수만큼 기록
+
+선박별 상태 전이 (같은 시드이면 같은 데이터):
+- 정박: 모항에서 정지, 보고 주기가 김 (interval × PORT_REPORT_EVERY)
+- 출항/입항: 어장 또는 모항 방향으로 8~13 노트 직진
+- 조업: 어장 주변에서 0.3~5 노트, 침로가 자주 바뀜 (status = 1)
+- 신호 끊김(수십 분 ~ 수 시간), 무작위 누락, MMSI 0 / 좌표 미상(91, 181) 행 포함
+
+시간 순서대로 추가(append)하므로 rollups / spatial_index 의 증분 갱신 가정과 맞음
+
+사용법 (fastapi_fishing_app 폴더에서):
+    python -m benchmarks.synthetic bench_1m.db --rows 1000000 --vessels 500 --prepare
+    python -m benchmarks.synthetic bench_500m.db --rows 500000000 --vessels 20000 --prepare
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from migrate_db import create_indexes
+from ingest import create_table
+import rollups
+import spatial_index
+
+DEFAULT_TABLE = "trajectory"
+DEFAULT_VESSELS = 500
+DEFAULT_INTERVAL = 60           # 보고 간격 (초)
+DEFAULT_START = "2023-01-01"
+DEFAULT_SEED = 42
+INSERT_BATCH_ROWS = 500_000
+COMMIT_ROWS = 5_000_000
+
+# 생성 정보 테이블 (run.py 가 조회 기간 / 선박 선택에 사용)
+META_TABLE = "synthetic_dataset"
+
+COORD_SCALE = 10_000_000
+UNAVAILABLE_LAT = 91.0          # AIS 좌표 미상 값
+UNAVAILABLE_LON = 181.0
+UNAVAILABLE_HEADING = 511
+
+# 모항 (이름, 위도, 경도, 바다 쪽 방위)
+PORTS = [
+    ("부산", 35.10, 129.04, 150),
+    ("인천", 37.45, 126.60, 250),
+    ("목포", 34.78, 126.38, 230),
+    ("여수", 34.74, 127.74, 180),
+    ("포항", 36.03, 129.38, 90),
+    ("군산", 35.98, 126.71, 260),
+    ("제주", 33.52, 126.53, 0),
+    ("속초", 38.20, 128.60, 70),
+    ("통영", 34.84, 128.43, 170),
+]
+LAT_RANGE = (32.0, 39.0)
+LON_RANGE = (124.0, 132.0)
+
+PORT, OUTBOUND, FISHING, INBOUND = 0, 1, 2, 3
+STATUS_FISHING = 1
+STATUS_OTHER = 0
+
+PORT_REPORT_EVERY = 3           # 정박 중에는 3번에 1번만 보고
+DROP_RATE = 0.03                # 무작위 누락 비율
+OUTAGE_RATE = 0.0005            # 보고마다 신호 끊김이 시작될 확률
+MMSI_ZERO_RATE = 0.0002
+UNAVAILABLE_RATE = 0.0001
+HEADING_UNAVAILABLE_RATE = 0.02
+
+
+def _bearing(lat1, lon1, lat2, lon2):
+    """평면 근사 방위 (도, 북 기준 시계 방향)"""
+    dy = lat2 - lat1
+    dx = (lon2 - lon1) * np.cos(np.radians(lat1))
+    return np.degrees(np.arctan2(dx, dy)) % 360
+
+
+def _distance_nm(lat1, lon1, lat2, lon2):
+    """평면 근사 거리 (해리)"""
+    dy = lat2 - lat1
+    dx = (lon2 - lon1) * np.cos(np.radians(lat1))
+    return np.hypot(dx, dy) * 60
+
+
+class Fleet:
+    """선박 상태 배열 + 한 보고 간격씩 진행"""
+
+    def __init__(self, vessels, interval, rng):
+        self.n = vessels
+        self.interval = interval
+        self.rng = rng
+
+        self.mmsi = 440_000_000 + rng.choice(1_000_000, size=vessels, replace=False)
+        port = rng.integers(len(PORTS), size=vessels)
+        self.home_lat = np.array([PORTS[p][1] for p in port]) + rng.normal(0, 0.005, vessels)
+        self.home_lon = np.array([PORTS[p][2] for p in port]) + rng.normal(0, 0.005, vessels)
+        self.seaward = np.array([PORTS[p][3] for p in port], dtype=float)
+        self.cruise = rng.uniform(8, 13, vessels)
+        # 선박별 보고 시각 오프셋 (선박 안에서는 시간 순서 유지)
+        self.offset = rng.integers(interval, size=vessels)
+
+        self.lat = self.home_lat.copy()
+        self.lon = self.home_lon.copy()
+        self.cog = rng.uniform(0, 360, vessels)
+        self.sog = np.zeros(vessels)
+        self.phase = np.full(vessels, PORT, dtype=np.int8)
+        self.phase_left = rng.uniform(0, 24 * 3600, vessels)
+        self.target_lat = self.home_lat.copy()
+        self.target_lon = self.home_lon.copy()
+        self.ground_lat = self.home_lat.copy()
+        self.ground_lon = self.home_lon.copy()
+        self.outage_left = np.zeros(vessels)
+
+    def _move(self, mask, dt):
+        distance = self.sog[mask] * dt / 3600 / 60     # 도 단위
+        rad = np.radians(self.cog[mask])
+        lat = self.lat[mask]
+        self.lat[mask] = lat + distance * np.cos(rad)
+        self.lon[mask] = self.lon[mask] + distance * np.sin(rad) / np.cos(np.radians(lat))
+
+    def step(self, step_index):
+        """한 보고 간격 진행 -> 이번에 보고하는 선박 마스크"""
+        rng = self.rng
+        dt = self.interval
+
+        # 정박 -> 출항 (바다 쪽으로 15~60해리 떨어진 어장)
+        at_port = self.phase == PORT
+        self.phase_left[at_port] -= dt
+        leaving = at_port & (self.phase_left <= 0)
+        if leaving.any():
+            k = int(leaving.sum())
+            bearing = np.radians(self.seaward[leaving] + rng.uniform(-50, 50, k))
+            reach = rng.uniform(15, 60, k) / 60
+            lat = self.home_lat[leaving]
+            self.ground_lat[leaving] = np.clip(lat + reach * np.cos(bearing), *LAT_RANGE)
+            self.ground_lon[leaving] = np.clip(
+                self.home_lon[leaving] + reach * np.sin(bearing) / np.cos(np.radians(lat)), *LON_RANGE)
+            self.target_lat[leaving] = self.ground_lat[leaving]
+            self.target_lon[leaving] = self.ground_lon[leaving]
+            self.phase[leaving] = OUTBOUND
+        self.sog[self.phase == PORT] = 0.0
+
+        # 출항 / 입항: 목표 방향 직진
+        sailing = (self.phase == OUTBOUND) | (self.phase == INBOUND)
+        if sailing.any():
+            k = int(sailing.sum())
+            remaining = _distance_nm(self.lat[sailing], self.lon[sailing],
+                                     self.target_lat[sailing], self.target_lon[sailing])
+            self.cog[sailing] = (_bearing(self.lat[sailing], self.lon[sailing],
+                                          self.target_lat[sailing], self.target_lon[sailing])
+                                 + rng.normal(0, 3, k)) % 360
+            self.sog[sailing] = self.cruise[sailing] + rng.normal(0, 0.5, k)
+            arrived = np.zeros(self.n, dtype=bool)
+            arrived[sailing] = remaining <= self.sog[sailing] * dt / 3600
+            self._move(sailing & ~arrived, dt)
+            if arrived.any():
+                self.lat[arrived] = self.target_lat[arrived]
+                self.lon[arrived] = self.target_lon[arrived]
+                to_ground = arrived & (self.phase == OUTBOUND)
+                to_port = arrived & (self.phase == INBOUND)
+                self.phase[to_ground] = FISHING
+                self.phase_left[to_ground] = rng.uniform(3 * 3600, 14 * 3600, int(to_ground.sum()))
+                self.phase[to_port] = PORT
+                self.phase_left[to_port] = rng.uniform(6 * 3600, 36 * 3600, int(to_port.sum()))
+                self.sog[to_port] = 0.0
+
+        # 조업: 저속, 침로가 자주 바뀌고 어장 중심에서 10해리 이상 벗어나면 되돌아감
+        fishing = self.phase == FISHING
+        if fishing.any():
+            k = int(fishing.sum())
+            self.cog[fishing] = (self.cog[fishing] + rng.normal(0, 25, k)) % 360
+            far = np.zeros(self.n, dtype=bool)
+            far[fishing] = _distance_nm(self.lat[fishing], self.lon[fishing],
+                                        self.ground_lat[fishing], self.ground_lon[fishing]) > 10
+            if far.any():
+                self.cog[far] = _bearing(self.lat[far], self.lon[far],
+                                         self.ground_lat[far], self.ground_lon[far])
+            self.sog[fishing] = np.clip(rng.normal(2.8, 1.0, k), 0.3, 5.0)
+            self._move(fishing, dt)
+            self.phase_left[fishing] -= dt
+            done = fishing & (self.phase_left <= 0)
+            self.phase[done] = INBOUND
+            self.target_lat[done] = self.home_lat[done]
+            self.target_lon[done] = self.home_lon[done]
+
+        np.clip(self.lat, *LAT_RANGE, out=self.lat)
+        np.clip(self.lon, *LON_RANGE, out=self.lon)
+
+        # 보고 여부: 신호 끊김 / 정박 중 보고 주기 / 무작위 누락
+        self.outage_left -= dt
+        starting = (self.outage_left <= 0) & (rng.random(self.n) < OUTAGE_RATE)
+        self.outage_left[starting] = rng.uniform(600, 6 * 3600, int(starting.sum()))
+        reporting = self.outage_left <= 0
+        reporting &= (self.phase != PORT) | ((np.arange(self.n) + step_index) % PORT_REPORT_EVERY == 0)
+        reporting &= rng.random(self.n) >= DROP_RATE
+        return reporting
+
+    def rows(self, mask, base_epoch):
+        """보고하는 선박의 행 컬럼 (mmsi, epoch 초, lat, lon, status, sog, cog, heading)"""
+        rng = self.rng
+        k = int(mask.sum())
+        mmsi = self.mmsi[mask].copy()
+        lat = self.lat[mask] + rng.normal(0, 0.00002, k)
+        lon = self.lon[mask] + rng.normal(0, 0.00002, k)
+        heading = np.rint(self.cog[mask] + rng.normal(0, 5, k)).astype(np.int64) % 360
+
+        mmsi[rng.random(k) < MMSI_ZERO_RATE] = 0
+        unavailable = rng.random(k) < UNAVAILABLE_RATE
+        lat[unavailable] = UNAVAILABLE_LAT
+        lon[unavailable] = UNAVAILABLE_LON
+        heading[rng.random(k) < HEADING_UNAVAILABLE_RATE] = UNAVAILABLE_HEADING
+
+        return (
+            mmsi,
+            base_epoch + self.offset[mask],
+            np.rint(lat * COORD_SCALE).astype(np.int64),
+            np.rint(lon * COORD_SCALE).astype(np.int64),
+            np.where(self.phase[mask] == FISHING, STATUS_FISHING, STATUS_OTHER),
+            np.rint(np.maximum(self.sog[mask], 0) * 10).astype(np.int64),
+            np.rint(self.cog[mask] * 10).astype(np.int64) % 3600,
+            heading,
+        )
+
+
+def _format_datetimes(epochs):
+    """epoch 초 배열 -> 'YYYY-MM-DD HH:MM:SS' 문자열 목록"""
+    text = np.datetime_as_string(epochs.astype("datetime64[s]"), unit="s")
+    return [s.replace("T", " ") for s in text.tolist()]
+
+
+def _insert(conn, table, pending, limit):
+    """모아 둔 행 컬럼 묶음을 최대 limit 행까지 기록 -> 기록한 행 수"""
+    mmsi, epochs, lat, lon, status, sog, cog, heading = (np.concatenate(c)[:limit] for c in zip(*pending))
+    conn.executemany(
+        f'INSERT INTO "{table}" VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        zip(mmsi.tolist(), _format_datetimes(epochs), lat.tolist(), lon.tolist(),
+            status.tolist(), sog.tolist(), cog.tolist(), heading.tolist()),
+    )
+    return len(mmsi)
+
+
+def generate(db_path, rows, vessels=DEFAULT_VESSELS, start=DEFAULT_START,
+             interval=DEFAULT_INTERVAL, seed=DEFAULT_SEED, table=DEFAULT_TABLE, progress=None):
+    """합성 항적 DB 생성
+
+    Returns:
+        생성 정보 dict (META_TABLE 에도 저장)
+    """
+    rng = np.random.default_rng(seed)
+    fleet = Fleet(vessels, interval, rng)
+    start_epoch = int(np.datetime64(start[:10], "s").astype(np.int64))
+
+    conn = sqlite3.connect(db_path)
+    try:
+        # 새 파일을 한 번에 채우므로 저널/동기화 생략
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        create_table(conn, table)
+
+        written = 0
+        since_commit = 0
+        pending, pending_rows = [], 0
+        step = 0
+        while written + pending_rows < rows:
+            reporting = fleet.step(step)
+            if reporting.any():
+                columns = fleet.rows(reporting, start_epoch + step * interval)
+                pending.append(columns)
+                pending_rows += len(columns[0])
+            step += 1
+
+            if pending_rows >= INSERT_BATCH_ROWS or written + pending_rows >= rows:
+                # 요청한 행 수를 넘는 마지막 묶음은 잘라서 기록
+                count = _insert(conn, table, pending, rows - written)
+                written += count
+                since_commit += count
+                pending, pending_rows = [], 0
+                if since_commit >= COMMIT_ROWS:
+                    conn.commit()
+                    since_commit = 0
+                if progress:
+                    progress(written, rows)
+
+        end_epoch = start_epoch + step * interval
+        info = {
+            "table": table,
+            "rows": written,
+            "vessels": vessels,
+            "seed": seed,
+            "interval": interval,
+            "start_date": start[:10],
+            "end_date": str(np.datetime64(end_epoch, "s").astype("datetime64[D]")),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        conn.execute(f'CREATE TABLE "{META_TABLE}" (key TEXT PRIMARY KEY, value TEXT)')
+        conn.executemany(f'INSERT INTO "{META_TABLE}" VALUES (?, ?)',
+                         [(k, json.dumps(v)) for k, v in info.items()])
+        conn.commit()
+        return info
+    finally:
+        conn.close()
+
+
+def read_info(conn):
+    """META_TABLE 의 생성 정보 (합성 DB 가 아니면 None)"""
+    try:
+        rows = conn.execute(f'SELECT key, value FROM "{META_TABLE}"').fetchall()
+    except sqlite3.OperationalError:
+        return None
+    return {key: json.loads(value) for key, value in rows}
+
+
+def prepare(db_path, table=DEFAULT_TABLE):
+    """API 용 인덱스 / 시간 집계 / 공간 인덱스 생성 (운영 DB 와 같은 상태로 측정)"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        started = time.perf_counter()
+        create_indexes(conn, table)
+        print(f"   - 인덱스 생성 ({time.perf_counter() - started:.1f}초)")
+
+        started = time.perf_counter()
+        rollups.update_rollups(conn, table)
+        print(f"   - 시간 집계 생성 ({time.perf_counter() - started:.1f}초)")
+
+        started = time.perf_counter()
+        spatial_index.update_index(conn, table)
+        print(f"   - 공간 인덱스 생성 ({time.perf_counter() - started:.1f}초)")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 AIS 항적 DB 생성")
+    parser.add_argument("db_path", help="생성할 데이터베이스 경로")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="행 수 (100만 ~ 5억)")
+    parser.add_argument("--vessels", type=int, default=DEFAULT_VESSELS, help="선박 수")
+    parser.add_argument("--start", default=DEFAULT_START, help="시작 날짜 (YYYY-MM-DD)")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL, help="보고 간격 (초)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="난수 시드 (같으면 같은 데이터)")
+    parser.add_argument("--table", default=DEFAULT_TABLE, help="항적 테이블 이름")
+    parser.add_argument("--prepare", action="store_true", help="인덱스 / 집계 / 공간 인덱스까지 생성")
+    parser.add_argument("--force", action="store_true", help="기존 파일 덮어쓰기")
+    args = parser.parse_args()
+
+    if args.rows < 1 or args.vessels < 1 or args.interval < 1:
+        print("❌ --rows, --vessels, --interval 은 1 이상이어야 합니다")
+        sys.exit(1)
+    if os.path.exists(args.db_path):
+        if not args.force:
+            print(f"❌ 이미 존재하는 파일: {args.db_path} (--force 로 덮어쓰기)")
+            sys.exit(1)
+        os.remove(args.db_path)
+
+    print("=" * 60)
+    print("합성 AIS 항적 DB 생성")
+    print("=" * 60)
+    print(f"📁 {args.db_path}: {args.rows:,}행, 선박 {args.vessels:,}척, 시드 {args.seed}")
+
+    started = time.perf_counter()
+
+    def progress(done, total):
+        elapsed = time.perf_counter() - started
+        print(f"   - {done:,} / {total:,}행 ({done / max(elapsed, 1e-9):,.0f}행/초)")
+
+    info = generate(args.db_path, args.rows, args.vessels, args.start, args.interval,
+                    args.seed, args.table, progress)
+    print(f"✅ {info['rows']:,}행 생성: {info['start_date']} ~ {info['end_date']} "
+          f"({time.perf_counter() - started:.1f}초)")
+
+    if args.prepare:
+        print("\n🔧 조회용 인덱스 준비")
+        prepare(args.db_path, args.table)
+
+    size = os.path.getsize(args.db_path)
+    print(f"\n💾 파일 크기: {size / 1024 / 1024:,.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@
 import sqlite3
 import os
 
-db_path = r"C:\Users\User\Desktop\fishing_trajectory.db"
+db_path = os.environ.get("FISHING_DB_PATH", r"C:\Users\User\Desktop\fishing_trajectory.db")
 
 print("=" * 60)
 print("데이터베이스 분석")
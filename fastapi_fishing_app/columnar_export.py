@@ -0,0 +1,193 @@
+"""
+항적 컬럼형 파일 내보내기 (Parquet / Arrow IPC / NumPy .npz)
+CSV 다운로드와 같은 쿼리를 fetchmany 단위로 읽어 row group(레코드 배치) 단위로 바로 전송
+- pyarrow 가 설치되어 있으면 Parquet 또는 Arrow IPC 파일
+- 없으면 NumPy .npz (청크별 배열, load_npz 로 합쳐서 읽음)
+"""
+
+import io
+import zipfile
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# row group(레코드 배치) 하나에 담을 행 수
+DEFAULT_CHUNK_SIZE = 100000
+
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+    "npz": ("application/octet-stream", "npz"),
+}
+
+# TrajectoryQuery(extra_columns=("sog", "cog", "heading")) 결과 컬럼과 저장 타입
+# heading 은 NULL 을 -1 로 저장
+COLUMNS = (
+    ("mmsi", "int64"),
+    ("datetime", "datetime64[s]"),
+    ("lat", "float64"),
+    ("lon", "float64"),
+    ("status", "int8"),
+    ("sog", "float32"),
+    ("cog", "float32"),
+    ("heading", "int16"),
+)
+
+_NULL_FILL = {"float64": np.nan, "float32": np.nan, "int16": -1, "int8": -1, "int64": -1}
+
+
+def resolve_format(requested):
+    """요청 형식을 실제로 만들 수 있는 형식으로 변환 (pyarrow 가 없으면 npz)"""
+    requested = (requested or "parquet").lower()
+    if requested not in FORMATS:
+        raise ValueError(f"지원하지 않는 형식: {requested} (parquet, arrow, npz)")
+    if requested != "npz" and pa is None:
+        return "npz"
+    return requested
+
+
+def _to_array(values, dtype):
+    """컬럼 값 튜플을 NumPy 배열로 변환 (NULL 은 NaN 또는 -1)"""
+    try:
+        return np.asarray(values, dtype=dtype)
+    except (TypeError, ValueError):
+        fill = _NULL_FILL.get(dtype)
+        return np.asarray([fill if v is None else v for v in values], dtype=dtype)
+
+
+def rows_to_columns(rows):
+    """청크(행 목록)를 {컬럼: 배열} 로 변환하고 속도/방향을 실수로 변환"""
+    columns = {name: _to_array(values, dtype)
+               for (name, dtype), values in zip(COLUMNS, zip(*rows))}
+    columns["sog"] /= np.float32(10.0)
+    columns["cog"] /= np.float32(10.0)
+    return columns
+
+
+class _StreamBuffer(io.RawIOBase):
+    """파일 writer 출력을 모아 두었다가 청크마다 꺼내는 쓰기 전용 스트림"""
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        """지금까지 쓰인 바이트를 꺼냄"""
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _arrow_schema():
+    return pa.schema([
+        ("mmsi", pa.int64()),
+        ("datetime", pa.timestamp("s")),
+        ("lat", pa.float64()),
+        ("lon", pa.float64()),
+        ("status", pa.int8()),
+        ("sog", pa.float32()),
+        ("cog", pa.float32()),
+        ("heading", pa.int16()),
+    ])
+
+
+def _iter_chunks(cursor, chunk_size):
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows_to_columns(rows)
+
+
+def iter_arrow(cursor, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Parquet / Arrow IPC 파일 바이트를 row group 단위로 생성"""
+    schema = _arrow_schema()
+    sink = _StreamBuffer()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(sink, schema)
+
+    for columns in _iter_chunks(cursor, chunk_size):
+        batch = pa.record_batch([columns[name] for name, _ in COLUMNS], schema=schema)
+        if fmt == "parquet":
+            writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            writer.write_batch(batch)
+        data = sink.drain()
+        if data:
+            yield data
+
+    writer.close()
+    yield sink.drain()
+
+
+def iter_npz(cursor, chunk_size=DEFAULT_CHUNK_SIZE):
+    """청크별 배열을 담은 .npz(zip) 바이트 생성
+
+    각 청크는 '{컬럼}_{번호:05d}.npy' 로 저장됨 (load_npz 로 합쳐서 읽기)
+    """
+    sink = _StreamBuffer()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+        for index, columns in enumerate(_iter_chunks(cursor, chunk_size)):
+            for name, _ in COLUMNS:
+                with zf.open(f"{name}_{index:05d}.npy", mode="w", force_zip64=True) as member:
+                    np.lib.format.write_array(member, columns[name], allow_pickle=False)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def load_npz(path):
+    """iter_npz 로 만든 파일을 {컬럼: 배열} 로 읽기 (분석용)"""
+    with np.load(path) as data:
+        result = {}
+        for name, _ in COLUMNS:
+            keys = sorted(k for k in data.files if k.rsplit("_", 1)[0] == name)
+            result[name] = np.concatenate([data[k] for k in keys]) if keys else np.array([])
+        return result
+
+
+def stream_trajectory_columnar(pool, query, params, fmt, chunk_size=DEFAULT_CHUNK_SIZE, prepare=None):
+    """항적 쿼리 결과를 컬럼형 파일 바이트 스트림으로 생성 (전용 연결 사용)
+
+    쿼리는 응답을 시작하기 전에 실행해 오류가 HTTP 오류로 전달되도록 함
+    prepare 는 쿼리 전에 전용 연결에 적용할 함수 (예: 파티션 ATTACH)
+    """
+    conn = pool.connect()
+    try:
+        if prepare is not None:
+            prepare(conn)
+        cursor = conn.execute(query, params)
+    except Exception:
+        conn.close()
+        raise
+
+    def generate():
+        try:
+            if fmt == "npz":
+                yield from iter_npz(cursor, chunk_size)
+            else:
+                yield from iter_arrow(cursor, fmt, chunk_size)
+        finally:
+            conn.close()
+
+    return generate()
@@ -0,0 +1,199 @@
+"""
+응답 압축 미들웨어 (gzip / brotli)
+Accept-Encoding 에 따라 JSON/CSV/바이너리 응답 본문을 압축
+- brotli 패키지가 설치되어 있으면 br 우선, 없으면 gzip
+- 한 번에 보내는 본문은 minimum_size 이상일 때만 압축
+- 스트리밍 응답은 청크마다 flush 하며 압축 (CSV 다운로드, 진행형 응답)
+- 이미 Content-Encoding 이 있는 응답(?gzip=true CSV 등)과 압축된 형식(parquet, npz, png)은 그대로 전송
+- 압축한 응답의 ETag 에는 인코딩 표시(-gzip, -br)를 붙임 (http_cache.etag_matches 에서 제거 후 비교)
+- 304 응답에는 클라이언트가 If-None-Match 로 보낸 ETag 를 그대로 돌려줌
+  (압축하지 않은 형식/작은 본문의 200 에는 인코딩 표시가 없으므로 304 에도 붙이지 않음)
+"""
+
+import zlib
+
+import http_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 압축 대상 Content-Type
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/vnd.fishing-trajectory.columnar",
+    "application/vnd.fishing-trajectory.columnar-stream",
+    "application/vnd.mapbox-vector-tile",
+    "text/csv",
+    "text/html",
+    "text/plain",
+)
+
+DEFAULT_MINIMUM_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+
+def choose_encoding(accept_encoding):
+    """Accept-Encoding 헤더 -> br | gzip | None"""
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+
+    for encoding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class _Compressor:
+    """인코딩별 스트리밍 압축기"""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits=31: gzip 헤더/트레일러 포함
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data, final=False):
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """gzip / brotli 응답 압축 ASGI 미들웨어"""
+
+    def __init__(self, app, minimum_size=DEFAULT_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = if_none_match = None
+        for name, value in scope.get("headers", ()):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+            elif name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "compressor": None, "passthrough": False}
+
+        async def send_compressed(message):
+            if message["type"] == "http.response.start":
+                # 본문 첫 청크를 보고 압축 여부를 정하므로 시작 메시지는 보류
+                state["start"] = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            start = state["start"]
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start is not None:
+                state["start"] = None
+                headers = start.get("headers", [])
+                if not self._should_compress(headers, body, more_body):
+                    state["passthrough"] = True
+                    if start["status"] == 304:
+                        # 재검증한 200 과 같은 ETag 로 응답 (압축했던 응답이면 인코딩 표시 포함)
+                        start = dict(start, headers=self._revalidated_headers(headers, if_none_match))
+                    await send(start)
+                    await send(message)
+                    return
+
+                state["compressor"] = _Compressor(encoding)
+                body = state["compressor"].compress(body, final=not more_body)
+                start = dict(start, headers=self._compressed_headers(headers, encoding,
+                                                                     None if more_body else len(body)))
+                await send(start)
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            if state["passthrough"]:
+                await send(message)
+                return
+
+            body = state["compressor"].compress(body, final=not more_body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _should_compress(self, headers, body, more_body):
+        content_type = b""
+        for name, value in headers:
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value
+        content_type = content_type.split(b";")[0].strip().decode("latin-1").lower()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return False
+        # 한 번에 보내는 작은 본문은 압축 이득이 없음
+        return more_body or len(body) >= self.minimum_size
+
+    @staticmethod
+    def _revalidated_headers(headers, if_none_match):
+        """304 헤더의 ETag 를 클라이언트가 보낸 태그로 교체 (압축 응답이었으면 Vary 도 200 과 같게)"""
+        result = []
+        vary = None
+        compressed = False
+        for name, value in headers:
+            if name == b"vary":
+                vary = value
+                continue
+            if name == b"etag":
+                tag = http_cache.matched_etag(if_none_match, value.decode("latin-1"))
+                if tag is not None:
+                    value = tag.encode("latin-1")
+                    compressed = tag.endswith(tuple(s + '"' for s in http_cache.ENCODING_SUFFIXES))
+            result.append((name, value))
+        if compressed:
+            vary = vary + b", Accept-Encoding" if vary else b"Accept-Encoding"
+        if vary is not None:
+            result.append((b"vary", vary))
+        return result
+
+    @staticmethod
+    def _compressed_headers(headers, encoding, content_length):
+        result = []
+        vary = None
+        for name, value in headers:
+            if name == b"content-length":
+                continue
+            if name == b"vary":
+                vary = value
+                continue
+            if name == b"etag" and value.endswith(b'"'):
+                value = value[:-1] + f"-{encoding}".encode("latin-1") + b'"'
+            result.append((name, value))
+        result.append((b"content-encoding", encoding.encode("latin-1")))
+        result.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+        if content_length is not None:
+            result.append((b"content-length", str(content_length).encode("latin-1")))
+        return result
@@ -0,0 +1,113 @@
+"""
+항적 CSV 스트리밍 내보내기
+전체 결과를 메모리에 올리지 않고 fetchmany 단위로 읽어 CSV 블록을 순차 생성
+- 청크마다 속도/방향 변환(/10)과 상태 이름 추가
+- 선택적으로 gzip 압축 스트림 생성
+"""
+
+import csv
+import io
+import zlib
+
+from serializers import status_name
+
+# fetchmany 한 번에 읽을 행 수
+DEFAULT_CHUNK_SIZE = 20000
+
+# TrajectoryQuery(extra_columns=("sog", "cog", "heading")) 결과 컬럼 + 상태 이름
+TRAJECTORY_CSV_COLUMNS = ("mmsi", "datetime", "lat", "lon", "status",
+                          "sog", "cog", "heading", "status_name")
+
+
+def _scale(value, factor):
+    """정수 저장값을 실수로 변환 (NULL 유지)"""
+    return None if value is None else value / factor
+
+
+def _transform_rows(rows):
+    """(mmsi, datetime, lat, lon, status, sog, cog, heading) -> CSV 행"""
+    return [
+        (mmsi, dt, lat, lon, status, _scale(sog, 10.0), _scale(cog, 10.0), heading,
+         status_name(status))
+        for mmsi, dt, lat, lon, status, sog, cog, heading in rows
+    ]
+
+
+def iter_csv(cursor, header, transform=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """커서 결과를 CSV 텍스트 블록으로 순차 생성
+
+    Args:
+        cursor: 쿼리가 실행된 sqlite3 커서
+        header: CSV 헤더 컬럼
+        transform: 청크(행 목록) 변환 함수
+        chunk_size: fetchmany 크기
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    writer.writerow(header)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        writer.writerows(transform(rows) if transform else rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    remaining = buffer.getvalue()
+    if remaining:
+        yield remaining
+
+
+def encode_stream(blocks, compress=False):
+    """텍스트 블록을 UTF-8 바이트로 변환, compress=True 이면 gzip 스트림으로 압축"""
+    if not compress:
+        for block in blocks:
+            yield block.encode("utf-8")
+        return
+
+    # wbits=31: gzip 헤더/트레일러 포함
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for block in blocks:
+        data = compressor.compress(block.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_query_csv(pool, query, params, header, transform=None,
+                     compress=False, chunk_size=DEFAULT_CHUNK_SIZE, prepare=None):
+    """쿼리 결과를 CSV 바이트 스트림으로 생성
+
+    StreamingResponse 는 동기 제너레이터를 여러 스레드에서 나눠 실행하므로
+    스레드별 풀 연결 대신 스트림 전용 연결을 사용하고 끝나면 닫음.
+    쿼리는 응답을 시작하기 전에 실행해 오류가 HTTP 오류로 전달되도록 함
+
+    Args:
+        prepare: 쿼리 전에 전용 연결에 적용할 함수 (예: 파티션 ATTACH)
+    """
+    conn = pool.connect()
+    try:
+        if prepare is not None:
+            prepare(conn)
+        cursor = conn.execute(query, params)
+    except Exception:
+        conn.close()
+        raise
+
+    def generate():
+        try:
+            yield from encode_stream(iter_csv(cursor, header, transform, chunk_size), compress)
+        finally:
+            conn.close()
+
+    return generate()
+
+
+def stream_trajectory_csv(pool, query, params, compress=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                          prepare=None):
+    """항적 다운로드용 CSV 바이트 스트림"""
+    return stream_query_csv(pool, query, params, TRAJECTORY_CSV_COLUMNS,
+                            transform=_transform_rows, compress=compress,
+                            chunk_size=chunk_size, prepare=prepare)
@@ -0,0 +1,260 @@
+"""
+SQLite 연결 풀
+요청마다 새 연결을 여는 대신 스레드별 읽기 전용 연결을 재사용
+- 연결 생성 시 조회용 PRAGMA 적용
+- 일정 시간 유휴 후 재사용 시 상태 점검 (SELECT 1)
+- 수명/사용 횟수 초과 또는 DB 파일 교체 시 연결 재생성
+- 종료된 스레드의 연결은 새 연결을 만들 때 정리
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# 읽기 전용 조회에 맞춘 PRAGMA 설정
+DEFAULT_PRAGMAS = {
+    "query_only": 1,
+    "cache_size": -65536,       # 페이지 캐시 64MB (음수 = KiB 단위)
+    "mmap_size": 268435456,     # 메모리 매핑 256MB
+    "temp_store": "MEMORY",     # 정렬/임시 테이블을 메모리에서 처리
+}
+
+
+class _PooledConnection:
+    """풀에서 관리하는 연결과 메타데이터"""
+
+    __slots__ = ("conn", "file_id", "thread", "thread_id", "created_at", "last_used", "uses")
+
+    def __init__(self, conn, file_id):
+        now = time.monotonic()
+        self.conn = conn
+        self.file_id = file_id
+        # 스레드 식별자는 종료 후 재사용될 수 있으므로 생존 확인은 스레드 객체로 함
+        self.thread = threading.current_thread()
+        self.thread_id = threading.get_ident()
+        self.created_at = now
+        self.last_used = now
+        self.uses = 0
+
+
+class ConnectionPool:
+    """스레드별 읽기 전용 SQLite 연결 풀
+
+    Args:
+        db_path: 데이터베이스 파일 경로
+        max_age: 연결 최대 수명 (초), 초과 시 재생성
+        max_uses: 연결 최대 사용 횟수, 초과 시 재생성
+        health_check_interval: 이 시간(초) 이상 유휴였던 연결은 사용 전 상태 점검
+        timeout: sqlite3 잠금 대기 시간 (초)
+        pragmas: 연결 생성 시 적용할 PRAGMA (기본값: DEFAULT_PRAGMAS)
+        on_connect: 새 연결마다 호출할 함수 (예: SQL 사용자 함수 등록)
+    """
+
+    def __init__(self, db_path, max_age=600, max_uses=10000,
+                 health_check_interval=30, timeout=30, pragmas=None, on_connect=None):
+        self.db_path = db_path
+        self.max_age = max_age
+        self.max_uses = max_uses
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.on_connect = on_connect
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = set()
+        self._by_thread = {}
+        self._tracked = {}
+        self._created = 0
+        self._recycled = 0
+        self._pruned = 0
+
+    def _file_id(self):
+        """DB 파일 식별자 (파일이 교체되면 값이 바뀜)"""
+        st = os.stat(self.db_path)
+        return (st.st_dev, st.st_ino)
+
+    def file_signature(self):
+        """DB 파일(및 WAL 파일)의 변경 감지용 서명 (inode, 수정 시각, 크기)"""
+        parts = []
+        for path in (self.db_path, self.db_path + "-wal"):
+            try:
+                st = os.stat(path)
+                parts.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                parts.append(None)
+        return tuple(parts)
+
+    def connect(self):
+        """풀과 무관한 새 읽기 전용 연결 (호출한 쪽에서 close 필요)
+
+        스트리밍 응답처럼 여러 스레드에 걸쳐 오래 쓰는 경우에 사용
+        """
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(self.db_path)
+
+        uri = "file:{}?mode=ro".format(self.db_path.replace("\\", "/"))
+        # 풀 연결은 스레드 전용으로만 쓰지만 close_all()은 다른 스레드에서 호출되므로 허용
+        conn = sqlite3.connect(uri, uri=True, timeout=self.timeout,
+                               check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        if self.on_connect is not None:
+            self.on_connect(conn)
+
+        with self._lock:
+            tracked = self._tracked.get(threading.get_ident())
+            if tracked is not None:
+                tracked.append(conn)
+        return conn
+
+    def _open(self):
+        """풀에 등록되는 새 연결 생성 (종료된 스레드의 연결도 함께 정리)"""
+        self._prune_dead()
+        conn = self.connect()
+        entry = _PooledConnection(conn, self._file_id())
+        with self._lock:
+            self._all.add(entry)
+            self._by_thread[entry.thread_id] = entry
+            self._created += 1
+        return entry
+
+    def _prune_dead(self):
+        """종료된 스레드(유휴 후 정리된 실행기 스레드, 다시 만들어진 폴링 스레드 등)의 연결 종료"""
+        with self._lock:
+            dead = [entry for entry in self._all if not entry.thread.is_alive()]
+            for entry in dead:
+                self._all.discard(entry)
+                if self._by_thread.get(entry.thread_id) is entry:
+                    del self._by_thread[entry.thread_id]
+            self._pruned += len(dead)
+        for entry in dead:
+            try:
+                entry.conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _discard(self, entry):
+        """연결 종료 및 풀에서 제거"""
+        with self._lock:
+            self._all.discard(entry)
+            if self._by_thread.get(entry.thread_id) is entry:
+                del self._by_thread[entry.thread_id]
+        try:
+            entry.conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _needs_recycle(self, entry, now):
+        """수명, 사용 횟수, 상태 점검 결과로 재생성 필요 여부 판단"""
+        if now - entry.created_at > self.max_age or entry.uses >= self.max_uses:
+            return True
+
+        if now - entry.last_used > self.health_check_interval:
+            try:
+                if self._file_id() != entry.file_id:
+                    return True
+                entry.conn.execute("SELECT 1").fetchone()
+            except (OSError, sqlite3.Error):
+                return True
+
+        return False
+
+    def acquire(self):
+        """현재 스레드의 연결 반환 (필요 시 생성/재생성)"""
+        entry = getattr(self._local, "entry", None)
+        now = time.monotonic()
+
+        if entry is not None and self._needs_recycle(entry, now):
+            self._discard(entry)
+            with self._lock:
+                self._recycled += 1
+            entry = None
+
+        if entry is None:
+            entry = self._open()
+            self._local.entry = entry
+
+        entry.uses += 1
+        entry.last_used = now
+        return entry.conn
+
+    @contextmanager
+    def connection(self):
+        """연결 대여 컨텍스트
+
+        사용 중 연결 오류가 발생하면 해당 연결은 폐기되고 다음 요청에서 새로 생성됨
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        except (sqlite3.OperationalError, sqlite3.DatabaseError):
+            if conn.in_transaction:
+                conn.rollback()
+            entry = getattr(self._local, "entry", None)
+            if entry is not None and entry.conn is conn:
+                try:
+                    conn.execute("SELECT 1").fetchone()
+                except sqlite3.Error:
+                    self._discard(entry)
+                    self._local.entry = None
+            raise
+
+    @contextmanager
+    def tracking(self):
+        """이 블록 안에서 현재 스레드가 connect() 로 연 연결도 interrupt() 대상에 포함"""
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._tracked[thread_id] = []
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._tracked.pop(thread_id, None)
+
+    def interrupt(self, thread_id):
+        """해당 스레드의 연결에서 실행 중인 쿼리 중단 (다른 스레드에서 호출 가능)
+
+        Returns:
+            중단 요청한 연결 수
+        """
+        with self._lock:
+            entry = self._by_thread.get(thread_id)
+            conns = list(self._tracked.get(thread_id, ()))
+        if entry is not None:
+            conns.append(entry.conn)
+
+        interrupted = 0
+        for conn in conns:
+            try:
+                conn.interrupt()
+                interrupted += 1
+            except sqlite3.ProgrammingError:
+                # 이미 닫힌 연결
+                pass
+        return interrupted
+
+    def close_all(self):
+        """모든 스레드의 연결 종료"""
+        with self._lock:
+            entries = list(self._all)
+            self._all.clear()
+            self._by_thread.clear()
+        for entry in entries:
+            try:
+                entry.conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    def stats(self):
+        """풀 상태 정보"""
+        with self._lock:
+            return {
+                "open_connections": len(self._all),
+                "created": self._created,
+                "recycled": self._recycled,
+                "pruned": self._pruned,
+            }
@@ -0,0 +1,158 @@
+"""
+항적 밀도 격자 집계
+필터된 포인트를 위경도 격자(grid) 또는 육각형(hex) 셀로 묶어 상태별 건수만 반환
+- fetchmany 청크마다 NumPy 로 셀 번호를 계산해 누적 (np.histogram2d / np.bincount)
+- 건수가 0인 셀은 제외한 희소(sparse) 형식으로 응답
+"""
+
+import math
+
+import numpy as np
+
+from query_builder import COORD_SCALE
+from serializers import status_name
+
+MODES = ("grid", "hex")
+
+# fetchmany 한 번에 읽을 행 수
+DEFAULT_CHUNK_SIZE = 200000
+
+# 한 응답에서 허용하는 최대 셀 수 (격자 전체 기준)
+MAX_CELLS = 4000000
+
+SQRT3 = math.sqrt(3.0)
+
+
+class DensityGrid:
+    """상태별 셀 건수 누적기
+
+    Args:
+        bounds: (lat_min, lat_max, lon_min, lon_max)
+        cell: 셀 크기 (도), hex 는 중심에서 꼭짓점까지 거리 (위도 기준)
+        mode: grid | hex
+    """
+
+    def __init__(self, bounds, cell, mode="grid"):
+        if mode not in MODES:
+            raise ValueError(f"지원하지 않는 집계 방식: {mode} ({', '.join(MODES)})")
+        if not cell or cell <= 0:
+            raise ValueError("cell 은 0보다 커야 합니다")
+
+        self.bounds = bounds
+        self.cell = float(cell)
+        self.mode = mode
+        lat_min, lat_max, lon_min, lon_max = bounds
+
+        if mode == "grid":
+            self.rows = max(int(math.ceil((lat_max - lat_min) / self.cell)), 1)
+            self.cols = max(int(math.ceil((lon_max - lon_min) / self.cell)), 1)
+            self.lat_edges = lat_min + np.arange(self.rows + 1) * self.cell
+            self.lon_edges = lon_min + np.arange(self.cols + 1) * self.cell
+        else:
+            # 뾰족한 꼭짓점이 위로 향하는 육각형, 경도는 중앙 위도 기준으로 거리 보정
+            self.lon_scale = math.cos(math.radians((lat_min + lat_max) / 2))
+            q_min, q_max, r_min, r_max = self._axial_range()
+            self.q_min, self.r_min = q_min, r_min
+            self.cols = q_max - q_min + 1
+            self.rows = r_max - r_min + 1
+
+        if self.rows * self.cols > MAX_CELLS:
+            raise ValueError(
+                f"셀 수가 너무 많습니다 ({self.rows * self.cols:,}개 > {MAX_CELLS:,}개), cell 을 키우세요"
+            )
+        self.counts = {}
+
+    # ---- 육각형 좌표 ----
+
+    def _hex_xy(self, lat, lon):
+        return (lon - self.bounds[2]) * self.lon_scale, lat - self.bounds[0]
+
+    def _axial(self, lat, lon):
+        """위경도 배열 -> 가장 가까운 육각형 (q, r) 정수 좌표"""
+        x, y = self._hex_xy(lat, lon)
+        q = (SQRT3 / 3 * x - y / 3) / self.cell
+        r = (2 / 3 * y) / self.cell
+        s = -q - r
+
+        rq, rr, rs = np.round(q), np.round(r), np.round(s)
+        dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+        fix_q = (dq > dr) & (dq > ds)
+        fix_r = ~fix_q & (dr > ds)
+        rq = np.where(fix_q, -rr - rs, rq)
+        rr = np.where(fix_r, -rq - rs, rr)
+        return rq.astype(np.int64), rr.astype(np.int64)
+
+    def _axial_range(self):
+        lat_min, lat_max, lon_min, lon_max = self.bounds
+        corners_lat = np.array([lat_min, lat_min, lat_max, lat_max])
+        corners_lon = np.array([lon_min, lon_max, lon_min, lon_max])
+        q, r = self._axial(corners_lat, corners_lon)
+        return int(q.min()) - 1, int(q.max()) + 1, int(r.min()) - 1, int(r.max()) + 1
+
+    def _hex_center(self, q, r):
+        x = self.cell * SQRT3 * (q + r / 2)
+        y = self.cell * 1.5 * r
+        return y + self.bounds[0], x / self.lon_scale + self.bounds[2]
+
+    # ---- 누적 ----
+
+    def add(self, lat, lon, status):
+        """청크(위경도/상태 배열) 누적"""
+        for value in np.unique(status).tolist():
+            selected = status == value
+            if self.mode == "grid":
+                counts, _, _ = np.histogram2d(
+                    lat[selected], lon[selected], bins=(self.lat_edges, self.lon_edges)
+                )
+                counts = counts.astype(np.int64).ravel()
+            else:
+                q, r = self._axial(lat[selected], lon[selected])
+                q, r = q - self.q_min, r - self.r_min
+                inside = (q >= 0) & (q < self.cols) & (r >= 0) & (r < self.rows)
+                counts = np.bincount(r[inside] * self.cols + q[inside],
+                                     minlength=self.rows * self.cols)
+
+            if value in self.counts:
+                self.counts[value] += counts
+            else:
+                self.counts[value] = counts
+
+    def add_rows(self, cursor, chunk_size=DEFAULT_CHUNK_SIZE):
+        """(lat, lon, status) 정수 좌표 커서 결과를 청크 단위로 누적"""
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            lat, lon, status = (np.asarray(c) for c in zip(*rows))
+            self.add(lat / COORD_SCALE, lon / COORD_SCALE, status.astype(np.int64))
+
+    def centers(self, index):
+        """셀 번호 -> (중심 위도, 중심 경도) 배열"""
+        row, col = np.divmod(index, self.cols)
+        if self.mode == "grid":
+            return ((self.lat_edges[row] + self.lat_edges[row + 1]) / 2,
+                    (self.lon_edges[col] + self.lon_edges[col + 1]) / 2)
+        return self._hex_center(col + self.q_min, row + self.r_min)
+
+    def to_dict(self, precision=5):
+        """희소 응답 (상태별 셀 중심 좌표와 건수)"""
+        statuses = {}
+        for value in sorted(self.counts):
+            counts = self.counts[value]
+            index = np.flatnonzero(counts)
+            lat, lon = self.centers(index)
+            statuses[str(value)] = {
+                "status_name": status_name(value),
+                "total": int(counts.sum()),
+                "lat": np.round(lat, precision).tolist(),
+                "lon": np.round(lon, precision).tolist(),
+                "count": counts[index].tolist(),
+            }
+        return {
+            "mode": self.mode,
+            "cell": self.cell,
+            "bounds": list(self.bounds),
+            "rows": self.rows,
+            "cols": self.cols,
+            "status": statuses,
+        }
@@ -0,0 +1,387 @@
+"""
+최근 항적 컬럼 저장소 (hot store)
+최근 N일 항적을 (mmsi, epoch) 순서로 정렬한 NumPy 컬럼 파일(.npy)로 만들어 두고
+메모리 매핑(mmap)으로 열어 /api/trajectory, /api/density 를 SQLite 없이 응답
+- 선박별 오프셋 표(vessels, offsets)와 이진 탐색(searchsorted)으로 기간 구간을 찾음
+- 필터/샘플링/좌표 검사는 TrajectoryQuery 의 SQL 과 같은 규칙을 NumPy 로 적용 (결과 동일)
+- 저장소는 만들 때의 마지막 rowid 까지의 스냅숏: 이후 행이 추가되면 다시 만들 때까지 SQLite 로 조회
+- 버전별 폴더에 새로 만든 뒤 current.json 만 바꾸므로 서버 실행 중에도 갱신 가능 (Windows 포함)
+
+폴더 구조:
+    <DB 이름>_hot/current.json            현재 버전
+    <DB 이름>_hot/<버전>/meta.json         기간, 마지막 rowid, 행/선박 수
+    <DB 이름>_hot/<버전>/*.npy             mmsi, epoch, datetime, lat, lon, status, vessels, offsets
+
+사용법:
+    python hot_store.py [DB 경로] [--days 30] [--dir 폴더]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from migrate_db import DEFAULT_DB_PATH, find_trajectory_table
+from partitions import Route, load_catalog, union_source
+from query_builder import COORD_SCALE, scaled_bounds
+from spatial_index import in_polygon_array
+
+DEFAULT_DAYS = 30
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# NULL 좌표/상태 대신 저장하는 값 (어떤 좌표 범위 조건도 통과하지 못함)
+NULL_COORD = np.iinfo(np.int32).min
+NULL_STATUS = np.iinfo(np.int16).min
+
+COLUMNS = ("mmsi", "epoch", "datetime", "lat", "lon", "status")
+
+# SQLite 에서 읽을 때 한 번에 가져올 행 수
+READ_CHUNK_ROWS = 1000000
+
+FORMAT_VERSION = 1
+
+
+def default_directory(db_path):
+    """DB 경로 -> 기본 저장소 폴더 (<DB 이름>_hot)"""
+    return os.path.splitext(os.path.abspath(db_path))[0] + "_hot"
+
+
+def to_epoch(datetime_str):
+    """'YYYY-MM-DD HH:MM:SS' -> epoch 초 (문자열 시각을 그대로 UTC 로 간주)"""
+    return int(np.datetime64(datetime_str, "s").astype(np.int64))
+
+
+def last_row(conn, table_name):
+    """(마지막 rowid, 그 행의 mmsi, datetime) - 저장소 이후 추가/교체 여부 확인용"""
+    row = conn.execute(
+        f'SELECT rowid, mmsi, datetime FROM "{table_name}" ORDER BY rowid DESC LIMIT 1'
+    ).fetchone()
+    return list(row) if row else [0, None, None]
+
+
+def current_version(directory):
+    """(현재 버전 폴더, meta dict) - 저장소가 없으면 (None, None)"""
+    try:
+        with open(os.path.join(directory, "current.json"), encoding="utf-8") as f:
+            path = os.path.join(directory, json.load(f)["version"])
+    except FileNotFoundError:
+        return None, None
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        return path, json.load(f)
+
+
+def _read_columns(conn, source, start_datetime, max_rowid, progress=None):
+    """기간 시작 이후 행 -> 정렬 전 컬럼 배열 dict"""
+    query = f"""
+        SELECT rowid, mmsi, datetime, lat, lon, status
+        FROM {source}
+        WHERE datetime >= ? AND rowid <= ? AND mmsi IS NOT NULL
+    """
+    parts = {name: [] for name in ("rowid",) + COLUMNS}
+    read = 0
+    for df in pd.read_sql_query(query, conn, params=[start_datetime, max_rowid], chunksize=READ_CHUNK_ROWS):
+        epoch = pd.to_datetime(df["datetime"], format=DATETIME_FORMAT, errors="coerce")
+        if epoch.isna().any():
+            bad = df["datetime"][epoch.isna()].iloc[0]
+            raise ValueError(f"datetime 형식이 다른 행이 있습니다: {bad!r} ({DATETIME_FORMAT} 필요)")
+
+        parts["rowid"].append(df["rowid"].to_numpy(np.int64))
+        parts["mmsi"].append(df["mmsi"].to_numpy(np.int64))
+        parts["epoch"].append(epoch.to_numpy("datetime64[s]").astype(np.int64))
+        parts["datetime"].append(df["datetime"].to_numpy().astype("S19"))
+        for name in ("lat", "lon"):
+            parts[name].append(df[name].fillna(NULL_COORD).to_numpy(np.int64).astype(np.int32))
+        parts["status"].append(df["status"].fillna(NULL_STATUS).to_numpy(np.int64).astype(np.int16))
+
+        read += len(df)
+        if progress:
+            progress(read)
+
+    empty = {"rowid": np.int64, "mmsi": np.int64, "epoch": np.int64, "datetime": "S19",
+             "lat": np.int32, "lon": np.int32, "status": np.int16}
+    return {name: np.concatenate(chunks) if chunks else np.empty(0, dtype=empty[name])
+            for name, chunks in parts.items()}
+
+
+def build(db_path, days=DEFAULT_DAYS, directory=None, table_name=None, progress=None):
+    """최근 days 일(마지막 행 날짜 기준)의 항적으로 새 버전을 만들고 current.json 을 바꿈
+
+    Returns:
+        새 버전의 meta dict
+    """
+    directory = directory or default_directory(db_path)
+    uri = "file:{}?mode=ro".format(db_path.replace("\\", "/"))
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        table_name = table_name or find_trajectory_table(conn)
+        max_rowid, last_mmsi, last_datetime = last_row(conn, table_name)
+        max_datetime = conn.execute(f'SELECT MAX(datetime) FROM "{table_name}"').fetchone()[0]
+        if max_datetime is None:
+            raise ValueError("항적 테이블이 비어 있습니다")
+        start = datetime.strptime(max_datetime[:10], "%Y-%m-%d") - timedelta(days=days - 1)
+        start_datetime = start.strftime(DATETIME_FORMAT)
+
+        # 최근 기간이 파티션으로 옮겨졌으면 함께 읽음
+        partitions = [p for p in load_catalog(conn, table_name) if p.end_datetime >= start_datetime]
+        source = f'"{table_name}"'
+        if partitions:
+            columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{table_name}")')]
+            route = Route(union_source(table_name, columns, partitions), partitions, db_path)
+            route.attach(conn)
+            source = route.source
+
+        data = _read_columns(conn, source, start_datetime, max_rowid, progress)
+    finally:
+        conn.close()
+
+    # (mmsi, epoch) 정렬, 같은 시각은 rowid 순 (SQLite (mmsi, datetime) 인덱스 순서와 같음)
+    order = np.lexsort((data.pop("rowid"), data["epoch"], data["mmsi"]))
+    vessels, starts = np.unique(data["mmsi"][order], return_index=True)
+    offsets = np.append(starts, len(order)).astype(np.int64)
+
+    version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    path = os.path.join(directory, version)
+    os.makedirs(path)
+    for name in COLUMNS:
+        np.save(os.path.join(path, f"{name}.npy"), data[name][order])
+    np.save(os.path.join(path, "vessels.npy"), vessels)
+    np.save(os.path.join(path, "offsets.npy"), offsets)
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "source_table": table_name,
+        "start_datetime": start_datetime,
+        "days": days,
+        "last_row": [max_rowid, last_mmsi, last_datetime],
+        "rows": int(len(order)),
+        "vessels": int(len(vessels)),
+        "created_at": datetime.now().strftime(DATETIME_FORMAT),
+    }
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    # 새 버전으로 전환 후 이전 버전 정리 (서버가 아직 매핑 중이면 삭제 실패 -> 다음 빌드 때 다시 시도)
+    current = os.path.join(directory, "current.json")
+    with open(current + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"version": version}, f)
+    os.replace(current + ".tmp", current)
+    for name in os.listdir(directory):
+        old = os.path.join(directory, name)
+        if name != version and os.path.isdir(old):
+            shutil.rmtree(old, ignore_errors=True)
+
+    return meta
+
+
+def to_rows(columns):
+    """HotStore.trajectory() 컬럼 배열 -> (mmsi, datetime, lat, lon, status) 행 목록 (파이썬 기본 타입)"""
+    return list(zip(*(column.tolist() for column in columns)))
+
+
+class HotStore:
+    """메모리 매핑된 최근 항적 컬럼 저장소
+
+    저장소가 아직 없으면 응답하지 않다가 current.json 이 생기거나 바뀌면 새 버전을 엶
+
+    Args:
+        directory: 저장소 폴더 (current.json 이 있는 곳)
+        check_interval: current.json 변경 여부를 확인하는 최소 간격 (초)
+    """
+
+    def __init__(self, directory, check_interval=5):
+        self.directory = directory
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._loaded_mtime = None
+        self._checked_at = 0.0
+        self._fresh = {}
+        self.meta = None
+        self.columns = {}
+
+    def reload(self):
+        """current.json 이 가리키는 버전을 mmap 으로 다시 엶"""
+        current = os.path.join(self.directory, "current.json")
+        mtime = os.stat(current).st_mtime_ns
+        path, meta = current_version(self.directory)
+
+        columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                   for name in COLUMNS + ("vessels", "offsets")}
+        with self._lock:
+            self.meta = meta
+            self.columns = columns
+            self._loaded_mtime = mtime
+            self._fresh = {}
+            self._checked_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        """확인 간격이 지났고 current.json 이 생기거나 바뀌었으면 새 버전을 엶"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(os.path.join(self.directory, "current.json")).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._loaded_mtime:
+            self.reload()
+
+    def is_fresh(self, conn, table_name, signature):
+        """저장소 이후 원본 테이블에 행이 추가/교체되지 않았는지 (DB 파일 서명별로 한 번만 확인)"""
+        if self.meta is None or table_name != self.meta["source_table"]:
+            return False
+        fresh = self._fresh.get(signature)
+        if fresh is None:
+            fresh = last_row(conn, table_name) == self.meta["last_row"]
+            self._fresh = {signature: fresh}
+        return fresh
+
+    def supports(self, builder):
+        """이 조건을 저장소로 답할 수 있는지 (기간이 저장소 안, 추가 컬럼/좌표 검사 없음 제외)"""
+        self._ensure_loaded()
+        return (self.meta is not None
+                and not builder.extra_columns
+                and builder.bounds is not None
+                and builder.start_datetime >= self.meta["start_datetime"])
+
+    def _windows(self, builder, columns):
+        """조회할 (MMSI, 시작 epoch, 끝 epoch) 목록 - MMSI 순서, 선박별 시간 순서"""
+        start, end = to_epoch(builder.start_datetime), to_epoch(builder.end_datetime)
+        wanted = None
+        if builder.mmsi_list:
+            wanted = set()
+            for mmsi in builder.mmsi_list:
+                try:
+                    wanted.add(int(mmsi))
+                except (TypeError, ValueError):
+                    pass
+
+        if builder.ranges is not None:
+            # 공간 인덱스 구간이 있으면 SQL 과 같은 구간만 (샘플링 시 구간 선박의 전체 기간)
+            windows = [(int(mmsi), max(to_epoch(s), start), min(to_epoch(e), end))
+                       for mmsi, s, e in builder.scan_ranges()]
+        elif wanted is not None:
+            windows = [(mmsi, start, end) for mmsi in sorted(wanted)]
+        else:
+            windows = [(mmsi, start, end) for mmsi in columns["vessels"].tolist()]
+
+        return [w for w in windows if w[0] != 0 and (wanted is None or w[0] in wanted)]
+
+    def _select(self, builder, columns):
+        """기간/MMSI/상태 조건을 만족하는 행 번호 배열 ((mmsi, epoch) 순서)"""
+        vessels, offsets, epoch = columns["vessels"], columns["offsets"], columns["epoch"]
+        slices = []
+        for mmsi, start, end in self._windows(builder, columns):
+            i = np.searchsorted(vessels, mmsi)
+            if i >= len(vessels) or vessels[i] != mmsi:
+                continue
+            lo, hi = int(offsets[i]), int(offsets[i + 1])
+            segment = epoch[lo:hi]
+            first = lo + int(np.searchsorted(segment, start, "left"))
+            last = lo + int(np.searchsorted(segment, end, "right"))
+            if first < last:
+                slices.append(np.arange(first, last))
+        index = np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+        if builder.status_list:
+            # API 상태값 -> DB 값 (1씩 뺌), NULL 상태는 제외
+            status = columns["status"][index]
+            index = index[np.isin(status, [s - 1 for s in builder.status_list])]
+        return index
+
+    def _in_bounds(self, builder, columns, index):
+        """좌표 범위 / 다각형 조건 (정수 좌표 기준, NULL 은 제외)"""
+        lat, lon = columns["lat"][index], columns["lon"][index]
+        lat_min, lat_max, lon_min, lon_max = scaled_bounds(builder.bounds)
+        mask = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+        if builder.polygon is not None:
+            mask[mask] = in_polygon_array(lat[mask], lon[mask], builder.polygon)
+        return mask
+
+    def trajectory(self, builder):
+        """TrajectoryQuery.build() 와 같은 결과를 컬럼 배열로
+
+        Returns:
+            (mmsi, datetime, lat, lon, status) 배열 - datetime 은 문자열, 좌표는 실수
+        """
+        columns = self.columns  # 조회 중 새 버전으로 바뀌어도 같은 버전을 읽도록
+        index = self._select(builder, columns)
+
+        if builder.sampling_step > 1 and len(index):
+            # 선박별 순번 (좌표 검사 전 행 기준, SQL ROW_NUMBER 와 같음)
+            mmsi = columns["mmsi"][index]
+            first = np.concatenate(([True], mmsi[1:] != mmsi[:-1]))
+            starts = np.flatnonzero(first)
+            rank = np.arange(len(index)) - starts[np.cumsum(first) - 1]
+            index = index[rank % builder.sampling_step == 0]
+
+        index = index[self._in_bounds(builder, columns, index)]
+
+        status = columns["status"][index]
+        if (status == NULL_STATUS).any():
+            status = np.where(status == NULL_STATUS, None, status.astype(object))
+        return (
+            columns["mmsi"][index],
+            columns["datetime"][index].astype("U19"),
+            columns["lat"][index] / COORD_SCALE,
+            columns["lon"][index] / COORD_SCALE,
+            status,
+        )
+
+    def positions(self, builder):
+        """TrajectoryQuery.build_positions() 와 같은 행의 (lat, lon, status) - 실수 좌표"""
+        columns = self.columns
+        index = self._select(builder, columns)
+        index = index[self._in_bounds(builder, columns, index)]
+        index = index[columns["status"][index] != NULL_STATUS]
+        return (columns["lat"][index] / COORD_SCALE,
+                columns["lon"][index] / COORD_SCALE,
+                columns["status"][index].astype(np.int64))
+
+    def stats(self):
+        """헬스 체크용 상태"""
+        if self.meta is None:
+            return None
+        return {key: self.meta[key] for key in ("start_datetime", "rows", "vessels", "created_at")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="최근 항적 컬럼 저장소(hot store) 생성")
+    parser.add_argument("db_path", nargs="?", default=DEFAULT_DB_PATH, help="데이터베이스 경로")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="마지막 행 날짜 기준 보관 일수")
+    parser.add_argument("--dir", help="저장소 폴더 (기본: <DB 이름>_hot)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        print(f"❌ 파일 없음: {args.db_path}")
+        sys.exit(1)
+    if args.days < 1:
+        print("❌ --days 는 1 이상이어야 합니다")
+        sys.exit(1)
+
+    def progress(rows):
+        print(f"   - {rows:,}행 읽음")
+
+    started = time.perf_counter()
+    try:
+        meta = build(args.db_path, args.days, args.dir, progress=progress)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ {meta['start_datetime'][:10]} 이후 {meta['rows']:,}행 / 선박 {meta['vessels']:,}척 "
+          f"({time.perf_counter() - started:.1f}초)")
+    print(f"   {args.dir or default_directory(args.db_path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+HTTP 조건부 요청 / 캐시 헤더
+같은 조회 조건 + 같은 DB 버전이면 응답 본문이 같으므로 이를 강한 ETag 로 사용
+- If-None-Match 가 일치하면 쿼리를 실행하지 않고 304 응답
+- Last-Modified 는 DB 파일(및 WAL 파일)의 수정 시각
+- 종료 날짜가 오늘 이전인 과거 기간은 브라우저/프록시가 오래 보관하도록 Cache-Control 지정
+"""
+
+import hashlib
+from datetime import date
+from email.utils import formatdate
+
+# 과거 기간 조회 결과 보관 시간 (초), DB 가 바뀌면 ETag 가 달라지므로 재검증 시 갱신됨
+HISTORICAL_MAX_AGE = 86400
+
+# 오늘이 포함된 기간은 매번 재검증 (304 로 본문 전송만 생략)
+CURRENT_CACHE_CONTROL = "no-cache"
+
+# 압축 미들웨어가 ETag 뒤에 붙이는 인코딩 표시 (비교 시 제거)
+ENCODING_SUFFIXES = ("-gzip", "-br")
+
+
+def make_etag(key, version):
+    """캐시 키 + DB 버전 -> 강한 ETag"""
+    digest = hashlib.sha1(repr((key, version)).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def last_modified(version):
+    """DB 파일 서명(ConnectionPool.file_signature) -> Last-Modified 헤더 값"""
+    mtimes = [part[1] for part in version if part is not None]
+    if not mtimes:
+        return None
+    return formatdate(max(mtimes) / 1e9, usegmt=True)
+
+
+def is_historical(end_date, today=None):
+    """종료 날짜(YYYY-MM-DD)가 오늘 이전이면 True"""
+    try:
+        end = date.fromisoformat(str(end_date)[:10])
+    except ValueError:
+        return False
+    return end < (today or date.today())
+
+
+def _strip_etag(tag):
+    """W/ 접두어와 압축 인코딩 표시를 제거한 비교용 ETag"""
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(suffix + '"'):
+            return tag[:-len(suffix) - 1] + '"'
+    return tag
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match 헤더에 etag 가 포함되어 있으면 True"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(_strip_etag(tag) == etag for tag in if_none_match.split(","))
+
+
+def matched_etag(if_none_match, etag):
+    """If-None-Match 에서 etag 와 일치하는 태그를 받은 그대로 반환 (인코딩 표시 포함), 없으면 None
+
+    304 응답은 재검증한 200 응답과 같은 ETag 를 보내야 하므로 압축 미들웨어가 사용
+    """
+    if not if_none_match or if_none_match.strip() == "*":
+        return None
+    for tag in if_none_match.split(","):
+        if _strip_etag(tag) == etag:
+            tag = tag.strip()
+            return tag[2:] if tag.startswith("W/") else tag
+    return None
+
+
+def cache_headers(etag, version, end_date=None, max_age=HISTORICAL_MAX_AGE,
+                  current_max_age=None, vary=None):
+    """ETag / Last-Modified / Cache-Control 헤더
+
+    Args:
+        end_date: 조회 종료 날짜, 과거이면 max_age 동안 보관
+        current_max_age: 오늘이 포함된 기간의 보관 시간 (None 이면 매번 재검증)
+        vary: 응답이 달라지는 요청 헤더 (예: Accept)
+    """
+    headers = {"ETag": etag}
+    modified = last_modified(version)
+    if modified:
+        headers["Last-Modified"] = modified
+    if end_date is not None and is_historical(end_date):
+        headers["Cache-Control"] = f"public, max-age={max_age}"
+    elif current_max_age:
+        headers["Cache-Control"] = f"public, max-age={current_max_age}"
+    else:
+        headers["Cache-Control"] = CURRENT_CACHE_CONTROL
+    if vary:
+        headers["Vary"] = vary
+    return headers
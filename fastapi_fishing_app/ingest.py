@@ -0,0 +1,641 @@
+"""
+원시 AIS 데이터 적재 도구
+AIS CSV 또는 NMEA(AIVDM/AIVDO) 파일을 스트리밍으로 읽어 검증 후 항적 테이블에 추가(append)
+- 저장 형식으로 변환: 위경도 ×1e7 정수, 속력/침로 0.1 단위 정수, 시각 'YYYY-MM-DD HH:MM:SS'
+- WAL 모드에서 executemany 묶음 + 큰 트랜잭션으로 기록 (적재 중에도 서버 조회 가능)
+- 대량 적재 시 인덱스를 삭제했다가 적재 후 다시 생성 (행마다 인덱스 갱신 비용 제거)
+- 적재 후 시간 집계(rollups) / 공간 인덱스(spatial_index) / 항해 구간(trips)을 추가된 rowid 범위만 증분 갱신
+- 최근 항적 저장소(hot_store)를 만들어 둔 DB 면 같은 보관 일수로 다시 만듦 (폴더는 서버와 같이 FISHING_HOT_STORE 우선)
+- 래스터 타일 디스크 캐시(raster_tiles)에서 적재한 행의 기간과 겹치는 필터의 타일을 삭제
+  서버의 결과/타일 캐시는 DB 파일 서명이 바뀌므로 다음 요청에서 자동으로 무효화됨
+
+입력 형식:
+- CSV: 헤더로 컬럼을 찾음 (mmsi, datetime/BaseDateTime/timestamp, lat/latitude, lon/longitude,
+  status 또는 nav_status, sog, cog, heading), 위경도가 ±180 을 넘으면 이미 ×1e7 된 값으로 봄
+  pandas C 파서로 묶음 단위로 읽고 변환/검증도 컬럼 단위로 처리 (한 코어에서 초당 수십만 행)
+- NMEA: 1/2/3(Class A), 18(Class B) 위치 보고만 사용, 수신 시각은 태그 블록(\\c:유닉스초\\)
+  또는 줄 앞의 시각('2023-01-01 00:00:00,!AIVDM,...')에서 읽음
+- .gz 파일은 압축을 풀며 읽고 '-' 는 표준 입력
+
+상태값(status): DB 저장값 그대로(1=조업, 그 외 비조업), 항해 상태(nav_status, MarineCadastre 의 Status)는
+7(조업 중)이면 1
+
+사용법:
+    python ingest.py 2023-01.csv 2023-02.csv.gz [--db DB 경로] [--table trajectory]
+    python ingest.py feed.nmea --format nmea --defer-indexes always
+"""
+
+import argparse
+import gzip
+import io
+import itertools
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from migrate_db import DEFAULT_DB_PATH, find_trajectory_table
+from partitions import has_partitions
+import hot_store
+import raster_tiles
+import rollups
+import spatial_index
+import trips
+
+DEFAULT_TABLE = "trajectory"
+
+# 항적 테이블 컬럼 (sog/cog 는 0.1 단위, heading 은 도)
+TRAJECTORY_COLUMNS = ("mmsi", "datetime", "lat", "lon", "status", "sog", "cog", "heading")
+
+COORD_SCALE = 10_000_000
+
+# executemany 한 번에 넘길 행 수 / 한 트랜잭션에 기록할 행 수
+DEFAULT_BATCH_ROWS = 50_000
+DEFAULT_COMMIT_ROWS = 1_000_000
+
+# --defer-indexes auto: 적재할 행이 기존 행의 25% 이상으로 추정되면 인덱스 재생성이 더 빠름
+DEFER_INDEX_RATIO = 0.25
+ESTIMATED_BYTES_PER_ROW = {"csv": 70, "nmea": 60}
+
+# CSV 헤더 이름 (소문자, 공백/밑줄 제거) -> 컬럼
+CSV_ALIASES = {
+    "mmsi": "mmsi",
+    "datetime": "datetime", "basedatetime": "datetime", "timestamp": "datetime",
+    "time": "datetime", "datetimeutc": "datetime",
+    "lat": "lat", "latitude": "lat",
+    "lon": "lon", "lng": "lon", "long": "lon", "longitude": "lon",
+    "status": "status",
+    "navstatus": "nav_status", "navigationalstatus": "nav_status", "navigationstatus": "nav_status",
+    "sog": "sog", "speed": "sog",
+    "cog": "cog", "course": "cog",
+    "heading": "heading", "trueheading": "heading",
+}
+
+NAV_STATUS_FISHING = 7          # AIS 항해 상태 "engaged in fishing"
+STATUS_FISHING = 1
+STATUS_OTHER = 0
+
+MMSI_MIN = 1
+MMSI_MAX = 999_999_999
+SOG_MAX = 102.2                 # 102.3 = 미상
+HEADING_UNAVAILABLE = 511
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# NMEA 6비트 문자 -> 8진수 두 자리 (str.translate 후 int(..., 8) 로 한 번에 비트열 변환)
+_SIXBIT_OCTAL = {}
+for _code in range(64):
+    _char = chr(_code + 48 if _code < 40 else _code + 56)
+    _SIXBIT_OCTAL[ord(_char)] = f"{_code:02o}"
+del _code, _char
+
+
+class IngestStats:
+    """읽은 행 / 기록한 행 / 거부 사유별 건수"""
+
+    def __init__(self):
+        self.read = 0
+        self.written = 0
+        self.rejected = Counter()
+
+    def reject(self, reason, count=1):
+        if count:
+            self.rejected[reason] += count
+
+    def summary(self):
+        lines = [f"읽음 {self.read:,}행, 기록 {self.written:,}행, 거부 {sum(self.rejected.values()):,}행"]
+        for reason, count in self.rejected.most_common():
+            lines.append(f"   - {reason}: {count:,}")
+        return "\n".join(lines)
+
+
+def create_table(conn, table_name):
+    """항적 테이블 생성 (이미 있으면 그대로)"""
+    conn.execute(
+        f'CREATE TABLE IF NOT EXISTS "{table_name}" (mmsi INTEGER, datetime TEXT, lat INTEGER, '
+        f'lon INTEGER, status INTEGER, sog INTEGER, cog INTEGER, heading INTEGER)'
+    )
+
+
+def normalize_datetime(text):
+    """시각 문자열 -> 'YYYY-MM-DD HH:MM:SS' (ISO 'T' 구분자, 소수 초, 'Z', '/' 날짜, 유닉스 초 허용)
+
+    시간대 변환은 하지 않음 (원본 시각 그대로 저장)
+    """
+    text = text.strip()
+    if len(text) >= 19 and text[13] == ":" and text[16] == ":":
+        if text[4] == "/" and text[7] == "/":
+            text = text.replace("/", "-", 2)
+        if text[4] == "-" and text[7] == "-":
+            if len(text) == 19 and text[10] == " ":
+                return text
+            if text[10] in " T":
+                return f"{text[:10]} {text[11:19]}"
+    elif text.isdigit():
+        seconds = int(text)
+        if seconds > 100_000_000_000:   # 밀리초
+            seconds //= 1000
+        return time.strftime(DATETIME_FORMAT, time.gmtime(seconds))
+    raise ValueError(f"시각 형식 오류: {text}")
+
+
+def _normalize_datetimes(values):
+    """시각 Series -> 저장 형식 문자열 Series (변환할 수 없으면 None)
+
+    이미 저장 형식이면 그대로, ISO 형식은 앞 19자리로, 그 외는 normalize_datetime 으로 한 행씩 변환
+    """
+    text = values.astype(str)
+    canonical = (text.str.len() == 19) & pd.to_datetime(text, format=DATETIME_FORMAT, errors="coerce").notna()
+    if canonical.all():
+        return text
+
+    result = text.where(canonical, None)
+    rest = text[~canonical]
+    iso = rest.str.slice(0, 10) + " " + rest.str.slice(11, 19)
+    iso_ok = rest.str[10].isin((" ", "T")) & pd.to_datetime(iso, format=DATETIME_FORMAT, errors="coerce").notna()
+    result[iso_ok[iso_ok].index] = iso[iso_ok]
+    for index, value in rest[~iso_ok].items():
+        try:
+            result[index] = normalize_datetime(value)
+        except ValueError:
+            pass
+    return result
+
+
+def _coordinates(values):
+    """위경도 문자열 Series -> 도 (±180 을 넘으면 ×1e7 저장값으로 봄)"""
+    degrees = pd.to_numeric(values, errors="coerce")
+    scaled = degrees.abs() > 180
+    if scaled.any():
+        degrees = degrees.where(~scaled, degrees / COORD_SCALE)
+    return degrees
+
+
+def _nullable_ints(values, low, high, factor=1):
+    """숫자 문자열 Series -> 정수 목록 (빈 값, 범위 밖은 None)"""
+    numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+    valid = (numbers >= low) & (numbers <= high)
+    scaled = np.where(valid, np.rint(numbers * factor), -1).astype(np.int64).tolist()
+    return [v if v >= 0 else None for v in scaled]
+
+
+def _validated(mmsi, dt, lat, lon, status, sog, cog, heading, stats):
+    """범위 검증 후 저장 형식 행 (거부하면 None)"""
+    if not MMSI_MIN <= mmsi <= MMSI_MAX:
+        stats.reject("MMSI 범위 밖")
+        return None
+    # AIS 미상 좌표(91, 181)와 범위 밖 좌표 제외
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        stats.reject("좌표 범위 밖")
+        return None
+    if heading is not None and heading >= 360:
+        heading = None
+    return (mmsi, dt, int(round(lat * COORD_SCALE)), int(round(lon * COORD_SCALE)),
+            status, sog, cog, heading)
+
+
+def _csv_column(name):
+    """CSV 헤더 이름 -> 컬럼 (모르는 컬럼은 None)"""
+    return CSV_ALIASES.get(str(name).strip().lower().replace("_", "").replace(" ", ""))
+
+
+def parse_csv(path, stats, status_mode="auto", chunk_rows=DEFAULT_BATCH_ROWS, duplicates=None):
+    """AIS CSV -> 저장 형식 행 묶음 (pandas C 파서로 chunk_rows 씩 읽어 컬럼 단위로 변환/검증)
+
+    Args:
+        status_mode: auto | db (1=조업) | nav (항해 상태 7=조업)
+            auto 는 nav_status 컬럼이 있거나 status 값이 2 를 넘으면 nav, 아니면 db
+        duplicates: DuplicateFilter (None 이면 중복 행도 기록)
+    """
+    source = sys.stdin.buffer if path == "-" else path
+    # 숫자 컬럼은 C 파서가 바로 변환 (잘못된 값이 섞인 묶음만 문자열로 남아 to_numeric 에서 NaN 처리)
+    chunks = pd.read_csv(
+        source, chunksize=chunk_rows,
+        usecols=lambda name: _csv_column(name) is not None,
+        encoding="utf-8-sig", encoding_errors="replace", on_bad_lines="skip",
+    )
+
+    for chunk in chunks:
+        chunk.columns = [_csv_column(name) for name in chunk.columns]
+        chunk = chunk.loc[:, ~chunk.columns.duplicated()]
+        missing = [c for c in ("mmsi", "datetime", "lat", "lon") if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"CSV 에 필수 컬럼이 없습니다: {', '.join(missing)} ({path})")
+        stats.read += len(chunk)
+
+        mmsi = pd.to_numeric(chunk["mmsi"], errors="coerce")
+        lat = _coordinates(chunk["lat"])
+        lon = _coordinates(chunk["lon"])
+        dt = _normalize_datetimes(chunk["datetime"])
+
+        invalid = mmsi.isna() | lat.isna() | lon.isna() | dt.isna()
+        bad_mmsi = ~invalid & ~mmsi.between(MMSI_MIN, MMSI_MAX)
+        # AIS 미상 좌표(91, 181)와 범위 밖 좌표 제외
+        bad_coord = ~invalid & ~bad_mmsi & ~(lat.between(-90, 90) & lon.between(-180, 180))
+        stats.reject("형식 오류", int(invalid.sum()))
+        stats.reject("MMSI 범위 밖", int(bad_mmsi.sum()))
+        stats.reject("좌표 범위 밖", int(bad_coord.sum()))
+
+        keep = ~(invalid | bad_mmsi | bad_coord)
+        if duplicates is not None:
+            unique = duplicates.keep_mask(mmsi[keep].to_numpy(dtype=np.int64), dt[keep].to_numpy())
+            stats.reject("중복", int((~unique).sum()))
+            keep[keep.to_numpy().nonzero()[0][~unique]] = False
+        if not keep.all():
+            chunk, mmsi, lat, lon, dt = chunk[keep], mmsi[keep], lat[keep], lon[keep], dt[keep]
+        count = len(chunk)
+        if not count:
+            continue
+
+        if status_mode == "auto":
+            # 첫 묶음으로 한 번만 결정: nav_status 컬럼이 있거나 status 에 2 보다 큰 값(항해 상태 코드)이 있으면 nav
+            values = pd.to_numeric(chunk["status"], errors="coerce") if "status" in chunk.columns else None
+            nav = "nav_status" in chunk.columns or (values is not None and bool((values > 2).any()))
+            status_mode = "nav" if nav else "db"
+        status_column = "status" if status_mode == "db" else (
+            "nav_status" if "nav_status" in chunk.columns else "status")
+        if status_column in chunk.columns:
+            fishing_value = STATUS_FISHING if status_mode == "db" else NAV_STATUS_FISHING
+            values = pd.to_numeric(chunk[status_column], errors="coerce").to_numpy()
+            status = np.where(values == fishing_value, STATUS_FISHING, STATUS_OTHER).tolist()
+        else:
+            status = [STATUS_OTHER] * count
+
+        nulls = [None] * count
+        sog = _nullable_ints(chunk["sog"], 0, SOG_MAX, 10) if "sog" in chunk.columns else nulls
+        cog = _nullable_ints(chunk["cog"], 0, 359.9, 10) if "cog" in chunk.columns else nulls
+        heading = _nullable_ints(chunk["heading"], 0, 359) if "heading" in chunk.columns else nulls
+
+        yield list(zip(
+            mmsi.to_numpy(dtype=np.int64).tolist(),
+            dt.tolist(),
+            np.rint(lat.to_numpy() * COORD_SCALE).astype(np.int64).tolist(),
+            np.rint(lon.to_numpy() * COORD_SCALE).astype(np.int64).tolist(),
+            status, sog, cog, heading,
+        ))
+
+
+def _nmea_checksum_ok(sentence):
+    """'!AIVDM,...*hh' 체크섬 확인 (체크섬이 없으면 통과)"""
+    star = sentence.rfind("*")
+    if star < 0:
+        return True
+    value = 0
+    for byte in sentence[1:star].encode("ascii", "replace"):
+        value ^= byte
+    return sentence[star + 1:star + 3].upper() == f"{value:02X}"
+
+
+def _nmea_time(prefix):
+    """NMEA 문장 앞부분(태그 블록 또는 시각 문자열) -> 'YYYY-MM-DD HH:MM:SS' (없으면 None)"""
+    if not prefix:
+        return None
+    if prefix.startswith("\\"):
+        # 태그 블록: \s:수신기,c:1672531200*hh\
+        for item in prefix.strip("\\").split("*")[0].split(","):
+            if item.startswith("c:"):
+                return normalize_datetime(item[2:])
+        return None
+    return normalize_datetime(prefix.strip().rstrip(",;").strip())
+
+
+def decode_position(payload, fill_bits=0):
+    """AIS 6비트 페이로드 -> (MMSI, 항해 상태, 위도, 경도, 속력, 침로, 선수 방위), 위치 보고가 아니면 None
+
+    속력/침로는 0.1 단위 정수, 미상 값은 None (항해 상태는 Class B 이면 None)
+    """
+    bits = int(payload.translate(_SIXBIT_OCTAL), 8)
+    total = len(payload) * 6 - fill_bits
+    if fill_bits:
+        bits >>= fill_bits
+    msg_type = bits >> (total - 6)
+
+    def field(start, length):
+        return (bits >> (total - start - length)) & ((1 << length) - 1)
+
+    def signed(start, length):
+        value = field(start, length)
+        return value - (1 << length) if value >> (length - 1) else value
+
+    if msg_type in (1, 2, 3) and total >= 137:
+        nav_status = field(38, 4)
+        sog, lon, lat, cog, heading = field(50, 10), signed(61, 28), signed(89, 27), field(116, 12), field(128, 9)
+    elif msg_type == 18 and total >= 133:
+        nav_status = None
+        sog, lon, lat, cog, heading = field(46, 10), signed(57, 28), signed(85, 27), field(112, 12), field(124, 9)
+    else:
+        return None
+
+    return (
+        field(8, 30),
+        nav_status,
+        lat / 600000.0,             # 1/10000 분 -> 도 (91 = 미상)
+        lon / 600000.0,             # (181 = 미상)
+        sog if sog < 1023 else None,
+        cog if cog < 3600 else None,
+        heading if heading != HEADING_UNAVAILABLE else None,
+    )
+
+
+def parse_nmea(lines, stats, verify_checksum=True):
+    """NMEA 줄 이터레이터 -> 저장 형식 행 (단일 문장 위치 보고만)"""
+    for line in lines:
+        start = line.find("!")
+        if start < 0 or line[start + 3:start + 6] not in ("VDM", "VDO"):
+            continue
+        stats.read += 1
+        sentence = line[start:].strip()
+        fields = sentence.split(",")
+        if len(fields) < 7:
+            stats.reject("형식 오류")
+            continue
+        if fields[1] != "1":
+            # 여러 문장으로 나뉜 메시지는 정적 정보(5, 24 등)이므로 위치 보고가 아님
+            stats.reject("위치 보고 아님")
+            continue
+        if verify_checksum and not _nmea_checksum_ok(sentence):
+            stats.reject("체크섬 오류")
+            continue
+        try:
+            dt = _nmea_time(line[:start])
+            if dt is None:
+                stats.reject("수신 시각 없음")
+                continue
+            decoded = decode_position(fields[5], int(fields[6][:1] or 0))
+        except (ValueError, KeyError):
+            stats.reject("형식 오류")
+            continue
+        if decoded is None:
+            stats.reject("위치 보고 아님")
+            continue
+
+        mmsi, nav_status, lat, lon, sog, cog, heading = decoded
+        status = STATUS_FISHING if nav_status == NAV_STATUS_FISHING else STATUS_OTHER
+        row = _validated(mmsi, dt, lat, lon, status, sog, cog, heading, stats)
+        if row is not None:
+            yield row
+
+
+def open_source(path):
+    """입력 파일 -> 텍스트 줄 이터레이터 ('-' 는 표준 입력, .gz 는 압축 해제)"""
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="replace", newline="")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace", newline="")
+    return open(path, "r", encoding="utf-8", errors="replace", newline="", buffering=1024 * 1024)
+
+
+def detect_format(path):
+    """확장자 / 첫 줄로 입력 형식 판별 (csv | nmea)"""
+    name = path[:-3] if path.endswith(".gz") else path
+    ext = os.path.splitext(name)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".nmea", ".ais", ".aivdm"):
+        return "nmea"
+    if path == "-":
+        return "csv"
+    with open_source(path) as f:
+        first = f.readline()
+    return "nmea" if ("VDM," in first or "VDO," in first) else "csv"
+
+
+class DuplicateFilter:
+    """같은 선박 / 같은 시각 행 제외 (여러 수신기에서 받은 같은 보고)
+
+    묶음 안의 중복과, 이전 묶음에서 본 선박별 마지막 시각과 같은 행을 제외
+    """
+
+    def __init__(self):
+        self.last_seen = {}
+
+    def keep_mask(self, mmsi, datetimes):
+        """MMSI / 시각 배열 -> 남길 행 마스크"""
+        frame = pd.DataFrame({"mmsi": mmsi, "datetime": datetimes})
+        duplicated = frame.duplicated()
+        if self.last_seen:
+            duplicated |= frame["mmsi"].map(self.last_seen) == frame["datetime"]
+        duplicated = duplicated.to_numpy()
+        last = frame[~duplicated].drop_duplicates("mmsi", keep="last")
+        self.last_seen.update(zip(last["mmsi"].tolist(), last["datetime"].tolist()))
+        return ~duplicated
+
+    def filter_rows(self, batch, stats):
+        """행 묶음에서 중복 제외"""
+        if not batch:
+            return batch
+        keep = self.keep_mask([row[0] for row in batch], [row[1] for row in batch])
+        stats.reject("중복", int((~keep).sum()))
+        return [row for row, k in zip(batch, keep.tolist()) if k]
+
+
+def iter_batches(sources, stats, fmt="auto", status_mode="auto", verify_checksum=True,
+                 drop_duplicates=True, batch_rows=DEFAULT_BATCH_ROWS):
+    """여러 입력 파일을 차례로 읽어 저장 형식 행 묶음 생성"""
+    duplicates = DuplicateFilter() if drop_duplicates else None
+    for path in sources:
+        source_format = detect_format(path) if fmt == "auto" else fmt
+        if source_format == "nmea":
+            with open_source(path) as lines:
+                rows = parse_nmea(lines, stats, verify_checksum)
+                for batch in iter(lambda: list(itertools.islice(rows, batch_rows)), []):
+                    yield duplicates.filter_rows(batch, stats) if duplicates else batch
+        else:
+            yield from parse_csv(path, stats, status_mode, batch_rows, duplicates)
+
+
+def estimate_rows(sources, fmt="auto"):
+    """입력 파일 크기로 추정한 행 수 (표준 입력 / 압축 파일은 압축 해제 크기를 모르므로 ×5)"""
+    total = 0
+    for path in sources:
+        if path == "-":
+            continue
+        source_format = detect_format(path) if fmt == "auto" else fmt
+        size = os.path.getsize(path) * (5 if path.endswith(".gz") else 1)
+        total += size // ESTIMATED_BYTES_PER_ROW[source_format]
+    return total
+
+
+def drop_indexes(conn, table_name):
+    """테이블 인덱스 삭제 -> 다시 만들 CREATE INDEX 문 목록"""
+    statements = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        [table_name],
+    ).fetchall()
+    for name, _ in statements:
+        conn.execute(f'DROP INDEX "{name}"')
+    conn.commit()
+    return [(name, sql) for name, sql in statements]
+
+
+def restore_indexes(conn, statements):
+    """drop_indexes 로 삭제한 인덱스 재생성 후 ANALYZE"""
+    for name, sql in statements:
+        print(f"   🔨 {name} 재생성 중...")
+        started = time.perf_counter()
+        conn.execute(sql)
+        conn.commit()
+        print(f"      완료 ({time.perf_counter() - started:.1f}초)")
+    if statements:
+        conn.execute("ANALYZE")
+        conn.commit()
+
+
+def ingest(conn, table_name, batches, stats, commit_rows=DEFAULT_COMMIT_ROWS, progress=None):
+    """행 묶음 이터레이터를 묶음마다 executemany, commit_rows 단위 트랜잭션으로 기록
+
+    Returns:
+        기록한 행 수
+    """
+    present = {row[1].lower() for row in conn.execute(f'PRAGMA table_info("{table_name}")')}
+    # sog/cog/heading 이 없는 기존 테이블에는 필수 컬럼만 기록
+    width = len(TRAJECTORY_COLUMNS) if all(c in present for c in TRAJECTORY_COLUMNS) else 5
+    columns = TRAJECTORY_COLUMNS[:width]
+    sql = (f'INSERT INTO "{table_name}" ({", ".join(columns)}) '
+           f'VALUES ({", ".join("?" * width)})')
+
+    written = 0
+    since_commit = 0
+    conn.execute("BEGIN")
+    try:
+        for batch in batches:
+            if not batch:
+                continue
+            if width < len(TRAJECTORY_COLUMNS):
+                batch = [row[:width] for row in batch]
+            conn.executemany(sql, batch)
+            written += len(batch)
+            since_commit += len(batch)
+            stats.written = written
+            if since_commit >= commit_rows:
+                conn.execute("COMMIT")
+                conn.execute("BEGIN")
+                since_commit = 0
+                if progress:
+                    progress(stats)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="원시 AIS CSV / NMEA 적재")
+    parser.add_argument("sources", nargs="+", help="입력 파일 (.csv, .nmea, .gz, '-' = 표준 입력)")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="데이터베이스 경로 (없으면 생성)")
+    parser.add_argument("--table", help="항적 테이블 (기본: 기존 항적 테이블 또는 trajectory)")
+    parser.add_argument("--format", choices=("auto", "csv", "nmea"), default="auto", help="입력 형식")
+    parser.add_argument("--status", choices=("auto", "db", "nav"), default="auto",
+                        help="CSV 상태 컬럼 해석 (db: 1=조업, nav: 항해 상태 7=조업)")
+    parser.add_argument("--defer-indexes", choices=("auto", "always", "never"), default="auto",
+                        help="적재 중 인덱스 삭제 후 재생성 (auto: 적재량이 기존의 25%% 이상일 때)")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH_ROWS, help="executemany 묶음 행 수 (CSV 읽기 단위)")
+    parser.add_argument("--commit-rows", type=int, default=DEFAULT_COMMIT_ROWS, help="트랜잭션당 행 수")
+    parser.add_argument("--keep-duplicates", action="store_true", help="같은 선박/시각 중복 행도 기록")
+    parser.add_argument("--no-checksum", action="store_true", help="NMEA 체크섬 확인 생략")
+    parser.add_argument("--skip-rollups", action="store_true", help="시간 집계 증분 갱신 생략")
+    parser.add_argument("--skip-spatial", action="store_true", help="공간 인덱스 증분 갱신 생략")
+    parser.add_argument("--skip-trips", action="store_true", help="항해 구간 증분 갱신 생략")
+    parser.add_argument("--skip-hot", action="store_true", help="최근 항적 저장소 재생성 생략")
+    args = parser.parse_args()
+
+    for path in args.sources:
+        if path != "-" and not os.path.exists(path):
+            print(f"❌ 파일 없음: {path}")
+            sys.exit(1)
+
+    print("=" * 60)
+    print("AIS 데이터 적재")
+    print("=" * 60)
+
+    # isolation_level=None: 트랜잭션을 직접 BEGIN/COMMIT
+    conn = sqlite3.connect(args.db, timeout=60, isolation_level=None)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA cache_size=-262144")     # 256MB
+
+        table_name = args.table or find_trajectory_table(conn) or DEFAULT_TABLE
+        create_table(conn, table_name)
+        existing = conn.execute(f'SELECT MAX(rowid) FROM "{table_name}"').fetchone()[0] or 0
+        print(f"📋 항적 테이블: {table_name} (기존 {existing:,}행)")
+
+        defer = args.defer_indexes == "always" or (
+            args.defer_indexes == "auto"
+            and estimate_rows(args.sources, args.format) >= existing * DEFER_INDEX_RATIO
+        )
+        dropped = drop_indexes(conn, table_name) if defer else []
+        if dropped:
+            print(f"⏸️  인덱스 {len(dropped)}개 삭제 (적재 후 재생성)")
+
+        stats = IngestStats()
+        started = time.perf_counter()
+
+        def progress(stats):
+            elapsed = time.perf_counter() - started
+            print(f"   - {stats.written:,}행 기록 ({stats.written / max(elapsed, 1e-9):,.0f}행/초)")
+
+        try:
+            batches = iter_batches(args.sources, stats, args.format, args.status,
+                                   verify_checksum=not args.no_checksum,
+                                   drop_duplicates=not args.keep_duplicates, batch_rows=args.batch)
+            ingest(conn, table_name, batches, stats, args.commit_rows, progress)
+        finally:
+            elapsed = time.perf_counter() - started
+            print(f"\n✅ {stats.summary()}")
+            print(f"   {elapsed:.1f}초, {stats.written / max(elapsed, 1e-9):,.0f}행/초")
+            if dropped:
+                print("\n🔧 인덱스 재생성")
+                restore_indexes(conn, dropped)
+
+        # 시간 파티션으로 나눈 테이블은 옮긴 행을 다시 집계할 수 없으므로 기존 집계만 갱신
+        if not args.skip_rollups and (rollups.watermark(conn, table_name) is not None
+                                      or not has_partitions(conn, table_name)):
+            started = time.perf_counter()
+            applied = rollups.update_rollups(conn, table_name)
+            print(f"📊 시간 집계 반영: rowid {applied:,}개 범위 ({time.perf_counter() - started:.1f}초)")
+        if not args.skip_spatial and spatial_index.watermark(conn, table_name) is not None:
+            # 공간 인덱스는 만들어 둔 DB 에서만 갱신 (최초 생성은 spatial_index.py)
+            started = time.perf_counter()
+            applied = spatial_index.update_index(conn, table_name)
+            print(f"🗺️  공간 인덱스 반영: rowid {applied:,}개 범위 ({time.perf_counter() - started:.1f}초)")
+        if not args.skip_trips and trips.watermark(conn, table_name) is not None:
+            # 항해 구간도 만들어 둔 DB 에서만 갱신 (최초 생성은 trips.py)
+            started = time.perf_counter()
+            applied = trips.update_trips(conn, table_name)
+            print(f"🧭 항해 구간 반영: rowid {applied:,}개 범위 ({time.perf_counter() - started:.1f}초)")
+
+        # 적재한 행의 기간 (래스터 타일 디스크 캐시 무효화용)
+        added_range = conn.execute(
+            f'SELECT MIN(datetime), MAX(datetime) FROM "{table_name}" WHERE rowid > ?', (existing,)
+        ).fetchone()
+
+        conn.execute("PRAGMA optimize")
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+    finally:
+        conn.close()
+
+    # 디스크 캐시는 DB 파일 서명과 무관하게 남으므로 겹치는 기간의 과거 타일을 직접 삭제
+    tile_directory = os.environ.get("FISHING_TILE_CACHE") or raster_tiles.default_directory(args.db)
+    if added_range[0] is not None and os.path.isdir(tile_directory):
+        removed = raster_tiles.TileDiskCache(tile_directory).invalidate(*added_range)
+        if removed:
+            print(f"🧹 래스터 타일 캐시 무효화: 필터 {removed:,}개 ({added_range[0]} ~ {added_range[1]})")
+
+    # 저장소는 만들 때까지의 스냅숏이므로 다시 만들어야 서버가 새 행까지 저장소로 응답
+    # 서버(main.py)와 같은 규칙으로 저장소 폴더 결정 (FISHING_HOT_STORE 우선)
+    hot_directory = os.environ.get("FISHING_HOT_STORE") or hot_store.default_directory(args.db)
+    _, meta = hot_store.current_version(hot_directory)
+    if not args.skip_hot and meta is not None and stats.written:
+        started = time.perf_counter()
+        meta = hot_store.build(args.db, meta["days"], directory=hot_directory, table_name=table_name)
+        print(f"🔥 최근 항적 저장소 재생성: {meta['rows']:,}행 ({time.perf_counter() - started:.1f}초)")
+
+
+if __name__ == "__main__":
+    main()
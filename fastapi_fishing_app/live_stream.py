@@ -0,0 +1,302 @@
+"""
+실시간 위치 스트림
+새로 적재된 항적 행을 rowid 순서로 따라가며(tail) 구독자에게 Server-Sent Events 로 전달
+- 폴링 스레드 하나가 주기마다 마지막 rowid 이후 행을 한 번 조회하고 모든 구독자에게 나눠 줌
+  (구독자 수와 무관하게 DB 조회는 주기당 1회, 구독자가 없으면 스레드 종료)
+- 구독자별 조건(MMSI, 상태, 좌표 범위)은 조회 결과 배열에 NumPy 마스크로 적용하고,
+  같은 조건의 구독자끼리는 직렬화한 본문을 공유
+- 이벤트 id 는 전달한 마지막 rowid: 재연결 시 브라우저가 Last-Event-ID 로 보내면 놓친 행부터 다시 전달
+- 느린 구독자는 대기열이 가득 차면 연결을 끊음 (재연결 후 Last-Event-ID 로 이어 받음)
+
+이벤트 형식:
+    id: <마지막 rowid>
+    event: positions
+    data: [{"mmsi": ..., "datetime": ..., "lat": ..., "lon": ..., "status": ..., "status_name": ...}, ...]
+"""
+
+import asyncio
+import logging
+import threading
+
+import numpy as np
+
+from query_builder import COORD_SCALE, DEFAULT_BOUNDS, scaled_bounds
+from serializers import encode_trajectory_rows
+
+logger = logging.getLogger("fishing.stream")
+
+POLL_INTERVAL = 1.0         # 새 행 확인 간격 (초)
+POLL_BATCH_ROWS = 20000     # 한 번에 읽을 최대 행 수 (가득 차면 바로 다시 조회)
+QUEUE_EVENTS = 64           # 구독자별 대기 이벤트 수 (초과 시 연결 종료)
+REPLAY_ROWS = 100000        # 재연결 시 다시 보내는 최대 행 수 (rowid 기준)
+KEEPALIVE_SECONDS = 15      # 새 행이 없을 때 연결 유지용 주석 전송 간격
+RETRY_MILLISECONDS = 3000   # 브라우저 재연결 대기 시간
+
+
+def fetch_rows(conn, table_name, after, limit=POLL_BATCH_ROWS, until=None):
+    """rowid > after (<= until) 인 행을 rowid 순서로 -> 배치 dict (행이 없으면 None)"""
+    query = f'SELECT rowid, mmsi, datetime, lat, lon, status FROM "{table_name}" WHERE rowid > ?'
+    params = [after]
+    if until is not None:
+        query += " AND rowid <= ?"
+        params.append(until)
+    rows = conn.execute(query + " ORDER BY rowid LIMIT ?", params + [limit]).fetchall()
+    if not rows:
+        return None
+
+    rowid, mmsi, dt, lat, lon, status = zip(*rows)
+    # NULL 은 NaN 으로 (어떤 조건도 통과하지 못함)
+    return {
+        "rowid": np.array(rowid, dtype=np.int64),
+        "mmsi": np.array(mmsi, dtype=np.float64),
+        "datetime": dt,
+        "lat": np.array(lat, dtype=np.float64),
+        "lon": np.array(lon, dtype=np.float64),
+        "status": np.array(status, dtype=np.float64),
+    }
+
+
+def format_event(data, event_id=None, event="positions"):
+    """SSE 이벤트 바이트 (data 는 줄바꿈 없는 JSON 바이트)"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: ".encode("utf-8") + data + b"\n\n"
+
+
+class Subscription:
+    """구독자 한 명의 조건과 이벤트 대기열 (이벤트 루프 쪽에서 꺼냄)
+
+    Args:
+        loop: 구독자 응답을 보내는 이벤트 루프
+        mmsi_list: MMSI 목록 (None 이면 전체)
+        status_list: API 상태값 목록 (1=조업, 2=비조업), DB에는 1씩 뺀 값으로 저장됨
+        bounds: (lat_min, lat_max, lon_min, lon_max), 기본값은 유효 좌표 범위
+    """
+
+    def __init__(self, loop, mmsi_list=None, status_list=None, bounds=DEFAULT_BOUNDS):
+        self.loop = loop
+        self.mmsi = None
+        if mmsi_list:
+            try:
+                self.mmsi = np.array(sorted({int(m) for m in mmsi_list}), dtype=np.float64)
+            except ValueError:
+                raise ValueError("mmsi 는 숫자여야 합니다")
+        self.status = None
+        if status_list:
+            self.status = np.array(sorted({s - 1 for s in status_list}), dtype=np.float64)
+        self.bounds = scaled_bounds(bounds)
+        self.key = (None if self.mmsi is None else tuple(self.mmsi),
+                    None if self.status is None else tuple(self.status), self.bounds)
+
+        self.queue = asyncio.Queue(maxsize=QUEUE_EVENTS)
+        self.after = None       # 구독 시점의 폴링 위치 (이후 행은 실시간으로 받음)
+        self.closed = False
+
+    def select(self, batch):
+        """배치에서 조건을 만족하는 행 번호"""
+        lat, lon = batch["lat"], batch["lon"]
+        lat_min, lat_max, lon_min, lon_max = self.bounds
+        mask = ((batch["mmsi"] != 0) & ~np.isnan(batch["mmsi"])
+                & (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max))
+        if self.mmsi is not None:
+            mask &= np.isin(batch["mmsi"], self.mmsi)
+        if self.status is not None:
+            mask &= np.isin(batch["status"], self.status)
+        return np.flatnonzero(mask)
+
+    def encode(self, batch):
+        """배치 -> SSE 이벤트 바이트 (조건에 맞는 행이 없으면 None)"""
+        index = self.select(batch)
+        if not len(index):
+            return None
+        datetimes = batch["datetime"]
+        rows = zip(
+            batch["mmsi"][index].astype(np.int64).tolist(),
+            [datetimes[i] for i in index.tolist()],
+            (batch["lat"][index] / COORD_SCALE).tolist(),
+            (batch["lon"][index] / COORD_SCALE).tolist(),
+            batch["status"][index].astype(np.int64).tolist(),
+        )
+        body, _ = encode_trajectory_rows(rows)
+        return format_event(body, int(batch["rowid"][-1]))
+
+    def _put(self, event):
+        """이벤트 루프 스레드에서 실행 - 대기열이 가득 차면 연결 종료 표시"""
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.closed = True
+            # 가득 찬 대기열을 비우고 종료 신호만 남김
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    def push(self, event):
+        """폴링 스레드에서 호출 - 이벤트를 구독자 이벤트 루프로 전달"""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # 이벤트 루프가 이미 종료됨
+            self.closed = True
+
+
+class PositionBroadcaster:
+    """새 항적 행을 폴링해 구독자에게 나눠 주는 공유 폴러
+
+    Args:
+        pool: ConnectionPool (폴링 스레드 전용 연결을 대여)
+        table_name: 연결 -> 항적 테이블 이름 함수 (예: SchemaRegistry.table_name)
+        interval: 새 행 확인 간격 (초)
+        batch_rows: 한 번에 읽을 최대 행 수
+    """
+
+    def __init__(self, pool, table_name, interval=POLL_INTERVAL, batch_rows=POLL_BATCH_ROWS):
+        self.pool = pool
+        self.table_name = table_name
+        self.interval = interval
+        self.batch_rows = batch_rows
+
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._stop = threading.Event()
+        self.watermark = None   # 마지막으로 나눠 준 rowid
+        self.polls = 0
+        self.rows = 0
+        self.disconnected = 0
+
+    def _init_watermark(self, conn):
+        """처음 구독할 때는 현재 마지막 행 이후부터 전달"""
+        table_name = self.table_name(conn)
+        last = conn.execute(f'SELECT MAX(rowid) FROM "{table_name}"').fetchone()[0] or 0
+        with self._lock:
+            if self.watermark is None:
+                self.watermark = last
+
+    def subscribe(self, subscription):
+        """구독 등록 (구독 시점의 폴링 위치를 subscription.after 에 기록), 필요하면 폴링 스레드 시작"""
+        if self.watermark is None:
+            with self.pool.connection() as conn:
+                self._init_watermark(conn)
+        with self._lock:
+            subscription.after = self.watermark
+            self._subscribers.add(subscription)
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="position-stream", daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+            if subscription.closed:
+                self.disconnected += 1
+
+    def replay(self, subscription, last_event_id):
+        """재연결한 구독자가 놓친 (last_event_id, 구독 시점] 행 -> SSE 이벤트 목록
+
+        최대 REPLAY_ROWS 개 rowid 범위까지만 다시 보냄
+        """
+        events = []
+        after = max(last_event_id, subscription.after - REPLAY_ROWS)
+        with self.pool.connection() as conn:
+            table_name = self.table_name(conn)
+            while after < subscription.after:
+                batch = fetch_rows(conn, table_name, after, self.batch_rows, until=subscription.after)
+                if batch is None:
+                    break
+                event = subscription.encode(batch)
+                if event is not None:
+                    events.append(event)
+                after = int(batch["rowid"][-1])
+        return events
+
+    def poll(self):
+        """새 행을 한 번 조회해 구독자에게 전달
+
+        Returns:
+            읽은 행 수
+        """
+        with self.pool.connection() as conn:
+            if self.watermark is None:
+                self._init_watermark(conn)
+            table_name = self.table_name(conn)
+            batch = fetch_rows(conn, table_name, self.watermark, self.batch_rows)
+            if batch is None:
+                # DB 파일이 교체되어 rowid 가 줄었으면 새 파일의 마지막 행부터 다시 따라감
+                last = conn.execute(f'SELECT MAX(rowid) FROM "{table_name}"').fetchone()[0] or 0
+                if last < self.watermark:
+                    with self._lock:
+                        self.watermark = last
+                return 0
+
+        with self._lock:
+            self.watermark = int(batch["rowid"][-1])
+            subscribers = list(self._subscribers)
+            self.polls += 1
+            self.rows += len(batch["rowid"])
+
+        # 같은 조건의 구독자는 한 번만 직렬화
+        events = {}
+        for subscription in subscribers:
+            if subscription.key not in events:
+                events[subscription.key] = subscription.encode(batch)
+            if events[subscription.key] is not None:
+                subscription.push(events[subscription.key])
+        return len(batch["rowid"])
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                read = self.poll()
+            except Exception:
+                logger.exception("실시간 위치 조회 실패")
+                read = 0
+            # 배치가 가득 찼으면 밀린 행을 바로 이어서 읽음
+            if read < self.batch_rows:
+                self._stop.wait(self.interval)
+        with self._lock:
+            self._thread = None
+
+    def stop(self):
+        """폴링 스레드 종료 (서버 종료 시)"""
+        self._stop.set()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.push(None)
+
+    def stats(self):
+        """헬스 체크 / 지표용 상태"""
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "watermark": self.watermark,
+                "polls": self.polls,
+                "rows": self.rows,
+                "disconnected": self.disconnected,
+            }
+
+
+async def event_stream(broadcaster, subscription, replay=()):
+    """구독자 SSE 응답 본문 (연결이 끊기거나 대기열이 넘치면 구독 해제)"""
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n".encode("utf-8")
+        for event in replay:
+            yield event
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if event is None:
+                break
+            yield event
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -5,17 +5,53 @@ Streamlit에서 FastAPI로 변환
 사용자 요청: Streamlit을 FastAPI로 변환
 """
 
-from fastapi import FastAPI, HTTPException, Query
-from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from fastapi import FastAPI, HTTPException, Query, Header
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from io import StringIO
+from contextlib import contextmanager
 from typing import List, Optional
 from datetime import datetime, date
 import sqlite3
+import asyncio
 import pandas as pd
 from pydantic import BaseModel
+import logging
 import os
+import time
+
+from db_pool import ConnectionPool
+from schema_registry import SchemaRegistry
+from partitions import PartitionRouter
+from hot_store import HotStore, to_rows, default_directory as hot_store_directory
+from query_builder import (
+    TrajectoryQuery, time_range, mmsi_count_query, stats_query, DEFAULT_BOUNDS
+)
+import rollups
+import trips
+from csv_export import stream_query_csv, stream_trajectory_csv
+from columnar_export import (
+    stream_trajectory_columnar, resolve_format, FORMATS as COLUMNAR_FORMATS
+)
+from serializers import (
+    encode_trajectory_rows, encode_trajectory_binary, encode_trajectory_columns, trajectory_points,
+    wants_binary, TRAJECTORY_BINARY_MEDIA_TYPE
+)
+import vector_tiles
+import raster_tiles
+import spatial_index
+from density import DensityGrid
+from result_cache import ResultCache, make_key, normalize_list
+from query_executor import QueryExecutor
+from simplify import simplify_rows, validate_mode as validate_simplify_mode
+import pagination
+import http_cache
+from compression import CompressionMiddleware
+from metrics import Metrics, MetricsMiddleware, PROMETHEUS_MEDIA_TYPE
+from live_stream import PositionBroadcaster, Subscription, event_stream
+from trajectory_stream import (
+    stream_trajectory, stream_columns, NDJSON_MEDIA_TYPE, TRAJECTORY_STREAM_MEDIA_TYPE
+)
 
 app = FastAPI(
     title="🚢 어선 항적 시각화 API",
@@ -30,13 +66,39 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# gzip / brotli 응답 압축 (brotli 패키지가 있으면 br 우선)
+app.add_middleware(CompressionMiddleware)
+
+# 라우트별 지연 시간 / 단계별 시간 지표 (압축 후 전송 바이트를 재도록 가장 바깥에 둠)
+metrics = Metrics()
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+# 로그 (요청별 단계 시간은 INFO, 조회 조건/쿼리는 DEBUG)
+LOG_LEVEL = os.environ.get("FISHING_LOG_LEVEL", "INFO").upper()
+logger = logging.getLogger("fishing")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    logger.addHandler(_handler)
+logger.setLevel(LOG_LEVEL)
+
 # 설정
-DB_PATH = r"C:\Users\User\Desktop\fishing_trajectory.db"
+DB_PATH = os.environ.get("FISHING_DB_PATH", r"C:\Users\User\Desktop\fishing_trajectory.db")  # 환경 변수로 변경 가능
+HOT_STORE_DIR = os.environ.get("FISHING_HOT_STORE") or hot_store_directory(DB_PATH)  # hot_store.py 로 만든 폴더
+TILE_CACHE_DIR = os.environ.get("FISHING_TILE_CACHE") or raster_tiles.default_directory(DB_PATH)  # 래스터 타일 디스크 캐시
 TILE_URL = "http://127.0.0.1:8000/tiles/{z}/{x}/{y}.png"  # MBTiles 타일 서버
 INITIAL_ZOOM = 7
 MAX_ZOOM = 18
+TILE_MAX_AGE = 300  # 오늘이 포함된 기간의 벡터 타일 보관 시간 (초), 과거 기간은 http_cache.HISTORICAL_MAX_AGE
+
+# 조회 실행기 (동시 실행 수, 대기열 길이, 기본 제한 시간 초 / 다운로드는 쿼리 시작까지의 제한 시간)
+QUERY_WORKERS = 4
+QUERY_MAX_PENDING = 32
+QUERY_TIMEOUT = 120
+DOWNLOAD_TIMEOUT = 600
 
 # Pydantic 모델
 class TrajectoryPoint(BaseModel):
@@ -59,13 +121,215 @@ class DataRequest(BaseModel):
     mmsi_list: Optional[List[str]] = None
     status_list: Optional[List[int]] = [1, 2]
     sampling_step: int = 5
-
-# 데이터베이스 연결
-def connect_db():
-    """SQLite 데이터베이스 연결"""
-    if not os.path.exists(DB_PATH):
-        raise HTTPException(status_code=404, detail=f"데이터베이스 파일을 찾을 수 없습니다: {DB_PATH}")
-    return sqlite3.connect(DB_PATH, timeout=30)
+    bbox: Optional[List[float]] = None              # [lat_min, lat_max, lon_min, lon_max]
+    polygon: Optional[List[List[float]]] = None     # [[lat, lon], ...]
+    simplify: Optional[str] = None                  # time | dp | vw | budget (지정 시 sampling_step 대신 사용)
+    tolerance_m: float = 50.0                       # dp/vw 허용 거리 (m)
+    interval_seconds: int = 60                      # time 구간 간격 (초)
+    max_points: int = 500                           # budget 선박별 최대 포인트 수
+    page_size: Optional[int] = None                 # 지정하면 (mmsi, datetime) 순서로 페이지 단위 응답
+    cursor: Optional[str] = None                    # 이전 페이지 응답의 X-Next-Cursor 헤더 값
+
+# 데이터베이스 연결 풀 / 스키마 캐시 / 시간 파티션 목록
+pool = ConnectionPool(DB_PATH, on_connect=spatial_index.register_functions)
+schema = SchemaRegistry(pool)
+partition_router = PartitionRouter(pool)
+
+# 최근 항적 컬럼 저장소 (폴더가 없으면 모든 조회를 SQLite 로 처리)
+recent_store = HotStore(HOT_STORE_DIR)
+
+# 실시간 위치 스트림 (구독자가 있는 동안만 폴링 스레드 1개가 새 행을 조회해 나눠 줌)
+position_broadcaster = PositionBroadcaster(pool, schema.table_name)
+
+# 조회 결과 / 벡터 타일 캐시 (DB 파일 서명이 바뀌면 전체 무효화)
+result_cache = ResultCache(max_bytes=256 * 1024 * 1024, version=pool.file_signature)
+tile_cache = ResultCache(max_bytes=64 * 1024 * 1024, version=pool.file_signature)
+
+# 과거 기간 래스터 타일 디스크 캐시 (적재 시 ingest.py 가 겹치는 기간을 무효화)
+raster_disk_cache = raster_tiles.TileDiskCache(TILE_CACHE_DIR)
+
+# sqlite3/pandas 작업은 이벤트 루프 대신 전용 스레드 풀에서 실행
+query_executor = QueryExecutor(pool, max_workers=QUERY_WORKERS,
+                               max_pending=QUERY_MAX_PENDING, timeout=QUERY_TIMEOUT)
+
+# 연결 풀 / 실행기 / 캐시 상태 지표 (/metrics 조회 시점 값)
+metrics.gauge("fishing_pool_open_connections", "열린 SQLite 연결 수",
+              lambda: pool.stats()["open_connections"])
+metrics.gauge("fishing_executor_active", "실행 중이거나 대기 중인 조회 작업 수",
+              lambda: query_executor.stats()["active"])
+metrics.gauge("fishing_executor_jobs_total", "실행기 작업 결과별 누적 건수",
+              lambda: {(k,): v for k, v in query_executor.stats().items()
+                       if k in ("completed", "timeouts", "cancelled", "rejected")},
+              labels=("result",), kind="counter")
+metrics.gauge("fishing_stream_subscribers", "실시간 위치 스트림 구독자 수",
+              lambda: position_broadcaster.stats()["subscribers"])
+metrics.gauge("fishing_cache_bytes", "캐시 크기 (바이트)",
+              lambda: {("results",): result_cache.stats()["bytes"],
+                       ("tiles",): tile_cache.stats()["bytes"]},
+              labels=("cache",))
+metrics.gauge("fishing_cache_requests_total", "캐시 조회 결과별 누적 건수",
+              lambda: {(name, result): stats[result]
+                       for name, stats in (("results", result_cache.stats()), ("tiles", tile_cache.stats()))
+                       for result in ("hits", "misses")},
+              labels=("cache", "result"), kind="counter")
+
+@app.on_event("startup")
+async def load_schema():
+    """서버 시작 시 항적 테이블/컬럼 정보를 미리 조회"""
+    try:
+        schema.refresh()
+        partition_router.refresh()
+    except (FileNotFoundError, sqlite3.Error) as e:
+        logger.warning("스키마 조회 실패 (요청 시 재시도): %s", e)
+
+@app.on_event("shutdown")
+async def close_pool():
+    """서버 종료 시 실행기, 실시간 스트림과 모든 연결 정리"""
+    position_broadcaster.stop()
+    query_executor.shutdown()
+    pool.close_all()
+
+@contextmanager
+def connect_db(route=None):
+    """풀에서 SQLite 연결 대여 (route 를 주면 필요한 시간 파티션을 ATTACH)"""
+    started = time.perf_counter()
+    try:
+        with pool.connection() as conn:
+            if route is not None:
+                route.attach(conn)
+            # 조회 중인 요청이 있으면 연결 대여 시간을 connect 단계로 기록
+            metrics.add_stage("connect", time.perf_counter() - started)
+            yield conn
+    except FileNotFoundError as e:
+        path = e.args[0] if e.args else DB_PATH
+        raise HTTPException(status_code=404, detail=f"데이터베이스 파일을 찾을 수 없습니다: {path}")
+
+def route_source(conn, table_name, ranges):
+    """조회 기간 [(시작, 끝), ...] 과 겹치는 시간 파티션 + 원본 테이블 -> partitions.Route
+
+    파티션이 없으면 Route.source 는 원본 테이블 이름 그대로
+    """
+    try:
+        return partition_router.route(table_name, ranges, conn)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def mmsi_count_source(conn, table_name, start_datetime, end_datetime, limit):
+    """MMSI별 건수 쿼리 - 집계 테이블이 있으면 집계 기반 쿼리 사용
+
+    Returns:
+        (SQL, 파라미터, 쿼리를 실행할 연결에 ATTACH 할 partitions.Route)
+    """
+    last_rowid = rollups.watermark(conn, table_name)
+    if last_rowid is not None:
+        # 집계로 답하지 못하는 경계 시간만 원본/파티션에서 읽음
+        route = route_source(conn, table_name, rollups.split_range(start_datetime, end_datetime)[2])
+        query, params = rollups.mmsi_count_query(route.source, start_datetime, end_datetime,
+                                                 limit, last_rowid)
+        return query, params, route
+    route = route_source(conn, table_name, [(start_datetime, end_datetime)])
+    query, params = mmsi_count_query(route.source, start_datetime, end_datetime, limit)
+    return query, params, route
+
+def area_options(conn, table_name, start_datetime, end_datetime, bbox=None, polygon=None):
+    """관심 영역(bbox/다각형) -> TrajectoryQuery 옵션
+
+    공간 인덱스가 있으면 영역을 지나간 선박-시간 구간만 읽도록 ranges 지정
+    """
+    try:
+        bbox = spatial_index.parse_bbox(bbox)
+        polygon = spatial_index.parse_polygon(polygon)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if bbox is None and polygon is None:
+        return {}
+
+    options = {"bounds": spatial_index.area_bounds(bbox, polygon)}
+    if polygon is not None:
+        options["polygon"] = spatial_index.polygon_param(polygon)
+
+    # 인덱싱 이후 행은 원본 테이블에만 있음 (파티션 분리 전에 공간 인덱스를 갱신하므로)
+    last_rowid = spatial_index.watermark(conn, table_name)
+    if last_rowid is not None:
+        options["ranges"] = spatial_index.candidate_ranges(
+            conn, table_name, start_datetime, end_datetime, options["bounds"], last_rowid
+        )
+    return options
+
+def request_area_options(table_name, request):
+    """DataRequest 의 관심 영역 -> TrajectoryQuery 옵션"""
+    if request.bbox is None and request.polygon is None:
+        return {}
+    start_datetime, end_datetime = time_range(
+        request.start_date, request.end_date, request.start_hour, request.end_hour
+    )
+    with connect_db() as conn:
+        return area_options(conn, table_name, start_datetime, end_datetime,
+                            request.bbox, request.polygon)
+
+def request_route(table_name, request):
+    """DataRequest 의 조회 기간 -> partitions.Route"""
+    start_datetime, end_datetime = time_range(
+        request.start_date, request.end_date, request.start_hour, request.end_hour
+    )
+    with connect_db() as conn:
+        return route_source(conn, table_name, [(start_datetime, end_datetime)])
+
+def recent_store_for(table_name, builder):
+    """조건을 최근 항적 저장소로 답할 수 있으면 HotStore, 아니면 None
+
+    저장소 기간 밖이거나 저장소를 만든 뒤 원본에 행이 추가되었으면 SQLite 로 조회
+    """
+    if not recent_store.supports(builder):
+        return None
+    with connect_db() as conn:
+        if not recent_store.is_fresh(conn, table_name, pool.file_signature()):
+            return None
+    return recent_store
+
+def request_cache_key(name, request, **extra):
+    """DataRequest -> 정규화된 결과 캐시 키"""
+    start_datetime, end_datetime = time_range(
+        request.start_date, request.end_date, request.start_hour, request.end_hour
+    )
+    params = {
+        "start_datetime": start_datetime,
+        "end_datetime": end_datetime,
+        "mmsi_list": normalize_list(request.mmsi_list),
+        "status_list": normalize_list(request.status_list, int),
+        "bbox": request.bbox,
+        "polygon": request.polygon,
+    }
+    if request.simplify:
+        # 단순화를 사용하면 sampling_step 은 결과에 영향 없음
+        params.update(simplify=request.simplify.lower(), tolerance_m=request.tolerance_m,
+                      interval_seconds=request.interval_seconds, max_points=request.max_points)
+    else:
+        params["sampling_step"] = max(request.sampling_step or 1, 1)
+    params.update(extra)
+    return make_key(name, **params)
+
+def conditional_headers(key, end_date=None, version=None, **kwargs):
+    """결과 캐시 키 + DB 버전 -> (ETag, ETag/Last-Modified/Cache-Control 헤더)
+
+    Args:
+        version: 조회 전에 읽은 DB 버전 (결과 캐시 put 에도 같은 값 전달), None 이면 지금 읽음
+    """
+    if version is None:
+        version = pool.file_signature()
+    etag = http_cache.make_etag(key, version)
+    return etag, http_cache.cache_headers(etag, version, end_date, **kwargs)
+
+def with_next_cursor(headers, next_cursor):
+    """다음 페이지가 있으면 X-Next-Cursor 헤더 추가"""
+    if not next_cursor:
+        return headers
+    return dict(headers, **{"X-Next-Cursor": next_cursor})
+
+def get_table_name():
+    """캐시된 항적 테이블 이름 (DB 파일이 바뀐 경우에만 재조회)"""
+    with connect_db() as conn:
+        return schema.table_name(conn)
 
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -78,335 +342,870 @@ async def root():
 async def health_check():
     """헬스 체크 - DB 연결 상태 확인"""
     try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' LIMIT 1")
-        tables = cursor.fetchall()
-        conn.close()
+        with connect_db() as conn:
+            conn.execute("SELECT 1").fetchone()
+            tables = schema.tables(conn)
+            partition_count = len(partition_router.partitions(conn=conn))
         return {
             "status": "healthy",
             "database": "connected",
             "db_path": DB_PATH,
-            "tables_found": len(tables)
+            "tables_found": len(tables),
+            "partitions": partition_count,
+            "hot_store": recent_store.stats(),
+            "pool": pool.stats(),
+            "executor": query_executor.stats(),
+            "stream": position_broadcaster.stats(),
+            "cache": {"results": result_cache.stats(), "tiles": tile_cache.stats(),
+                      "raster_disk": raster_disk_cache.stats()}
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"데이터베이스 연결 실패: {str(e)}")
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus 지표 (라우트별 지연 시간, 조회 단계별 시간, 행 수, 풀/실행기/캐시 상태)"""
+    return Response(content=metrics.render(), media_type=PROMETHEUS_MEDIA_TYPE)
+
 @app.get("/api/tables")
-async def get_tables():
+@query_executor.offload()
+@metrics.traced("tables")
+def get_tables():
     """데이터베이스 테이블 목록 조회"""
     try:
-        conn = connect_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = [row[0] for row in cursor.fetchall()]
-        conn.close()
+        with connect_db() as conn:
+            tables = schema.tables(conn)
         return {"tables": tables}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"테이블 조회 실패: {str(e)}")
 
 @app.get("/api/mmsi", response_model=List[MMSIInfo])
-async def get_mmsi_list(
+@query_executor.offload()
+@metrics.traced("mmsi")
+def get_mmsi_list(
     start_date: str = Query(..., description="시작 날짜 (YYYY-MM-DD)"),
     end_date: str = Query(..., description="종료 날짜 (YYYY-MM-DD)"),
     start_hour: int = Query(0, ge=0, le=23),
     end_hour: int = Query(23, ge=0, le=23),
-    limit: int = Query(100, description="최대 MMSI 개수")
+    limit: int = Query(100, description="최대 MMSI 개수"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """지정된 기간의 MMSI 목록 조회"""
     try:
-        conn = connect_db()
-        cursor = conn.cursor()
-
-        # 테이블 확인
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' LIMIT 1")
-        table_name = cursor.fetchone()[0]
-
-        start_datetime = f"{start_date} {start_hour:02d}:00:00"
-        end_datetime = f"{end_date} {end_hour:02d}:59:59"
-
-        query = f"""
-            SELECT mmsi, COUNT(*) as count
-            FROM {table_name}
-            WHERE datetime >= ? AND datetime <= ?
-              AND mmsi != 0
-            GROUP BY mmsi
-            ORDER BY count DESC
-            LIMIT ?
-        """
-
-        df = pd.read_sql_query(query, conn, params=[start_datetime, end_datetime, limit])
-        conn.close()
+        start_datetime, end_datetime = time_range(start_date, end_date, start_hour, end_hour)
+        cache_key = make_key("mmsi", start_datetime=start_datetime, end_datetime=end_datetime,
+                             limit=limit)
+        # 조회 전 DB 버전 (조회 중 적재로 바뀌면 결과를 캐시하지 않음)
+        version = result_cache.current_version()
+        etag, headers = conditional_headers(cache_key, end_date, version=version)
+        if http_cache.etag_matches(if_none_match, etag):
+            metrics.record(cache="not_modified")
+            return Response(status_code=304, headers=headers)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            metrics.record(cache="hit")
+            return JSONResponse(content=cached, headers=headers)
+
+        table_name = get_table_name()
+
+        with connect_db() as conn:
+            query, params, route = mmsi_count_source(conn, table_name, start_datetime, end_datetime, limit)
+            route.attach(conn)
+            with metrics.stage("sql"):
+                df = pd.read_sql_query(query, conn, params=params)
 
         # MMSI 0 제외
         result = [{"mmsi": str(row['mmsi']), "count": int(row['count'])}
                   for _, row in df.iterrows() if row['mmsi'] != 0]
-        return result
+        metrics.record(rows=len(result), cache="miss")
+        result_cache.put(cache_key, result, version=version)
+        return JSONResponse(content=result, headers=headers)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"MMSI 조회 실패: {str(e)}")
 
 @app.post("/api/trajectory", response_model=List[TrajectoryPoint])
-async def get_trajectory_data(request: DataRequest):
+@query_executor.offload()
+@metrics.traced("trajectory")
+def get_trajectory_data(
+    request: DataRequest,
+    validate: bool = Query(False, description="TrajectoryPoint 모델로 행별 검증 (느린 경로)"),
+    format: Optional[str] = Query(None, description="응답 형식 (json | binary)"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
     """항적 데이터 조회"""
+    return trajectory_response(request, validate, format, accept, if_none_match)
+
+@app.get("/api/trajectory", response_model=List[TrajectoryPoint])
+@query_executor.offload()
+@metrics.traced("trajectory")
+def get_trajectory_data_by_query(
+    start_date: str = Query(..., description="시작 날짜 (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="종료 날짜 (YYYY-MM-DD)"),
+    start_hour: int = Query(0, ge=0, le=23),
+    end_hour: int = Query(23, ge=0, le=23),
+    mmsi: Optional[List[str]] = Query(None, description="MMSI 목록 (반복 지정)"),
+    status: Optional[List[int]] = Query([1, 2], description="상태 목록 (1=조업, 2=비조업)"),
+    sampling_step: int = Query(5, description="MMSI별 N개 중 1개"),
+    bbox: Optional[str] = Query(None, description="관심 영역 lat_min,lat_max,lon_min,lon_max"),
+    polygon: Optional[str] = Query(None, description="관심 영역 다각형 lat,lon;lat,lon;..."),
+    simplify: Optional[str] = Query(None, description="단순화 방법 (time | dp | vw | budget)"),
+    tolerance_m: float = Query(50.0, description="dp/vw 허용 거리 (m)"),
+    interval_seconds: int = Query(60, description="time 구간 간격 (초)"),
+    max_points: int = Query(500, description="budget 선박별 최대 포인트 수"),
+    page_size: Optional[int] = Query(None, description="페이지 행 수"),
+    cursor: Optional[str] = Query(None, description="이전 페이지 응답의 X-Next-Cursor"),
+    validate: bool = Query(False, description="TrajectoryPoint 모델로 행별 검증 (느린 경로)"),
+    format: Optional[str] = Query(None, description="응답 형식 (json | binary)"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    """항적 데이터 조회 (GET) - POST 와 같은 조건을 쿼리 문자열로 받아 브라우저/프록시 캐시가 가능"""
+    try:
+        bbox = spatial_index.parse_bbox(bbox)
+        polygon = spatial_index.parse_polygon(polygon)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    request = DataRequest(
+        start_date=start_date, end_date=end_date, start_hour=start_hour, end_hour=end_hour,
+        mmsi_list=mmsi, status_list=status, sampling_step=sampling_step,
+        bbox=list(bbox) if bbox else None,
+        polygon=[list(p) for p in polygon] if polygon else None,
+        simplify=simplify, tolerance_m=tolerance_m, interval_seconds=interval_seconds,
+        max_points=max_points, page_size=page_size, cursor=cursor
+    )
+    return trajectory_response(request, validate, format, accept, if_none_match)
+
+def trajectory_response(request, validate=False, format=None, accept=None, if_none_match=None):
+    """항적 조회 응답 (POST/GET 공통)"""
     try:
-        print(f"\n{'='*60}")
-        print(f"📊 항적 데이터 조회 시작")
-        print(f"{'='*60}")
-        print(f"요청 정보:")
-        print(f"  - 날짜: {request.start_date} ~ {request.end_date}")
-        print(f"  - 시간: {request.start_hour}:00 ~ {request.end_hour}:00")
-        print(f"  - MMSI: {request.mmsi_list}")
-        print(f"  - Status: {request.status_list}")
-        print(f"  - Sampling: {request.sampling_step}")
-
-        conn = connect_db()
-        cursor = conn.cursor()
-
-        # 테이블 확인
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' LIMIT 1")
-        table_name = cursor.fetchone()[0]
-        print(f"  - 테이블: {table_name}")
-
-        start_datetime = f"{request.start_date} {request.start_hour:02d}:00:00"
-        end_datetime = f"{request.end_date} {request.end_hour:02d}:59:59"
-        print(f"  - 검색 기간: {start_datetime} ~ {end_datetime}")
-
-        # MMSI 필터
-        mmsi_filter = ""
-        params = [start_datetime, end_datetime]
-
-        if request.mmsi_list:
-            placeholders = ','.join(['?'] * len(request.mmsi_list))
-            mmsi_filter = f"AND mmsi IN ({placeholders})"
-            params.extend(request.mmsi_list)
-
-        # Status 필터 (값에서 1씩 빼서 0-based로 변환)
-        status_values = [s - 1 for s in request.status_list]
-        status_placeholders = ','.join(['?'] * len(status_values))
-        params.extend(status_values)
-
-        query = f"""
-            SELECT mmsi, datetime, lat, lon, status,
-                   ROW_NUMBER() OVER (PARTITION BY mmsi ORDER BY datetime) as rn
-            FROM {table_name}
-            WHERE datetime >= ? AND datetime <= ?
-            {mmsi_filter}
-            AND status IN ({status_placeholders})
-            ORDER BY mmsi, datetime
-        """
-
-        df = pd.read_sql_query(query, conn, params=params)
-        debug_query = query
-        for param in params:
-            debug_query = debug_query.replace('?', f"'{param}'", 1)
-        print(f"  - 실행 쿼리: {debug_query}")
-        conn.close()
-
-        print(f"\n결과:")
-        print(f"  - 원본 데이터: {len(df)}개")
-
-        # 샘플링
-        if not df.empty:
-            df_sampled = df[df['rn'] % request.sampling_step == 1].copy()
-
-            # 좌표 변환 (정수 -> 실수)
-            df_sampled['lat'] = df_sampled['lat'] / 10000000.0
-            df_sampled['lon'] = df_sampled['lon'] / 10000000.0
-
-            # MMSI 0 필터링 (유효하지 않은 데이터)
-            df_sampled = df_sampled[df_sampled['mmsi'] != 0]
-
-            # 유효한 좌표만 필터링 (위도: 30-45, 경도: 120-135)
-            df_sampled = df_sampled[
-                (df_sampled['lat'] >= 30) & (df_sampled['lat'] <= 45) &
-                (df_sampled['lon'] >= 120) & (df_sampled['lon'] <= 135)
-            ]
-
-            df_sampled['status_name'] = df_sampled['status'].apply(lambda s: '조업' if s == 1 else '비조업')
-
-            print(f"  - 샘플링 후: {len(df_sampled)}개")
-            print(f"  - MMSI 필터링 후: {len(df_sampled[df_sampled['mmsi'] != 0])}개")
-            print(f"  - 좌표 유효성 검사 후: {len(df_sampled)}개")
-
-            result = []
-            for _, row in df_sampled.iterrows():
-                result.append({
-                    "mmsi": str(row['mmsi']),
-                    "datetime": str(row['datetime']),
-                    "lat": float(row['lat']),
-                    "lon": float(row['lon']),
-                    "status": int(row['status']),
-                    "status_name": row['status_name']
-                })
-
-            print(f"  - 최종 반환: {len(result)}개")
-            print(f"{'='*60}\n")
-            return result
-
-        print(f"  ⚠️ 데이터 없음!")
-        print(f"{'='*60}\n")
-        return []
+        logger.debug(
+            "항적 조회 요청: 날짜 %s ~ %s, 시간 %s:00 ~ %s:00, MMSI %s, Status %s, Sampling %s",
+            request.start_date, request.end_date, request.start_hour, request.end_hour,
+            request.mmsi_list, request.status_list, request.sampling_step
+        )
 
+        try:
+            simplify_mode = validate_simplify_mode(request.simplify)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if simplify_mode:
+            logger.debug("단순화: %s", simplify_mode)
+
+        # 키셋 페이지네이션 (커서에는 마지막 행 키와 조회 조건 해시가 들어 있음)
+        paged = request.page_size is not None or request.cursor is not None
+        page_size, after = None, None
+        if paged:
+            if simplify_mode:
+                raise HTTPException(status_code=400, detail="simplify 는 페이지 조회와 함께 사용할 수 없습니다")
+            filter_key = request_cache_key("trajectory-page", request)
+            try:
+                page_size = pagination.validate_page_size(request.page_size)
+                if request.cursor:
+                    after = pagination.decode_cursor(request.cursor, filter_key)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            logger.debug("페이지: %s개, cursor=%s", page_size, after)
+
+        binary = wants_binary(format, accept)
+        media_type = TRAJECTORY_BINARY_MEDIA_TYPE if binary else "application/json"
+        cache_key = request_cache_key("trajectory", request, binary=binary, validate=validate,
+                                      page_size=page_size, cursor=request.cursor)
+
+        # 같은 조건 + 같은 DB 버전이면 본문이 같으므로 조회 없이 304
+        version = result_cache.current_version()
+        etag, headers = conditional_headers(cache_key, request.end_date, version=version, vary="Accept")
+        if http_cache.etag_matches(if_none_match, etag):
+            metrics.record(cache="not_modified")
+            return Response(status_code=304, headers=headers)
+
+        # 검증 모드를 제외하고 응답 형식별로 직렬화된 본문(+다음 커서)을 캐시
+        if not validate:
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                body, next_cursor = cached
+                metrics.record(bytes_out=len(body), cache="hit")
+                return Response(content=body, media_type=media_type,
+                                headers=with_next_cursor(headers, next_cursor))
+
+        table_name = get_table_name()
+
+        # 단순화를 사용하면 SQL 샘플링 없이 전체 행을 읽고 선박별로 단순화
+        with metrics.stage("plan"):
+            options = request_area_options(table_name, request)
+            route = request_route(table_name, request)
+        if simplify_mode:
+            options["sampling_step"] = 1
+        builder = TrajectoryQuery.from_request(route.source, request, **options)
+        logger.debug("테이블: %s, 검색 기간: %s ~ %s",
+                     table_name, builder.start_datetime, builder.end_datetime)
+
+        # 샘플링 / MMSI 0 제외 / 좌표 유효성 검사(위도: 30-45, 경도: 120-135) / 관심 영역은 SQL에서 처리
+        next_cursor, columns = None, None
+        store = None if paged else recent_store_for(table_name, builder)
+        if store is not None:
+            # 최근 기간은 메모리 매핑된 컬럼 저장소에서 선박별 이진 탐색으로 조회 (같은 규칙을 NumPy 로 적용)
+            with metrics.stage("hot"):
+                columns = store.trajectory(builder)
+            metrics.record(source="hot")
+            # 바이너리 응답은 컬럼 배열 그대로 직렬화 (행 수만 필요)
+            rows = to_rows(columns) if simplify_mode or validate or not binary else columns[0]
+        elif paged:
+            # 선박별 (mmsi, datetime) 인덱스 범위 탐색으로 한 페이지만 조회 (선박별 쿼리가 섞여 sql 단계로 기록)
+            with connect_db(route) as conn, metrics.stage("sql"):
+                rows, next_key = pagination.fetch_page(conn, builder, page_size, after)
+            if next_key is not None:
+                next_cursor = pagination.encode_cursor(next_key, filter_key)
+        else:
+            query, params = builder.build()
+            with connect_db(route) as conn:
+                with metrics.stage("sql"):
+                    cursor = conn.execute(query, params)
+                with metrics.stage("fetch"):
+                    rows = cursor.fetchall()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("실행 쿼리: %s / 파라미터: %s", " ".join(query.split()), params)
+
+        logger.debug("조회 데이터: %s개", len(rows))
+
+        if simplify_mode:
+            with metrics.stage("transform"):
+                rows = simplify_rows(
+                    rows, simplify_mode, tolerance=request.tolerance_m,
+                    interval=request.interval_seconds, max_points=request.max_points
+                )
+            logger.debug("단순화 후: %s개", len(rows))
+
+        headers = with_next_cursor(headers, next_cursor)
+        if validate:
+            # 기존 방식: 행마다 TrajectoryPoint 검증
+            with metrics.stage("serialize"):
+                points = trajectory_points(rows)
+            metrics.record(rows=len(rows), cache="miss")
+            return JSONResponse(content=points, headers=headers)
+
+        with metrics.stage("serialize"):
+            if binary and columns is not None and not simplify_mode:
+                # 저장소 컬럼 배열을 행으로 바꾸지 않고 그대로 바이너리로
+                body, count = encode_trajectory_columns(*columns), len(rows)
+            elif binary:
+                # 컬럼형 바이너리 (float32 좌표, uint32 epoch, uint8 상태, MMSI 사전)
+                body, count = encode_trajectory_binary(rows)
+            else:
+                # 커서 행을 바로 JSON 바이트로 직렬화 (행별 pydantic 검증 생략)
+                body, count = encode_trajectory_rows(rows)
+        metrics.record(rows=count, bytes_out=len(body), cache="miss")
+        result_cache.put(cache_key, (body, next_cursor), size=len(body), version=version)
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"항적 데이터 조회 실패: {str(e)}")
 
+@app.post("/api/trajectory/stream")
+@query_executor.offload()
+@metrics.traced("trajectory_stream")
+def stream_trajectory_data(
+    request: DataRequest,
+    format: Optional[str] = Query(None, description="응답 형식 (ndjson | binary)"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    """항적 데이터 진행형 조회 - 커서에서 읽는 대로 NDJSON 줄 / 바이너리 프레임으로 전송"""
+    return trajectory_stream_response(request, format, accept, if_none_match)
+
+@app.get("/api/trajectory/stream")
+@query_executor.offload()
+@metrics.traced("trajectory_stream")
+def stream_trajectory_data_by_query(
+    start_date: str = Query(..., description="시작 날짜 (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="종료 날짜 (YYYY-MM-DD)"),
+    start_hour: int = Query(0, ge=0, le=23),
+    end_hour: int = Query(23, ge=0, le=23),
+    mmsi: Optional[List[str]] = Query(None, description="MMSI 목록 (반복 지정)"),
+    status: Optional[List[int]] = Query([1, 2], description="상태 목록 (1=조업, 2=비조업)"),
+    sampling_step: int = Query(5, description="MMSI별 N개 중 1개"),
+    bbox: Optional[str] = Query(None, description="관심 영역 lat_min,lat_max,lon_min,lon_max"),
+    polygon: Optional[str] = Query(None, description="관심 영역 다각형 lat,lon;lat,lon;..."),
+    format: Optional[str] = Query(None, description="응답 형식 (ndjson | binary)"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    """항적 데이터 진행형 조회 (GET) - 브라우저가 ETag 로 재검증 가능"""
+    try:
+        bbox = spatial_index.parse_bbox(bbox)
+        polygon = spatial_index.parse_polygon(polygon)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    request = DataRequest(
+        start_date=start_date, end_date=end_date, start_hour=start_hour, end_hour=end_hour,
+        mmsi_list=mmsi, status_list=status, sampling_step=sampling_step,
+        bbox=list(bbox) if bbox else None,
+        polygon=[list(p) for p in polygon] if polygon else None
+    )
+    return trajectory_stream_response(request, format, accept, if_none_match)
+
+def trajectory_stream_response(request, format=None, accept=None, if_none_match=None):
+    """진행형 항적 응답 (POST/GET 공통)
+
+    전체 결과를 만들지 않으므로 결과 캐시는 사용하지 않고, 같은 조건 + 같은 DB 버전이면 304
+    """
+    try:
+        if request.simplify:
+            raise HTTPException(status_code=400, detail="simplify 는 스트리밍 조회와 함께 사용할 수 없습니다")
+        if request.page_size is not None or request.cursor is not None:
+            raise HTTPException(status_code=400, detail="스트리밍 조회는 page_size/cursor 없이 사용합니다")
+
+        binary = wants_binary(format, accept)
+        media_type = TRAJECTORY_STREAM_MEDIA_TYPE if binary else NDJSON_MEDIA_TYPE
+        cache_key = request_cache_key("trajectory-stream", request, binary=binary)
+        etag, headers = conditional_headers(cache_key, request.end_date, vary="Accept")
+        if http_cache.etag_matches(if_none_match, etag):
+            metrics.record(cache="not_modified")
+            return Response(status_code=304, headers=headers)
+
+        table_name = get_table_name()
+        with metrics.stage("plan"):
+            options = request_area_options(table_name, request)
+            route = request_route(table_name, request)
+        builder = TrajectoryQuery.from_request(route.source, request, **options)
+
+        store = recent_store_for(table_name, builder)
+        if store is not None:
+            with metrics.stage("hot"):
+                columns = store.trajectory(builder)
+            metrics.record(rows=len(columns[0]), source="hot")
+            stream = stream_columns(columns, binary)
+        else:
+            # 첫 행까지의 시간만 sql 단계로 기록 (이후 행은 전송하면서 읽음)
+            query, params = builder.build()
+            with metrics.stage("sql"):
+                stream = stream_trajectory(pool, query, params, binary, prepare=route.attach)
+        return StreamingResponse(stream, media_type=media_type, headers=headers)
+
+    except HTTPException:
+        raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"데이터베이스 파일을 찾을 수 없습니다: {DB_PATH}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"항적 스트리밍 실패: {str(e)}")
+
+def csv_response(stream, filename, compress=False):
+    """CSV 스트림 응답 (compress=True 이면 gzip 전송 인코딩)"""
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(stream, media_type="text/csv", headers=headers)
+
 @app.get("/api/download/mmsi")
-async def download_mmsi_csv(
+@query_executor.offload(timeout=DOWNLOAD_TIMEOUT)
+@metrics.traced("download_mmsi")
+def download_mmsi_csv(
     start_date: str,
     end_date: str,
     start_hour: int = 0,
     end_hour: int = 23,
-    limit: int = 1000
+    limit: int = 1000,
+    gzip: bool = False
 ):
     """MMSI 목록을 CSV 파일로 다운로드"""
     try:
-        conn = connect_db()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' LIMIT 1")
-        table_name = cursor.fetchone()[0]
+        table_name = get_table_name()
 
-        start_datetime = f"{start_date} {start_hour:02d}:00:00"
-        end_datetime = f"{end_date} {end_hour:02d}:59:59"
+        start_datetime, end_datetime = time_range(start_date, end_date, start_hour, end_hour)
+        with connect_db() as conn:
+            query, params, route = mmsi_count_source(conn, table_name, start_datetime, end_datetime, limit)
 
-        query = f"""
-            SELECT mmsi, COUNT(*) as count
-            FROM {table_name}
-            WHERE datetime >= ? AND datetime <= ?
-              AND mmsi != 0
-            GROUP BY mmsi
-            ORDER BY count DESC
-            LIMIT ?
-        """
-
-        df = pd.read_sql_query(query, conn, params=[start_datetime, end_datetime, limit])
-        conn.close()
+        stream = stream_query_csv(pool, query, params, ("mmsi", "count"), compress=gzip,
+                                  prepare=route.attach)
+        filename = f"mmsi_list_{start_date}_{end_date}.csv"
+        return csv_response(stream, filename, compress=gzip)
 
-        # CSV로 변환
-        output = StringIO()
-        df.to_csv(output, index=False, encoding='utf-8-sig')
-        output.seek(0)
+    except HTTPException:
+        raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"데이터베이스 파일을 찾을 수 없습니다: {DB_PATH}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"CSV 다운로드 실패: {str(e)}")
 
-        filename = f"mmsi_list_{start_date}_{end_date}.csv"
+@app.post("/api/download/trajectory")
+@query_executor.offload(timeout=DOWNLOAD_TIMEOUT)
+@metrics.traced("download_trajectory")
+def download_trajectory_csv(
+    request: DataRequest,
+    gzip: bool = Query(False, description="gzip 압축 전송")
+):
+    """항적 데이터를 CSV 파일로 다운로드 (fetchmany 단위 스트리밍)"""
+    try:
+        table_name = get_table_name()
 
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        # 다운로드는 샘플링 없이 전체 행, 좌표 유효성 검사는 SQL에서 처리
+        route = request_route(table_name, request)
+        builder = TrajectoryQuery.from_request(
+            route.source, request, sampling_step=1, extra_columns=("sog", "cog", "heading"),
+            **request_area_options(table_name, request)
         )
+        query, params = builder.build()
 
+        # 청크마다 속도/방향 변환과 상태 이름 추가 후 CSV 블록으로 전송
+        stream = stream_trajectory_csv(pool, query, params, compress=gzip, prepare=route.attach)
+        filename = f"trajectory_{request.start_date}_{request.end_date}.csv"
+        return csv_response(stream, filename, compress=gzip)
+
+    except HTTPException:
+        raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"데이터베이스 파일을 찾을 수 없습니다: {DB_PATH}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"CSV 다운로드 실패: {str(e)}")
 
-@app.post("/api/download/trajectory")
-async def download_trajectory_csv(request: DataRequest):
-    """항적 데이터를 CSV 파일로 다운로드"""
+@app.post("/api/download/trajectory/columnar")
+@query_executor.offload(timeout=DOWNLOAD_TIMEOUT)
+@metrics.traced("download_columnar")
+def download_trajectory_columnar(
+    request: DataRequest,
+    format: str = Query("parquet", description="파일 형식 (parquet | arrow | npz)")
+):
+    """항적 데이터를 컬럼형 파일로 다운로드 (pyarrow 가 없으면 npz)"""
     try:
-        conn = connect_db()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' LIMIT 1")
-        table_name = cursor.fetchone()[0]
-
-        start_datetime = f"{request.start_date} {request.start_hour:02d}:00:00"
-        end_datetime = f"{request.end_date} {request.end_hour:02d}:59:59"
-
-        # MMSI 필터
-        mmsi_filter = ""
-        params = [start_datetime, end_datetime]
-
-        if request.mmsi_list:
-            placeholders = ','.join(['?'] * len(request.mmsi_list))
-            mmsi_filter = f"AND mmsi IN ({placeholders})"
-            params.extend(request.mmsi_list)
-
-        # Status 필터 (값에서 1씩 빼서 0-based로 변환)
-        status_values = [s - 1 for s in request.status_list]
-        status_placeholders = ','.join(['?'] * len(status_values))
-        params.extend(status_values)
-
-        query = f"""
-            SELECT mmsi, datetime, lat, lon, status, sog, cog, heading
-            FROM {table_name}
-            WHERE datetime >= ? AND datetime <= ?
-            {mmsi_filter}
-            AND status IN ({status_placeholders})
-            AND mmsi != 0
-            ORDER BY mmsi, datetime
-        """
-
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
-
-        if not df.empty:
-            # 좌표 변환
-            df['lat'] = df['lat'] / 10000000.0
-            df['lon'] = df['lon'] / 10000000.0
-            df['sog'] = df['sog'] / 10.0
-            df['cog'] = df['cog'] / 10.0
-
-            # 유효한 좌표만 필터링
-            df = df[
-                (df['lat'] >= 30) & (df['lat'] <= 45) &
-                (df['lon'] >= 120) & (df['lon'] <= 135)
-            ]
-
-            # Status 이름 추가
-            df['status_name'] = df['status'].apply(lambda s: '조업' if s == 1 else '비조업')
-
-        # CSV로 변환
-        output = StringIO()
-        df.to_csv(output, index=False, encoding='utf-8-sig')
-        output.seek(0)
+        fmt = resolve_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        filename = f"trajectory_{request.start_date}_{request.end_date}.csv"
+    try:
+        table_name = get_table_name()
 
+        # CSV 다운로드와 같은 쿼리/필터 사용
+        route = request_route(table_name, request)
+        builder = TrajectoryQuery.from_request(
+            route.source, request, sampling_step=1, extra_columns=("sog", "cog", "heading"),
+            **request_area_options(table_name, request)
+        )
+        query, params = builder.build()
+
+        stream = stream_trajectory_columnar(pool, query, params, fmt, prepare=route.attach)
+        media_type, extension = COLUMNAR_FORMATS[fmt]
+        filename = f"trajectory_{request.start_date}_{request.end_date}.{extension}"
         return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
+            stream,
+            media_type=media_type,
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
 
+    except HTTPException:
+        raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"데이터베이스 파일을 찾을 수 없습니다: {DB_PATH}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"CSV 다운로드 실패: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"파일 다운로드 실패: {str(e)}")
+
+@app.get("/api/tiles/trajectory/{z}/{x}/{y}.mvt")
+@query_executor.offload()
+@metrics.traced("tile")
+def get_trajectory_tile(
+    z: int,
+    x: int,
+    y: int,
+    start_date: str = Query(..., description="시작 날짜 (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="종료 날짜 (YYYY-MM-DD)"),
+    start_hour: int = Query(0, ge=0, le=23),
+    end_hour: int = Query(23, ge=0, le=23),
+    mmsi: Optional[List[str]] = Query(None, description="MMSI 목록 (반복 지정)"),
+    status: Optional[List[int]] = Query([1, 2], description="상태 목록 (1=조업, 2=비조업)"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """항적 Mapbox Vector Tile (줌 레벨별 샘플링/단순화, 필터 해시별 캐시)"""
+    if not 0 <= z <= MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail=f"잘못된 타일 좌표: {z}/{x}/{y}")
+
+    try:
+        filter_hash = vector_tiles.filter_hash(
+            start_date=start_date, end_date=end_date, start_hour=start_hour, end_hour=end_hour,
+            mmsi=sorted(mmsi) if mmsi else None, status=sorted(status) if status else None
+        )
+        cache_key = (filter_hash, z, x, y)
+        version = tile_cache.current_version()
+        etag, headers = conditional_headers(cache_key, end_date, version=version, current_max_age=TILE_MAX_AGE)
+        headers["X-Filter-Hash"] = filter_hash
+        if http_cache.etag_matches(if_none_match, etag):
+            metrics.record(cache="not_modified")
+            return Response(status_code=304, headers=headers)
+
+        body = tile_cache.get(cache_key)
+        if body is not None:
+            metrics.record(cache="hit")
+        else:
+            bounds = vector_tiles.buffered_bounds(z, x, y)
+            rows = []
+            if bounds is not None:
+                table_name = get_table_name()
+                start_datetime, end_datetime = time_range(start_date, end_date, start_hour, end_hour)
+                with connect_db() as conn:
+                    route = route_source(conn, table_name, [(start_datetime, end_datetime)])
+                # 타일(+버퍼) 범위만 조회, 저줌일수록 MMSI별 샘플링 간격을 크게
+                builder = TrajectoryQuery(
+                    route.source, start_datetime, end_datetime,
+                    mmsi_list=mmsi, status_list=status,
+                    sampling_step=vector_tiles.sampling_step_for_zoom(z),
+                    bounds=bounds
+                )
+                query, params = builder.build()
+                with connect_db(route) as conn:
+                    with metrics.stage("sql"):
+                        cursor = conn.execute(query, params)
+                    with metrics.stage("fetch"):
+                        rows = cursor.fetchall()
+            with metrics.stage("serialize"):
+                body = vector_tiles.encode_tile(rows, z, x, y)
+            metrics.record(rows=len(rows), cache="miss")
+            tile_cache.put(cache_key, body, version=version)
+
+        if not body:
+            return Response(status_code=204, headers=headers)
+        return Response(content=body, media_type=vector_tiles.MVT_MEDIA_TYPE, headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"벡터 타일 생성 실패: {str(e)}")
+
+def render_raster_tile(z, x, y, start_date, end_date, start_hour, end_hour, mmsi, status, lines):
+    """타일(+버퍼) 범위 항적 조회 후 PNG 렌더링 (최근 항적 저장소로 답할 수 있으면 저장소 사용)"""
+    bounds = vector_tiles.buffered_bounds(z, x, y)
+    columns = raster_tiles.rows_to_columns([])
+    if bounds is not None:
+        table_name = get_table_name()
+        start_datetime, end_datetime = time_range(start_date, end_date, start_hour, end_hour)
+        with connect_db() as conn:
+            route = route_source(conn, table_name, [(start_datetime, end_datetime)])
+        builder = TrajectoryQuery(
+            route.source, start_datetime, end_datetime,
+            mmsi_list=mmsi, status_list=status,
+            sampling_step=vector_tiles.sampling_step_for_zoom(z),
+            bounds=bounds
+        )
+        store = recent_store_for(table_name, builder)
+        if store is not None:
+            with metrics.stage("hot"):
+                columns = store.trajectory(builder)
+            metrics.record(source="hot")
+        else:
+            query, params = builder.build()
+            with connect_db(route) as conn:
+                with metrics.stage("sql"):
+                    cursor = conn.execute(query, params)
+                with metrics.stage("fetch"):
+                    columns = raster_tiles.rows_to_columns(cursor.fetchall())
+    with metrics.stage("render"):
+        body = raster_tiles.encode_tile(columns, z, x, y, lines=lines)
+    metrics.record(rows=len(columns[0]))
+    return body
+
+@app.get("/api/tiles/raster/{z}/{x}/{y}.png")
+@query_executor.offload()
+@metrics.traced("raster_tile")
+def get_raster_tile(
+    z: int,
+    x: int,
+    y: int,
+    start_date: str = Query(..., description="시작 날짜 (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="종료 날짜 (YYYY-MM-DD)"),
+    start_hour: int = Query(0, ge=0, le=23),
+    end_hour: int = Query(23, ge=0, le=23),
+    mmsi: Optional[List[str]] = Query(None, description="MMSI 목록 (반복 지정)"),
+    status: Optional[List[int]] = Query([1, 2], description="상태 목록 (1=조업, 2=비조업)"),
+    lines: bool = Query(True, description="연속 포인트 사이 선 그리기"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """항적 래스터 타일 (PNG, 상태별 색)
+
+    과거 기간은 디스크 캐시에 한 번 그린 뒤 파일로 응답 (ETag = 본문 SHA-1),
+    오늘이 포함된 기간은 메모리 타일 캐시만 사용
+    """
+    if not 0 <= z <= MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail=f"잘못된 타일 좌표: {z}/{x}/{y}")
+
+    try:
+        start_datetime, end_datetime = time_range(start_date, end_date, start_hour, end_hour)
+        filters = {
+            "start_datetime": start_datetime, "end_datetime": end_datetime,
+            "mmsi": sorted(mmsi) if mmsi else None, "status": sorted(status) if status else None,
+            "lines": lines,
+        }
+        # DB 파일이 다른 파일로 교체되면(inode 변경) 디스크 캐시도 다른 항목을 사용
+        db_file = pool.file_signature()[0]
+        filter_hash = vector_tiles.filter_hash(db=db_file[0] if db_file else None, **filters)
+
+        if http_cache.is_historical(end_date):
+            headers = {
+                "Cache-Control": f"public, max-age={http_cache.HISTORICAL_MAX_AGE}",
+                "X-Filter-Hash": filter_hash,
+            }
+            digest = raster_disk_cache.get(filter_hash, z, x, y)
+            if digest is not None:
+                headers["ETag"] = f'"{digest}"'
+                if http_cache.etag_matches(if_none_match, headers["ETag"]):
+                    metrics.record(cache="not_modified")
+                    return Response(status_code=304, headers=headers)
+                metrics.record(cache="disk")
+                return Response(content=raster_disk_cache.read(digest),
+                                media_type=raster_tiles.PNG_MEDIA_TYPE, headers=headers)
+
+            body = render_raster_tile(z, x, y, start_date, end_date, start_hour, end_hour,
+                                      mmsi, status, lines)
+            digest = raster_disk_cache.put(filter_hash, z, x, y, body, filters)
+            headers["ETag"] = f'"{digest}"'
+            metrics.record(cache="miss")
+            return Response(content=body, media_type=raster_tiles.PNG_MEDIA_TYPE, headers=headers)
+
+        cache_key = ("png", filter_hash, z, x, y)
+        version = tile_cache.current_version()
+        etag, headers = conditional_headers(cache_key, end_date, version=version, current_max_age=TILE_MAX_AGE)
+        headers["X-Filter-Hash"] = filter_hash
+        if http_cache.etag_matches(if_none_match, etag):
+            metrics.record(cache="not_modified")
+            return Response(status_code=304, headers=headers)
+
+        body = tile_cache.get(cache_key)
+        if body is not None:
+            metrics.record(cache="hit")
+        else:
+            body = render_raster_tile(z, x, y, start_date, end_date, start_hour, end_hour,
+                                      mmsi, status, lines)
+            metrics.record(cache="miss")
+            tile_cache.put(cache_key, body, version=version)
+        return Response(content=body, media_type=raster_tiles.PNG_MEDIA_TYPE, headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"래스터 타일 생성 실패: {str(e)}")
+
+@app.get("/api/density")
+@query_executor.offload()
+@metrics.traced("density")
+def get_density(
+    start_date: str = Query(..., description="시작 날짜 (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="종료 날짜 (YYYY-MM-DD)"),
+    start_hour: int = Query(0, ge=0, le=23),
+    end_hour: int = Query(23, ge=0, le=23),
+    mmsi: Optional[List[str]] = Query(None, description="MMSI 목록 (반복 지정)"),
+    status: Optional[List[int]] = Query([1, 2], description="상태 목록 (1=조업, 2=비조업)"),
+    bbox: Optional[str] = Query(None, description="관심 영역 lat_min,lat_max,lon_min,lon_max"),
+    polygon: Optional[str] = Query(None, description="관심 영역 다각형 lat,lon;lat,lon;..."),
+    cell: float = Query(0.05, gt=0, description="셀 크기 (도)"),
+    mode: str = Query("grid", description="집계 방식 (grid | hex)"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """항적 밀도 격자 - 상태별 셀 건수 (건수가 있는 셀만)"""
+    try:
+        cache_key = make_key("density", start_date=start_date, end_date=end_date,
+                             start_hour=start_hour, end_hour=end_hour,
+                             mmsi=normalize_list(mmsi), status=normalize_list(status, int),
+                             bbox=bbox, polygon=polygon, cell=cell, mode=mode)
+        etag, headers = conditional_headers(cache_key, end_date)
+        if http_cache.etag_matches(if_none_match, etag):
+            metrics.record(cache="not_modified")
+            return Response(status_code=304, headers=headers)
+
+        table_name = get_table_name()
+
+        start_datetime, end_datetime = time_range(start_date, end_date, start_hour, end_hour)
+        with connect_db() as conn, metrics.stage("plan"):
+            area = area_options(conn, table_name, start_datetime, end_datetime, bbox, polygon)
+            route = route_source(conn, table_name, [(start_datetime, end_datetime)])
+        bounds = area.get("bounds", DEFAULT_BOUNDS)
+
+        try:
+            grid = DensityGrid(bounds, cell, mode)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        builder = TrajectoryQuery(route.source, start_datetime, end_datetime,
+                                  mmsi_list=mmsi, status_list=status, **area)
+        store = recent_store_for(table_name, builder)
+        if store is not None:
+            # 최근 기간은 컬럼 저장소의 좌표 배열을 바로 격자에 누적
+            with metrics.stage("hot"):
+                lat, lon, status_values = store.positions(builder)
+            with metrics.stage("transform"):
+                grid.add(lat, lon, status_values)
+            metrics.record(source="hot")
+        else:
+            query, params = builder.build_positions()
+            with connect_db(route) as conn:
+                with metrics.stage("sql"):
+                    cursor = conn.execute(query, params)
+                # 청크 단위로 읽으면서 셀 번호 계산
+                with metrics.stage("transform"):
+                    grid.add_rows(cursor)
+        with metrics.stage("serialize"):
+            result = grid.to_dict()
+        metrics.record(rows=sum(int(c.sum()) for c in grid.counts.values()))
+
+        return JSONResponse(content=result, headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"밀도 집계 실패: {str(e)}")
+
+@app.get("/api/stream/positions")
+async def stream_positions(
+    mmsi: Optional[List[str]] = Query(None, description="MMSI 목록 (반복 지정)"),
+    status: Optional[List[int]] = Query([1, 2], description="상태 목록 (1=조업, 2=비조업)"),
+    bbox: Optional[str] = Query(None, description="관심 영역 lat_min,lat_max,lon_min,lon_max"),
+    after: Optional[int] = Query(None, description="이 rowid 이후 행부터 (Last-Event-ID 와 같음)"),
+    last_event_id: Optional[str] = Header(None)
+):
+    """실시간 위치 스트림 (Server-Sent Events) - 구독 이후 새로 적재된 행을 조건별로 전달
+
+    재연결 시 Last-Event-ID(또는 after) 이후 놓친 행을 먼저 보낸 뒤 실시간 행을 이어서 보냄
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        bounds = spatial_index.parse_bbox(bbox) or DEFAULT_BOUNDS
+        subscription = Subscription(loop, mmsi, status, bounds)
+        if last_event_id is not None:
+            after = int(last_event_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        # 구독 시작 위치 / 놓친 행 조회는 DB 작업이므로 이벤트 루프 밖에서
+        await loop.run_in_executor(None, position_broadcaster.subscribe, subscription)
+        replay = []
+        if after is not None and after < subscription.after:
+            replay = await loop.run_in_executor(None, position_broadcaster.replay, subscription, after)
+    except FileNotFoundError:
+        position_broadcaster.unsubscribe(subscription)
+        raise HTTPException(status_code=404, detail=f"데이터베이스 파일을 찾을 수 없습니다: {DB_PATH}")
+    except Exception as e:
+        position_broadcaster.unsubscribe(subscription)
+        raise HTTPException(status_code=500, detail=f"실시간 스트림 시작 실패: {str(e)}")
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(event_stream(position_broadcaster, subscription, replay),
+                             media_type="text/event-stream", headers=headers)
+
+@app.get("/api/trips")
+@query_executor.offload()
+@metrics.traced("trips")
+def get_trips(
+    start_date: str = Query(..., description="시작 날짜 (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="종료 날짜 (YYYY-MM-DD)"),
+    start_hour: int = Query(0, ge=0, le=23),
+    end_hour: int = Query(23, ge=0, le=23),
+    mmsi: Optional[List[str]] = Query(None, description="MMSI 목록 (반복 지정)"),
+    bbox: Optional[str] = Query(None, description="관심 영역 lat_min,lat_max,lon_min,lon_max (구간 좌표 범위와 겹침)"),
+    min_distance_km: float = Query(0, ge=0, description="최소 이동 거리 (km)"),
+    min_fishing_minutes: float = Query(0, ge=0, description="최소 조업 시간 (분)"),
+    limit: int = Query(1000, ge=1, le=100000, description="최대 구간 수"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """기간과 겹치는 항해 구간 목록 (trips.py 로 만든 구간 테이블에서 조회, 원본 포인트는 읽지 않음)"""
+    try:
+        start_datetime, end_datetime = time_range(start_date, end_date, start_hour, end_hour)
+        try:
+            bounds = spatial_index.parse_bbox(bbox)
+            mmsi_list = [int(m) for m in mmsi] if mmsi else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        cache_key = make_key("trips", start_datetime=start_datetime, end_datetime=end_datetime,
+                             mmsi=normalize_list(mmsi), bbox=bbox, min_distance_km=min_distance_km,
+                             min_fishing_minutes=min_fishing_minutes, limit=limit)
+        # 조회 전 DB 버전 (조회 중 적재로 바뀌면 결과를 캐시하지 않음)
+        version = result_cache.current_version()
+        etag, headers = conditional_headers(cache_key, end_date, version=version)
+        if http_cache.etag_matches(if_none_match, etag):
+            metrics.record(cache="not_modified")
+            return Response(status_code=304, headers=headers)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            metrics.record(cache="hit")
+            return JSONResponse(content=cached, headers=headers)
+
+        table_name = get_table_name()
+        query, params = trips.trips_query(
+            start_datetime, end_datetime, mmsi_list=mmsi_list, bounds=bounds,
+            min_distance_m=min_distance_km * 1000, min_fishing_seconds=min_fishing_minutes * 60,
+            limit=limit
+        )
+        with connect_db() as conn:
+            if trips.watermark(conn, table_name) is None:
+                raise HTTPException(status_code=404,
+                                    detail="항해 구간 테이블이 없습니다. python trips.py 로 먼저 생성하세요")
+            with metrics.stage("sql"):
+                rows = conn.execute(query, params).fetchall()
+
+        with metrics.stage("serialize"):
+            result = [trips.trip_record(row) for row in rows]
+        metrics.record(rows=len(result), cache="miss")
+        result_cache.put(cache_key, result, version=version)
+        return JSONResponse(content=result, headers=headers)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"항해 구간 조회 실패: {str(e)}")
 
 @app.get("/api/stats")
-async def get_statistics(
+@query_executor.offload()
+@metrics.traced("stats")
+def get_statistics(
     start_date: str,
     end_date: str,
     start_hour: int = 0,
-    end_hour: int = 23
+    end_hour: int = 23,
+    bbox: Optional[str] = Query(None, description="관심 영역 lat_min,lat_max,lon_min,lon_max"),
+    polygon: Optional[str] = Query(None, description="관심 영역 다각형 lat,lon;lat,lon;..."),
+    if_none_match: Optional[str] = Header(None)
 ):
     """데이터 통계 정보"""
     try:
-        conn = connect_db()
-        cursor = conn.cursor()
-
-        # 테이블 확인
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' LIMIT 1")
-        table_name = cursor.fetchone()[0]
-
-        start_datetime = f"{start_date} {start_hour:02d}:00:00"
-        end_datetime = f"{end_date} {end_hour:02d}:59:59"
-
-        query = f"""
-            SELECT
-                COUNT(*) as total_count,
-                COUNT(DISTINCT mmsi) as unique_vessels,
-                SUM(CASE WHEN status = 1 THEN 1 ELSE 0 END) as fishing_count,
-                SUM(CASE WHEN status = 2 THEN 1 ELSE 0 END) as non_fishing_count,
-                MIN(datetime) as min_datetime,
-                MAX(datetime) as max_datetime
-            FROM {table_name}
-            WHERE datetime >= ? AND datetime <= ?
-        """
-
-        cursor.execute(query, [start_datetime, end_datetime])
-        result = cursor.fetchone()
-        conn.close()
-
-        return {
+        start_datetime, end_datetime = time_range(start_date, end_date, start_hour, end_hour)
+        cache_key = make_key("stats", start_datetime=start_datetime, end_datetime=end_datetime,
+                             bbox=bbox, polygon=polygon)
+        # 조회 전 DB 버전 (조회 중 적재로 바뀌면 결과를 캐시하지 않음)
+        version = result_cache.current_version()
+        etag, headers = conditional_headers(cache_key, end_date, version=version)
+        if http_cache.etag_matches(if_none_match, etag):
+            metrics.record(cache="not_modified")
+            return Response(status_code=304, headers=headers)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            metrics.record(cache="hit")
+            return JSONResponse(content=cached, headers=headers)
+
+        table_name = get_table_name()
+
+        with connect_db() as conn:
+            with metrics.stage("plan"):
+                area = area_options(conn, table_name, start_datetime, end_datetime, bbox, polygon)
+            # 집계 테이블이 있으면 시간 단위 집계 + 미집계/경계 행으로 계산
+            last_rowid = rollups.watermark(conn, table_name)
+            if area:
+                # 관심 영역 통계는 공간 인덱스 구간 + 좌표/다각형 조건으로 원본에서 계산
+                route = route_source(conn, table_name, [(start_datetime, end_datetime)])
+                builder = TrajectoryQuery(route.source, start_datetime, end_datetime, **area)
+                query, params = builder.build_stats()
+            elif last_rowid is not None:
+                # 집계로 답하지 못하는 경계 시간만 원본/파티션에서 읽음
+                route = route_source(conn, table_name, rollups.split_range(start_datetime, end_datetime)[2])
+                query, params = rollups.stats_query(route.source, start_datetime, end_datetime, last_rowid)
+            else:
+                route = route_source(conn, table_name, [(start_datetime, end_datetime)])
+                query, params = stats_query(route.source, start_datetime, end_datetime)
+            route.attach(conn)
+            with metrics.stage("sql"):
+                result = conn.execute(query, params).fetchone()
+
+        stats = {
             "total_count": result[0],
             "unique_vessels": result[1],
             "fishing_count": result[2],
@@ -414,7 +1213,11 @@ async def get_statistics(
             "min_datetime": result[4],
             "max_datetime": result[5]
         }
+        result_cache.put(cache_key, stats, version=version)
+        return JSONResponse(content=stats, headers=headers)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"통계 조회 실패: {str(e)}")
 
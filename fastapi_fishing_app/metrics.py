@@ -0,0 +1,314 @@
+"""
+요청 단계별 시간 측정 / Prometheus 지표
+- 요청 추적(RequestTrace): 단계별 시간, 행 수, 응답 바이트
+  (connect: 연결 대여, plan: 공간 인덱스 구간 조회, sql: 쿼리 실행, fetch: 행 읽기,
+   transform: 단순화/집계, serialize: 응답 직렬화)
+  완료 시 구조화 로그(JSON 한 줄)로 남기고 단계별 히스토그램에 반영
+- MetricsMiddleware: 라우트별 지연 시간 히스토그램, 요청 수, 전송 바이트
+- Metrics.render(): Prometheus 텍스트 형식 (prometheus_client 없이 직접 생성)
+
+라우트 함수는 실행기 스레드 하나에서 끝까지 실행되므로 진행 중인 추적은 스레드별로 보관하고,
+connect_db 같은 공용 함수는 metrics.stage() / metrics.record() 로 현재 추적에 기록
+"""
+
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("fishing.metrics")
+
+# 지연 시간 히스토그램 구간 (초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 600.0)
+
+# Starlette 가 text/ 형식에 charset=utf-8 을 붙이므로 여기서는 생략
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs += [f'{n}="{_escape(v)}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """레이블별 누적 값"""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[n] for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, _labels(self.labels, key), value) for key, value in items]
+
+
+class Histogram:
+    """레이블별 구간 누적 건수 / 합계 / 건수"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._values = {}   # key -> [구간별 건수..., 합계, 건수]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[n] for n in self.labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+                    break
+            entry[-2] += value
+            entry[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(entry)) for key, entry in self._values.items())
+        result = []
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                result.append((self.name + "_bucket",
+                               _labels(self.labels, key, [("le", _number(bound))]), cumulative))
+            result.append((self.name + "_sum", _labels(self.labels, key), entry[-2]))
+            result.append((self.name + "_count", _labels(self.labels, key), entry[-1]))
+        return result
+
+
+class Gauge:
+    """호출 시점의 값을 함수로 읽는 지표 (풀/실행기/캐시 상태)
+
+    func 는 숫자 또는 {레이블 값 튜플: 숫자} 반환,
+    다른 객체가 누적하는 횟수는 kind="counter" 로 노출
+    """
+
+    def __init__(self, name, help, func, labels=(), kind="gauge"):
+        self.name = name
+        self.help = help
+        self.func = func
+        self.labels = tuple(labels)
+        self.kind = kind
+
+    def samples(self):
+        value = self.func()
+        if not isinstance(value, dict):
+            return [(self.name, "", value)]
+        return [(self.name, _labels(self.labels, key), v) for key, v in sorted(value.items())]
+
+
+class RequestTrace:
+    """요청 하나의 단계별 시간 / 행 수 / 응답 바이트"""
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.fields = {}
+        self.rows = None
+        self.bytes_out = None
+
+    def add_stage(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def to_dict(self, status, total):
+        record = {
+            "route": self.route,
+            "status": status,
+            "total_ms": round(total * 1000, 2),
+            "stages_ms": {name: round(s * 1000, 2) for name, s in self.stages.items()},
+        }
+        if self.rows is not None:
+            record["rows"] = self.rows
+        if self.bytes_out is not None:
+            record["bytes"] = self.bytes_out
+        record.update(self.fields)
+        return record
+
+
+class Metrics:
+    """지표 모음 + 요청 추적"""
+
+    def __init__(self):
+        self._metrics = []
+        self._local = threading.local()
+
+        self.request_latency = self.add(Histogram(
+            "fishing_http_request_duration_seconds", "라우트별 요청 처리 시간 (대기 포함)",
+            ("route", "method", "status")))
+        self.requests = self.add(Counter(
+            "fishing_http_requests_total", "라우트별 요청 수", ("route", "method", "status")))
+        self.response_bytes = self.add(Counter(
+            "fishing_http_response_bytes_total", "라우트별 전송 바이트 (압축 후)", ("route",)))
+        self.stage_latency = self.add(Histogram(
+            "fishing_query_stage_duration_seconds", "조회 단계별 처리 시간", ("route", "stage")))
+        self.rows = self.add(Counter(
+            "fishing_query_rows_total", "조회 라우트별 반환 행 수", ("route",)))
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help, func, labels=(), kind="gauge"):
+        return self.add(Gauge(name, help, func, labels, kind))
+
+    # ---- 요청 추적 ----
+
+    def current(self):
+        """현재 스레드에서 진행 중인 추적 (없으면 None)"""
+        return getattr(self._local, "trace", None)
+
+    @contextmanager
+    def stage(self, name):
+        """현재 추적에 단계 시간 기록 (추적 중이 아니면 시간만 재고 버림)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - started)
+
+    def add_stage(self, name, seconds):
+        trace = self.current()
+        if trace is not None:
+            trace.add_stage(name, seconds)
+
+    def record(self, rows=None, bytes_out=None, **fields):
+        """현재 추적에 행 수 / 응답 바이트 / 로그 필드 기록"""
+        trace = self.current()
+        if trace is None:
+            return
+        if rows is not None:
+            trace.rows = rows
+        if bytes_out is not None:
+            trace.bytes_out = bytes_out
+        trace.fields.update(fields)
+
+    def traced(self, route):
+        """동기 라우트 함수를 요청 추적으로 감싸는 데코레이터 (시그니처 유지)"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                trace = RequestTrace(route)
+                previous = self.current()
+                self._local.trace = trace
+                status = 200
+                try:
+                    response = func(*args, **kwargs)
+                    status = getattr(response, "status_code", 200)
+                    return response
+                except Exception as e:
+                    status = getattr(e, "status_code", 500)
+                    raise
+                finally:
+                    self._local.trace = previous
+                    self.finish(trace, status)
+            return wrapper
+        return decorator
+
+    def finish(self, trace, status):
+        """추적 완료 - 단계 히스토그램 / 행 수 반영 후 구조화 로그"""
+        total = time.perf_counter() - trace.started
+        for name, seconds in trace.stages.items():
+            self.stage_latency.observe(seconds, route=trace.route, stage=name)
+        if trace.rows:
+            self.rows.inc(trace.rows, route=trace.route)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(trace.to_dict(status, total), ensure_ascii=False, default=str))
+
+    # ---- 출력 ----
+
+    def render(self):
+        """Prometheus 텍스트 형식"""
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = metric.samples()
+            except Exception:
+                logger.exception("지표 수집 실패: %s", metric.name)
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """라우트별 지연 시간 / 요청 수 / 전송 바이트 ASGI 미들웨어
+
+    라우트 레이블은 경로 템플릿(예: /api/tiles/trajectory/{z}/{x}/{y}.mvt)으로 묶음
+    """
+
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+        self._paths = {}    # endpoint -> 경로 템플릿
+
+    def _route_path(self, scope):
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._paths.get(endpoint)
+        if path is None:
+            path = "unmatched"
+            for route in getattr(scope.get("app"), "routes", ()):
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = route.path
+                    break
+            self._paths[endpoint] = path
+        return path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        state = {"status": 500, "bytes": 0}
+
+        async def send_measured(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_measured)
+        finally:
+            route = self._route_path(scope)
+            labels = {"route": route, "method": scope["method"], "status": str(state["status"])}
+            self.metrics.request_latency.observe(time.perf_counter() - started, **labels)
+            self.metrics.requests.inc(**labels)
+            self.metrics.response_bytes.inc(state["bytes"], route=route)
@@ -0,0 +1,185 @@
+"""
+항적 테이블 인덱스 부트스트랩 / 마이그레이션 도구
+- 항적 테이블과 기존 인덱스 확인
+- API 쿼리용 인덱스 생성 후 ANALYZE 실행
+- 엔드포인트별 쿼리의 EXPLAIN QUERY PLAN을 생성 전/후로 비교 출력
+
+사용법:
+    python migrate_db.py [DB 경로] [--check] [--start 2023-01-11 --end 2023-01-15]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from schema_registry import REQUIRED_COLUMNS
+from query_builder import TrajectoryQuery, mmsi_count_query, stats_query
+
+DEFAULT_DB_PATH = os.environ.get("FISHING_DB_PATH", r"C:\Users\User\Desktop\fishing_trajectory.db")
+
+# (인덱스 접미사, 컬럼 목록)
+# - (datetime, mmsi, status): 기간 조건 + MMSI 집계/통계 쿼리를 인덱스만으로 처리
+# - (mmsi, datetime): MMSI IN (...) 조건과 (mmsi, datetime) 정렬
+INDEX_DEFINITIONS = [
+    ("dt_mmsi_status", ("datetime", "mmsi", "status")),
+    ("mmsi_dt", ("mmsi", "datetime")),
+]
+
+
+def index_name(table_name, suffix):
+    """테이블별 인덱스 이름"""
+    return f"idx_{table_name}_{suffix}"
+
+
+def find_trajectory_table(conn):
+    """필수 컬럼을 모두 가진 첫 번째 테이블 이름"""
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+    for table in tables:
+        columns = {row[1].lower() for row in conn.execute(f'PRAGMA table_info("{table}")')}
+        if all(c in columns for c in REQUIRED_COLUMNS):
+            return table
+    return tables[0] if tables else None
+
+
+def existing_indexes(conn, table_name):
+    """테이블에 걸린 인덱스 {이름: (컬럼, ...)}"""
+    indexes = {}
+    for row in conn.execute(f'PRAGMA index_list("{table_name}")'):
+        name = row[1]
+        columns = tuple(col[2] for col in conn.execute(f'PRAGMA index_info("{name}")'))
+        indexes[name] = columns
+    return indexes
+
+
+def endpoint_queries(table_name, start_datetime, end_datetime, mmsi_list=None):
+    """엔드포인트별 대표 쿼리 [(이름, SQL, 파라미터)] - main.py 와 같은 쿼리 빌더 사용"""
+    mmsi_list = mmsi_list or ["440000000"]
+    trajectory = TrajectoryQuery(table_name, start_datetime, end_datetime,
+                                 mmsi_list=mmsi_list, status_list=[1, 2], sampling_step=5)
+    download = TrajectoryQuery(table_name, start_datetime, end_datetime,
+                               mmsi_list=mmsi_list, status_list=[1, 2],
+                               extra_columns=("sog", "cog", "heading"))
+
+    return [
+        ("/api/mmsi", *mmsi_count_query(table_name, start_datetime, end_datetime, 100)),
+        ("/api/trajectory", *trajectory.build()),
+        ("/api/download/trajectory", *download.build()),
+        ("/api/stats", *stats_query(table_name, start_datetime, end_datetime)),
+    ]
+
+
+def explain(conn, query, params):
+    """EXPLAIN QUERY PLAN 결과의 detail 목록"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+def is_full_scan(plan, table_name):
+    """인덱스 없이 테이블 전체를 스캔하는 단계가 있는지"""
+    for detail in plan:
+        words = detail.split()
+        if len(words) >= 2 and words[0] == "SCAN" and words[1] == table_name and "INDEX" not in detail:
+            return True
+    return False
+
+
+def report_plans(conn, table_name, queries, title):
+    """엔드포인트별 쿼리 플랜 출력, 전체 스캔 엔드포인트 목록 반환"""
+    print(f"\n📋 {title}")
+    full_scans = []
+    for name, query, params in queries:
+        plan = explain(conn, query, params)
+        full_scan = is_full_scan(plan, table_name)
+        if full_scan:
+            full_scans.append(name)
+        print(f"   {'❌' if full_scan else '✅'} {name}")
+        for detail in plan:
+            print(f"      - {detail}")
+    return full_scans
+
+
+def create_indexes(conn, table_name):
+    """누락된 인덱스 생성 후 ANALYZE, 생성한 인덱스 이름 목록 반환"""
+    current = existing_indexes(conn, table_name)
+    created = []
+
+    for suffix, columns in INDEX_DEFINITIONS:
+        name = index_name(table_name, suffix)
+        # 같은 컬럼 순서로 시작하는 인덱스가 이미 있으면 건너뜀
+        if name in current or any(cols[:len(columns)] == columns for cols in current.values()):
+            print(f"   ⏭️  {name} ({', '.join(columns)}) 이미 존재")
+            continue
+
+        print(f"   🔨 {name} ({', '.join(columns)}) 생성 중...")
+        started = time.perf_counter()
+        conn.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table_name}" ({", ".join(columns)})')
+        conn.commit()
+        print(f"      완료 ({time.perf_counter() - started:.1f}초)")
+        created.append(name)
+
+    print("   📊 ANALYZE 실행 중...")
+    started = time.perf_counter()
+    conn.execute("ANALYZE")
+    conn.commit()
+    print(f"      완료 ({time.perf_counter() - started:.1f}초)")
+
+    return created
+
+
+def migrate(db_path, start_date, end_date, check_only=False):
+    """인덱스 점검/생성 실행, 전체 스캔이 남아 있으면 False 반환"""
+    if not os.path.exists(db_path):
+        print(f"❌ 파일 없음: {db_path}")
+        return False
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        table_name = find_trajectory_table(conn)
+        if table_name is None:
+            print("❌ 테이블이 없습니다!")
+            return False
+
+        print(f"📁 경로: {db_path}")
+        print(f"📋 항적 테이블: {table_name}")
+        for name, columns in existing_indexes(conn, table_name).items():
+            print(f"   - 기존 인덱스 {name} ({', '.join(columns)})")
+
+        queries = endpoint_queries(table_name, f"{start_date} 00:00:00", f"{end_date} 23:59:59")
+        full_scans = report_plans(conn, table_name, queries, "현재 쿼리 플랜")
+
+        if check_only:
+            return not full_scans
+
+        print("\n🔧 인덱스 생성")
+        create_indexes(conn, table_name)
+
+        full_scans = report_plans(conn, table_name, queries, "인덱스 적용 후 쿼리 플랜")
+        if full_scans:
+            print(f"\n⚠️ 전체 스캔이 남은 엔드포인트: {', '.join(full_scans)}")
+            return False
+
+        print("\n✅ 모든 엔드포인트 쿼리가 인덱스를 사용합니다")
+        return True
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="항적 테이블 인덱스 부트스트랩")
+    parser.add_argument("db_path", nargs="?", default=DEFAULT_DB_PATH, help="데이터베이스 경로")
+    parser.add_argument("--check", action="store_true", help="인덱스를 만들지 않고 쿼리 플랜만 확인")
+    parser.add_argument("--start", default="2023-01-11", help="플랜 확인용 시작 날짜")
+    parser.add_argument("--end", default="2023-01-15", help="플랜 확인용 종료 날짜")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("항적 테이블 인덱스 부트스트랩")
+    print("=" * 60)
+
+    ok = migrate(args.db_path, args.start, args.end, check_only=args.check)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
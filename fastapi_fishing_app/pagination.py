@@ -0,0 +1,96 @@
+"""
+항적 키셋 페이지네이션
+이전 페이지 마지막 행의 (mmsi, datetime, rowid) 를 불투명 커서로 넘겨 다음 페이지를 이어서 조회
+- OFFSET 스캔 대신 선박별 (mmsi, datetime) 인덱스 범위 탐색이므로 뒤쪽 페이지도 비용이 같음
+- rowid 는 같은 시각의 중복 행이 페이지 경계에서 빠지지 않도록 하는 보조 키
+- 커서에 조회 조건 해시를 넣어 다른 조건으로 만든 커서는 거부
+"""
+
+import base64
+import itertools
+import json
+
+DEFAULT_PAGE_SIZE = 10000
+MAX_PAGE_SIZE = 200000
+
+CURSOR_VERSION = 1
+
+
+def encode_cursor(key, filter_key):
+    """(mmsi, datetime, rowid) + 조회 조건 키 -> URL 안전 문자열"""
+    mmsi, dt, rowid = key
+    payload = json.dumps([CURSOR_VERSION, filter_key, mmsi, dt, rowid], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, filter_key):
+    """커서 문자열 -> (mmsi, datetime, rowid), 형식이 잘못되었거나 조건이 다르면 ValueError"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        version, cursor_filter, mmsi, dt, rowid = json.loads(base64.urlsafe_b64decode(padded))
+    except (TypeError, ValueError):
+        raise ValueError("잘못된 cursor 입니다")
+    if version != CURSOR_VERSION:
+        raise ValueError("지원하지 않는 cursor 버전입니다")
+    if cursor_filter != filter_key:
+        raise ValueError("cursor 의 조회 조건이 요청과 다릅니다")
+    return mmsi, dt, rowid
+
+
+def validate_page_size(page_size):
+    """페이지 크기 확인 (None 이면 기본값)"""
+    if page_size is None:
+        return DEFAULT_PAGE_SIZE
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page_size 는 1 ~ {MAX_PAGE_SIZE} 사이여야 합니다")
+    return page_size
+
+
+def _vessels_after(conn, builder, after):
+    """MMSI 순서상 after 다음 선박 중 조건에 맞는 행이 있는 선박들 (공간 인덱스 구간이 있으면 그 선박만)"""
+    if builder.ranges is not None:
+        for mmsi in sorted({r[0] for r in builder.ranges}):
+            if after is None or mmsi > after:
+                yield mmsi
+        return
+
+    while True:
+        query, params = builder.build_next_vessel(after)
+        row = conn.execute(query, params).fetchone()
+        if row is None:
+            return
+        after = row[0]
+        yield after
+
+
+def fetch_page(conn, builder, page_size, after=None):
+    """키셋 페이지 조회
+
+    Args:
+        builder: TrajectoryQuery (전체 조회 조건)
+        page_size: 페이지 행 수
+        after: 이전 페이지 마지막 행의 (mmsi, datetime, rowid), None 이면 첫 페이지
+
+    Returns:
+        (행 목록, 다음 페이지 키), 마지막 페이지이면 다음 페이지 키는 None
+    """
+    if after is None:
+        vessels = _vessels_after(conn, builder, None)
+    else:
+        # 커서 선박의 남은 행부터 이어서 조회
+        vessels = itertools.chain([after[0]], _vessels_after(conn, builder, after[0]))
+
+    rows = []
+    for mmsi in vessels:
+        vessel_after = after[1:] if after is not None and mmsi == after[0] else None
+        # 한 행을 더 읽어 다음 페이지가 있는지 확인
+        query, params = builder.for_vessel(mmsi).build_page(
+            after=vessel_after, limit=page_size - len(rows) + 1
+        )
+        rows.extend(conn.execute(query, params).fetchall())
+        if len(rows) > page_size:
+            del rows[page_size:]
+            last = rows[-1]
+            return [row[:-1] for row in rows], (last[0], last[1], last[-1])
+
+    return [row[:-1] for row in rows], None
@@ -0,0 +1,554 @@
+"""
+시간 파티션
+항적 테이블의 지난 기간을 월(또는 일) 단위 파티션 DB 파일로 옮기고,
+조회 기간과 겹치는 파티션만 ATTACH 해서 원본 테이블과 함께 읽는 쿼리 대상(FROM 절)을 만듦
+- 파티션 파일: <DB 이름>_partitions/<테이블>_<YYYY-MM 또는 YYYY-MM-DD>.db (같은 테이블 이름/스키마/인덱스)
+- traj_partitions: 원본 DB 에 저장하는 파티션 목록 (이름, 경로, 기간, 행 수, 불변 여부)
+- 원래 rowid 를 그대로 옮기므로 집계 테이블/공간 인덱스(rowid watermark)와 페이지 커서가 그대로 유효
+- 불변(immutable) 파티션은 파일을 읽기 전용으로 바꾸고 mode=ro&immutable=1 로 열어 잠금/변경 확인 없이 읽음
+- 원본 테이블은 최근(쓰기 중인) 파티션 역할을 하며 항상 조회 대상에 포함
+
+파티션별 (mmsi, datetime) 인덱스 결과는 UNION ALL 위의 ORDER BY mmsi, datetime 에서
+SQLite 가 정렬 없이 병합(MERGE)하므로 조회 결과는 단일 테이블과 같은 순서
+
+옮긴 행은 원본 테이블에 없으므로 분리 후에는 rollups.py / spatial_index.py 의 --rebuild
+(또는 최초 생성)를 사용할 수 없음 - 분리 전에 기존 집계/공간 인덱스/항해 구간을 최신으로 갱신함
+(trips.py 는 파티션도 ATTACH 해서 읽으므로 분리 후에도 --rebuild 가능)
+
+사용법:
+    python partitions.py split [DB 경로] --before 2024-01-01 [--granularity month|day] [--freeze] [--vacuum]
+    python partitions.py freeze [DB 경로] 2023-01 2023-02 ... | --all
+    python partitions.py thaw [DB 경로] 2023-01
+    python partitions.py list [DB 경로]
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import stat
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import rollups
+import spatial_index
+from migrate_db import DEFAULT_DB_PATH, create_indexes, find_trajectory_table
+
+CATALOG_TABLE = "traj_partitions"
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 파티션 단위 -> 기간 키 형식
+GRANULARITIES = {
+    "month": "%Y-%m",
+    "day": "%Y-%m-%d",
+}
+
+# 연결 하나에 ATTACH 할 수 있는 DB 수 (SQLite 기본 컴파일 값, 연결에서 더 작게만 바꿀 수 있음)
+DEFAULT_MAX_ATTACHED = 10
+
+# ATTACH 별칭 접두사 (다른 용도의 ATTACH 와 구분)
+ALIAS_PREFIX = "part_"
+
+
+class Partition:
+    """파티션 목록의 한 행"""
+
+    __slots__ = ("name", "source_table", "path", "start_datetime", "end_datetime",
+                 "row_count", "immutable")
+
+    def __init__(self, name, source_table, path, start_datetime, end_datetime, row_count, immutable):
+        self.name = name
+        self.source_table = source_table
+        self.path = path
+        self.start_datetime = start_datetime
+        self.end_datetime = end_datetime
+        self.row_count = row_count
+        self.immutable = bool(immutable)
+
+    @property
+    def alias(self):
+        """ATTACH 별칭 (불변 여부가 바뀌면 다른 별칭으로 다시 ATTACH)"""
+        suffix = "ro" if self.immutable else "rw"
+        return f"{ALIAS_PREFIX}{re.sub(r'[^0-9A-Za-z]', '_', self.name)}_{suffix}"
+
+    def overlaps(self, start_datetime, end_datetime):
+        return self.start_datetime <= end_datetime and self.end_datetime >= start_datetime
+
+
+def ensure_catalog(conn):
+    """파티션 목록 테이블 생성"""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CATALOG_TABLE} (
+            name TEXT PRIMARY KEY,
+            source_table TEXT NOT NULL,
+            path TEXT NOT NULL,
+            start_datetime TEXT NOT NULL,
+            end_datetime TEXT NOT NULL,
+            row_count INTEGER NOT NULL DEFAULT 0,
+            immutable INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )
+    """)
+
+
+def load_catalog(conn, table_name=None):
+    """파티션 목록 [Partition] (기간 순, 목록 테이블이 없으면 빈 목록)"""
+    query = f"""
+        SELECT name, source_table, path, start_datetime, end_datetime, row_count, immutable
+        FROM {CATALOG_TABLE}
+    """
+    params = []
+    if table_name is not None:
+        query += " WHERE source_table = ?"
+        params.append(table_name)
+    try:
+        rows = conn.execute(query + " ORDER BY start_datetime", params).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    return [Partition(*row) for row in rows]
+
+
+def has_partitions(conn, table_name):
+    """항적 테이블을 파티션으로 나눈 적이 있는지"""
+    return bool(load_catalog(conn, table_name))
+
+
+def resolve_path(db_path, path):
+    """목록의 파티션 경로(원본 DB 폴더 기준 상대 경로 가능) -> 파일 경로"""
+    if os.path.isabs(path):
+        return path
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), path)
+
+
+def _uri(path, immutable):
+    """파티션 파일 -> 읽기 전용 URI (불변 파티션은 잠금/WAL 확인 생략)"""
+    uri = "file:{}?mode=ro".format(path.replace("\\", "/"))
+    return uri + "&immutable=1" if immutable else uri
+
+
+def max_attached(conn):
+    """연결에 ATTACH 할 수 있는 DB 수"""
+    try:
+        return conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    except AttributeError:
+        # Python 3.11 미만
+        return DEFAULT_MAX_ATTACHED
+
+
+def union_source(table_name, columns, partitions):
+    """원본 테이블 + ATTACH 한 파티션을 읽는 UNION ALL 서브쿼리
+
+    rowid 를 컬럼으로 노출 (키셋 페이지네이션 / 집계 watermark 조건이 파티션에도 적용되도록)
+    """
+    columns = ", ".join(f'"{c}"' for c in columns)
+    arms = [f'SELECT rowid AS rowid, {columns} FROM main."{table_name}"']
+    arms += [f'SELECT rowid AS rowid, {columns} FROM {p.alias}."{table_name}"' for p in partitions]
+    return "(" + " UNION ALL ".join(arms) + ")"
+
+
+class Route:
+    """조회 기간에 해당하는 쿼리 대상
+
+    Attributes:
+        source: FROM 절에 넣을 테이블 이름 또는 UNION ALL 서브쿼리
+        partitions: ATTACH 가 필요한 파티션 목록
+    """
+
+    def __init__(self, source, partitions=(), db_path=None):
+        self.source = source
+        self.partitions = list(partitions)
+        self.db_path = db_path
+
+    def attach(self, conn):
+        """쿼리를 실행할 연결에 필요한 파티션 ATTACH (이미 있으면 건너뜀)
+
+        필요 없는 파티션은 DETACH 해서 ATTACH 개수 제한을 넘지 않도록 함
+        """
+        attached = {row[1] for row in conn.execute("PRAGMA database_list")
+                    if row[1].startswith(ALIAS_PREFIX)}
+        needed = {p.alias: p for p in self.partitions}
+
+        for alias in attached - set(needed):
+            try:
+                conn.execute(f"DETACH DATABASE {alias}")
+            except sqlite3.OperationalError:
+                # 실행 중인 문장이 있어 분리할 수 없으면 그대로 둠
+                pass
+
+        for alias, partition in needed.items():
+            if alias in attached:
+                continue
+            path = resolve_path(self.db_path, partition.path)
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+            conn.execute(f"ATTACH DATABASE ? AS {alias}", [_uri(path, partition.immutable)])
+        return conn
+
+
+class PartitionRouter:
+    """파티션 목록 캐시 + 조회 기간별 쿼리 대상 생성
+
+    원본 DB 파일 서명이 바뀌었을 때만 목록을 다시 읽음 (SchemaRegistry 와 같은 방식)
+
+    Args:
+        pool: ConnectionPool 인스턴스
+        check_interval: DB 파일 변경 여부를 확인하는 최소 간격 (초)
+    """
+
+    def __init__(self, pool, check_interval=5):
+        self.pool = pool
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked_at = 0.0
+        self._partitions = []
+        self._columns = {}
+
+    def refresh(self, conn=None):
+        """파티션 목록과 항적 테이블 컬럼을 다시 읽음"""
+        if conn is None:
+            with self.pool.connection() as conn:
+                return self.refresh(conn)
+
+        partitions = load_catalog(conn)
+        columns = {}
+        for table in {p.source_table for p in partitions}:
+            columns[table] = [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+        with self._lock:
+            self._partitions = partitions
+            self._columns = columns
+            self._signature = self.pool.file_signature()
+            self._checked_at = time.monotonic()
+
+    def _ensure_fresh(self, conn=None):
+        """확인 간격이 지났고 DB 파일이 바뀌었으면 갱신"""
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked_at < self.check_interval:
+            return
+
+        signature = self.pool.file_signature()
+        if signature != self._signature:
+            self.refresh(conn)
+        else:
+            self._checked_at = now
+
+    def partitions(self, table_name=None, conn=None):
+        """파티션 목록 (table_name 지정 시 해당 테이블의 파티션만)"""
+        self._ensure_fresh(conn)
+        return [p for p in self._partitions if table_name is None or p.source_table == table_name]
+
+    def route(self, table_name, ranges, conn=None):
+        """조회 기간과 겹치는 파티션 + 원본 테이블을 읽는 쿼리 대상
+
+        Args:
+            table_name: 원본 항적 테이블
+            ranges: [(시작 datetime, 끝 datetime), ...] 이 중 하나라도 겹치는 파티션을 포함
+
+        Returns:
+            Route (파티션이 없으면 source 는 table_name 그대로)
+
+        Raises:
+            ValueError: 겹치는 파티션이 연결당 ATTACH 제한보다 많을 때
+        """
+        self._ensure_fresh(conn)
+        selected = [p for p in self._partitions
+                    if p.source_table == table_name
+                    and any(p.overlaps(start, end) for start, end in ranges)]
+        if not selected:
+            return Route(table_name)
+
+        limit = max_attached(conn) if conn is not None else DEFAULT_MAX_ATTACHED
+        if len(selected) > limit:
+            raise ValueError(
+                f"조회 기간이 파티션 {len(selected)}개에 걸쳐 있습니다 (최대 {limit}개). 기간을 줄여 주세요"
+            )
+
+        source = union_source(table_name, self._columns[table_name], selected)
+        return Route(source, selected, self.pool.db_path)
+
+
+def period_key(value, granularity):
+    """datetime -> 파티션 키 ('2024-01' / '2024-01-15')"""
+    return value.strftime(GRANULARITIES[granularity])
+
+
+def period_bounds(key, granularity):
+    """파티션 키 -> (시작 datetime, 다음 기간 시작 datetime)"""
+    start = datetime.strptime(key, GRANULARITIES[granularity])
+    if granularity == "day":
+        end = start + timedelta(days=1)
+    else:
+        end = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start, end
+
+
+def _periods(conn, table_name, before, granularity):
+    """before 이전에 끝나는 기간 키 목록 (원본 테이블에 행이 있는 기간만)"""
+    keys = []
+    first = conn.execute(
+        f'SELECT MIN(datetime) FROM "{table_name}" WHERE datetime < ?', [before.strftime(DATETIME_FORMAT)]
+    ).fetchone()[0]
+    if first is None:
+        return keys
+
+    key = period_key(datetime.strptime(first[:19], DATETIME_FORMAT), granularity)
+    while True:
+        start, end = period_bounds(key, granularity)
+        if end > before:
+            return keys
+        # (datetime, ...) 인덱스로 다음 행이 있는 기간으로 건너뜀
+        row = conn.execute(
+            f'SELECT MIN(datetime) FROM "{table_name}" WHERE datetime >= ?', [start.strftime(DATETIME_FORMAT)]
+        ).fetchone()
+        if row[0] is None:
+            return keys
+        next_key = period_key(datetime.strptime(row[0][:19], DATETIME_FORMAT), granularity)
+        if next_key != key:
+            key = next_key
+            continue
+        keys.append(key)
+        key = period_key(end, granularity)
+
+
+def _create_partition_table(conn, alias, table_name):
+    """원본 테이블과 같은 CREATE TABLE 문으로 파티션 테이블 생성"""
+    sql = conn.execute(
+        "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", [table_name]
+    ).fetchone()[0]
+    sql = re.sub(r"^\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?(\"[^\"]+\"|\[[^\]]+\]|`[^`]+`|\S+?)(?=\s*\()",
+                 f'CREATE TABLE IF NOT EXISTS {alias}."{table_name}"', sql, count=1, flags=re.IGNORECASE)
+    conn.execute(sql)
+
+
+def split(conn, db_path, table_name, before, granularity="month", directory=None, progress=None):
+    """before 이전의 완전한 기간을 파티션 파일로 옮김
+
+    Args:
+        conn: 원본 DB 의 쓰기 가능한 연결 (isolation_level=None)
+        before: 이 시각 이전에 끝나는 기간만 옮김 (datetime)
+        directory: 파티션 파일 폴더 (기본: <DB 이름>_partitions)
+        progress: (기간 키, 옮긴 행 수) 를 받는 콜백
+
+    Returns:
+        {기간 키: 옮긴 행 수}
+    """
+    if directory is None:
+        directory = os.path.splitext(os.path.abspath(db_path))[0] + "_partitions"
+    os.makedirs(directory, exist_ok=True)
+    ensure_catalog(conn)
+
+    # 옮긴 행은 원본 테이블에서 다시 집계할 수 없으므로 기존 집계/공간 인덱스/항해 구간을 먼저 최신으로
+    if rollups.watermark(conn, table_name) is not None:
+        rollups.update_rollups(conn, table_name)
+    if spatial_index.watermark(conn, table_name) is not None:
+        spatial_index.update_index(conn, table_name)
+    import trips  # trips 가 이 모듈을 사용하므로 여기서 가져옴
+    if trips.watermark(conn, table_name) is not None:
+        trips.update_trips(conn, table_name)
+
+    # 가장 큰 rowid 행은 남겨 새 행의 rowid 가 옮긴 행과 겹치지 않게 함 (INTEGER PRIMARY KEY 재사용 방지)
+    max_rowid = conn.execute(f'SELECT MAX(rowid) FROM "{table_name}"').fetchone()[0] or 0
+    catalog = {p.name: p for p in load_catalog(conn, table_name)}
+    columns = ", ".join(f'"{row[1]}"' for row in conn.execute(f'PRAGMA table_info("{table_name}")'))
+
+    moved = {}
+    for key in _periods(conn, table_name, before, granularity):
+        name = f"{table_name}_{key}"
+        existing = catalog.get(name)
+        if existing is not None and existing.immutable:
+            print(f"   ⏭️  {name}: 불변 파티션이므로 원본 테이블에 남김 (thaw 후 다시 실행)")
+            continue
+
+        start, end = period_bounds(key, granularity)
+        start_str, end_str = start.strftime(DATETIME_FORMAT), end.strftime(DATETIME_FORMAT)
+        path = existing.path if existing is not None else os.path.relpath(
+            os.path.join(directory, f"{name}.db"), os.path.dirname(os.path.abspath(db_path))
+        )
+        file_path = resolve_path(db_path, path)
+        created = not os.path.exists(file_path)
+
+        alias = "split_target"
+        conn.execute(f"ATTACH DATABASE ? AS {alias}", [file_path])
+        try:
+            conn.execute("BEGIN")
+            try:
+                _create_partition_table(conn, alias, table_name)
+                where = "datetime >= ? AND datetime < ? AND rowid < ?"
+                params = [start_str, end_str, max_rowid]
+                # 같은 rowid 가 이미 있으면(중단 후 재실행) 건너뜀
+                count = conn.execute(f"""
+                    INSERT OR IGNORE INTO {alias}."{table_name}" (rowid, {columns})
+                    SELECT rowid, {columns} FROM main."{table_name}" WHERE {where} ORDER BY rowid
+                """, params).rowcount
+                conn.execute(f'DELETE FROM main."{table_name}" WHERE {where}', params)
+                total = conn.execute(f'SELECT COUNT(*) FROM {alias}."{table_name}"').fetchone()[0]
+                conn.execute(f"""
+                    INSERT INTO {CATALOG_TABLE}
+                        (name, source_table, path, start_datetime, end_datetime, row_count, immutable, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, 0, ?)
+                    ON CONFLICT (name) DO UPDATE SET
+                        row_count = excluded.row_count,
+                        updated_at = excluded.updated_at
+                """, [name, table_name, path, start_str,
+                      (end - timedelta(seconds=1)).strftime(DATETIME_FORMAT), total,
+                      datetime.now().strftime(DATETIME_FORMAT)])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.execute(f"DETACH DATABASE {alias}")
+
+        if created:
+            # 복사 후 인덱스를 만들어야 빠름 (원본과 같은 INDEX_DEFINITIONS)
+            part = sqlite3.connect(file_path)
+            try:
+                create_indexes(part, table_name)
+            finally:
+                part.close()
+
+        moved[key] = count
+        if progress:
+            progress(key, count)
+
+    return moved
+
+
+def freeze(db_path, conn, partition, vacuum=True):
+    """파티션을 불변으로 표시: WAL 정리/ANALYZE/VACUUM 후 파일을 읽기 전용으로 바꿈
+
+    immutable=1 로 열면 WAL 파일을 읽지 않으므로 먼저 journal_mode=DELETE 로 바꿔 둠
+    """
+    path = resolve_path(db_path, partition.path)
+    part = sqlite3.connect(path, isolation_level=None)
+    try:
+        part.execute("PRAGMA journal_mode=DELETE")
+        part.execute("ANALYZE")
+        if vacuum:
+            part.execute("VACUUM")
+    finally:
+        part.close()
+
+    mode = os.stat(path).st_mode
+    os.chmod(path, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+    conn.execute(f"UPDATE {CATALOG_TABLE} SET immutable = 1, updated_at = ? WHERE name = ?",
+                 [datetime.now().strftime(DATETIME_FORMAT), partition.name])
+
+
+def thaw(db_path, conn, partition):
+    """불변 표시 해제 (파일 쓰기 권한 복원) - 지난 기간의 늦게 들어온 행을 다시 옮길 때"""
+    path = resolve_path(db_path, partition.path)
+    os.chmod(path, os.stat(path).st_mode | stat.S_IWUSR)
+    conn.execute(f"UPDATE {CATALOG_TABLE} SET immutable = 0, updated_at = ? WHERE name = ?",
+                 [datetime.now().strftime(DATETIME_FORMAT), partition.name])
+
+
+def _select(catalog, table_name, keys):
+    """CLI 인자 (기간 키 또는 파티션 이름) -> Partition 목록"""
+    by_name = {p.name: p for p in catalog}
+    selected = []
+    for key in keys:
+        partition = by_name.get(key) or by_name.get(f"{table_name}_{key}")
+        if partition is None:
+            print(f"❌ 파티션 없음: {key}")
+            sys.exit(1)
+        selected.append(partition)
+    return selected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="항적 테이블 시간 파티션 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    split_parser = sub.add_parser("split", help="지난 기간을 파티션 파일로 옮김")
+    split_parser.add_argument("db_path", nargs="?", default=DEFAULT_DB_PATH, help="데이터베이스 경로")
+    split_parser.add_argument("--before", required=True, help="이 날짜 이전에 끝나는 기간만 옮김 (YYYY-MM-DD)")
+    split_parser.add_argument("--granularity", choices=tuple(GRANULARITIES), default="month", help="파티션 단위")
+    split_parser.add_argument("--dir", help="파티션 파일 폴더 (기본: <DB 이름>_partitions)")
+    split_parser.add_argument("--freeze", action="store_true", help="옮긴 파티션을 바로 불변으로 표시")
+    split_parser.add_argument("--vacuum", action="store_true", help="옮긴 후 원본 DB VACUUM (빈 공간 반환)")
+
+    freeze_parser = sub.add_parser("freeze", help="파티션을 불변(읽기 전용)으로 표시")
+    freeze_parser.add_argument("db_path", nargs="?", default=DEFAULT_DB_PATH, help="데이터베이스 경로")
+    freeze_parser.add_argument("partitions", nargs="*", help="기간 키 또는 파티션 이름")
+    freeze_parser.add_argument("--all", action="store_true", help="모든 파티션")
+    freeze_parser.add_argument("--no-vacuum", action="store_true", help="파티션 VACUUM 생략")
+
+    thaw_parser = sub.add_parser("thaw", help="불변 표시 해제")
+    thaw_parser.add_argument("db_path", nargs="?", default=DEFAULT_DB_PATH, help="데이터베이스 경로")
+    thaw_parser.add_argument("partitions", nargs="+", help="기간 키 또는 파티션 이름")
+
+    list_parser = sub.add_parser("list", help="파티션 목록")
+    list_parser.add_argument("db_path", nargs="?", default=DEFAULT_DB_PATH, help="데이터베이스 경로")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        print(f"❌ 파일 없음: {args.db_path}")
+        sys.exit(1)
+
+    conn = sqlite3.connect(args.db_path, timeout=60, isolation_level=None)
+    try:
+        table_name = find_trajectory_table(conn)
+        if table_name is None:
+            print("❌ 테이블이 없습니다!")
+            sys.exit(1)
+        print(f"📋 항적 테이블: {table_name}")
+
+        if args.command == "split":
+            conn.execute("PRAGMA journal_mode=WAL")
+            before = datetime.strptime(args.before, "%Y-%m-%d")
+
+            def progress(key, count):
+                print(f"   - {key}: {count:,}행")
+
+            started = time.perf_counter()
+            moved = split(conn, args.db_path, table_name, before, args.granularity, args.dir, progress)
+            print(f"✅ 파티션 {len(moved)}개, {sum(moved.values()):,}행 이동 "
+                  f"({time.perf_counter() - started:.1f}초)")
+
+            if args.freeze:
+                catalog = {p.name: p for p in load_catalog(conn, table_name)}
+                for key in moved:
+                    freeze(args.db_path, conn, catalog[f"{table_name}_{key}"])
+                print(f"🔒 불변 표시: {len(moved)}개")
+            if args.vacuum:
+                started = time.perf_counter()
+                conn.execute("VACUUM")
+                print(f"🧹 원본 DB VACUUM ({time.perf_counter() - started:.1f}초)")
+            conn.execute("PRAGMA optimize")
+
+        elif args.command == "freeze":
+            catalog = load_catalog(conn, table_name)
+            targets = [p for p in catalog if not p.immutable] if args.all else \
+                _select(catalog, table_name, args.partitions)
+            for partition in targets:
+                freeze(args.db_path, conn, partition, vacuum=not args.no_vacuum)
+                print(f"🔒 {partition.name}")
+
+        elif args.command == "thaw":
+            for partition in _select(load_catalog(conn, table_name), table_name, args.partitions):
+                thaw(args.db_path, conn, partition)
+                print(f"🔓 {partition.name}")
+
+        else:
+            catalog = load_catalog(conn, table_name)
+            if not catalog:
+                print("파티션 없음")
+            for p in catalog:
+                mark = "🔒" if p.immutable else "  "
+                print(f"{mark} {p.name:28s} {p.start_datetime[:10]} ~ {p.end_datetime[:10]} "
+                      f"{p.row_count:>12,}행  {p.path}")
+            remaining = conn.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0]
+            print(f"   원본 테이블: {remaining:,}행")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+항적 조회 SQL 생성기
+샘플링, MMSI 0 제외, 좌표 범위 검사를 SQLite 안에서 처리해
+실제로 반환할 행만 데이터베이스 밖으로 나오도록 함
+"""
+
+import copy
+import math
+
+# DB의 lat/lon 은 실수 좌표 x 1e7 정수로 저장됨
+COORD_SCALE = 10000000
+
+# 유효 좌표 범위 (위도 30-45, 경도 120-135)
+DEFAULT_BOUNDS = (30.0, 45.0, 120.0, 135.0)
+
+
+def time_range(start_date, end_date, start_hour=0, end_hour=23):
+    """날짜/시간 조건을 datetime 문자열 범위로 변환"""
+    return (f"{start_date} {start_hour:02d}:00:00",
+            f"{end_date} {end_hour:02d}:59:59")
+
+
+def scaled_bounds(bounds):
+    """실수 좌표 범위를 정수 저장 단위로 변환 (lat_min, lat_max, lon_min, lon_max)"""
+    lat_min, lat_max, lon_min, lon_max = bounds
+    # 정수 컬럼과 비교하므로 하한은 올림, 상한은 내림해도 결과가 같음
+    return (
+        math.ceil(lat_min * COORD_SCALE),
+        math.floor(lat_max * COORD_SCALE),
+        math.ceil(lon_min * COORD_SCALE),
+        math.floor(lon_max * COORD_SCALE),
+    )
+
+
+class TrajectoryQuery:
+    """항적 조회 쿼리 빌더
+
+    Args:
+        table_name: 항적 테이블 이름
+        start_datetime, end_datetime: 조회 기간 ('YYYY-MM-DD HH:MM:SS')
+        mmsi_list: 조회할 MMSI 목록 (None 이면 전체)
+        status_list: API 상태값 목록 (1=조업, 2=비조업), DB에는 1씩 뺀 값으로 저장됨
+        sampling_step: MMSI별 N개 중 1개만 반환 (1 이면 전체)
+        bounds: 유효 좌표 범위 (lat_min, lat_max, lon_min, lon_max), None 이면 검사하지 않음
+        extra_columns: 추가로 조회할 컬럼 (예: sog, cog, heading)
+        polygon: in_polygon() SQL 함수에 넘길 다각형 문자열 (spatial_index.polygon_param)
+        ranges: 공간 인덱스로 찾은 [(MMSI, 시작, 끝)] 구간, 지정하면 이 구간의 행만 읽음
+            (샘플링 시에는 순번이 인덱스 없는 조회와 같도록 구간 선박의 전체 기간 행을 읽음, scan_ranges)
+    """
+
+    def __init__(self, table_name, start_datetime, end_datetime, mmsi_list=None,
+                 status_list=None, sampling_step=1, bounds=DEFAULT_BOUNDS,
+                 extra_columns=(), polygon=None, ranges=None):
+        self.table_name = table_name
+        self.start_datetime = start_datetime
+        self.end_datetime = end_datetime
+        self.mmsi_list = mmsi_list
+        self.status_list = status_list
+        self.sampling_step = max(int(sampling_step or 1), 1)
+        self.bounds = bounds
+        self.extra_columns = tuple(extra_columns)
+        self.polygon = polygon
+        self.ranges = ranges
+
+    @classmethod
+    def from_request(cls, table_name, request, **kwargs):
+        """DataRequest 로부터 빌더 생성"""
+        start_datetime, end_datetime = time_range(
+            request.start_date, request.end_date, request.start_hour, request.end_hour
+        )
+        options = {
+            "mmsi_list": request.mmsi_list,
+            "status_list": request.status_list,
+            "sampling_step": request.sampling_step,
+        }
+        options.update(kwargs)
+        return cls(table_name, start_datetime, end_datetime, **options)
+
+    @property
+    def columns(self):
+        """조회 컬럼 (원본 정수 좌표)"""
+        return ("mmsi", "datetime", "lat", "lon", "status") + self.extra_columns
+
+    def _base_filter(self):
+        """샘플링 전에 적용되는 조건 (기간, MMSI, 상태)"""
+        clauses = ["datetime >= ? AND datetime <= ?"]
+        params = [self.start_datetime, self.end_datetime]
+
+        if self.mmsi_list:
+            placeholders = ','.join(['?'] * len(self.mmsi_list))
+            clauses.append(f"mmsi IN ({placeholders})")
+            params.extend(self.mmsi_list)
+
+        # MMSI 0 은 별도 파티션이므로 샘플링 순번에 영향 없이 먼저 제외 가능
+        clauses.append("mmsi != 0")
+
+        if self.status_list:
+            # Status 필터 (값에서 1씩 빼서 0-based로 변환)
+            status_values = [s - 1 for s in self.status_list]
+            placeholders = ','.join(['?'] * len(status_values))
+            clauses.append(f"status IN ({placeholders})")
+            params.extend(status_values)
+
+        return clauses, params
+
+    def _bounds_filter(self):
+        """정수 좌표 컬럼에 대한 범위/다각형 조건"""
+        clauses, params = [], []
+        if self.bounds is not None:
+            lat_min, lat_max, lon_min, lon_max = scaled_bounds(self.bounds)
+            clauses += ["lat >= ? AND lat <= ?", "lon >= ? AND lon <= ?"]
+            params += [lat_min, lat_max, lon_min, lon_max]
+        if self.polygon is not None:
+            clauses.append("in_polygon(lat, lon, ?)")
+            params.append(self.polygon)
+        return clauses, params
+
+    def _source(self, row_id=False):
+        """(WITH 절, FROM 대상, 파라미터) - ranges 가 있으면 구간별 (mmsi, datetime) 인덱스 탐색
+
+        row_id=True 이면 rowid 를 row_id 컬럼으로 노출 (키셋 페이지네이션용)
+        읽을 구간은 scan_ranges() 기준
+        """
+        columns = "rowid AS row_id, *" if row_id else "*"
+        if self.ranges is None:
+            if row_id:
+                return "", f"(SELECT {columns} FROM {self.table_name})", []
+            return "", self.table_name, []
+        if not self.ranges:
+            return "", f"(SELECT {columns} FROM {self.table_name} WHERE 0)", []
+
+        ranges = self.scan_ranges()
+        values = ", ".join(["(?, ?, ?)"] * len(ranges))
+        params = [value for r in ranges for value in r]
+        with_clause = f"WITH spatial_ranges (mmsi, start_datetime, end_datetime) AS (VALUES {values})"
+        source = f"""(
+                SELECT {"t.rowid AS row_id, " if row_id else ""}t.* FROM spatial_ranges r
+                JOIN {self.table_name} t
+                  ON t.mmsi = r.mmsi
+                 AND t.datetime >= r.start_datetime AND t.datetime <= r.end_datetime
+            )"""
+        return with_clause, source, params
+
+    def scan_ranges(self):
+        """공간 인덱스 구간이 있을 때 실제로 읽을 [(MMSI, 시작, 끝)] (없으면 None)
+
+        샘플링 순번은 구간 밖 행도 세어야 하므로 sampling_step > 1 이면 구간 선박별 조회 기간 전체
+        (좌표 검사는 샘플링 후에 적용됨). SQL(_source)과 hot_store 가 모두 이 구간을 읽음
+        """
+        if self.ranges is None:
+            return None
+        if self.sampling_step > 1:
+            return [(mmsi, self.start_datetime, self.end_datetime)
+                    for mmsi in sorted({r[0] for r in self.ranges})]
+        return list(self.ranges)
+
+    def build(self):
+        """(SQL, 파라미터) 반환, 좌표는 실수로 변환되어 반환됨"""
+        with_clause, source, params = self._source()
+        base_clauses, base_params = self._base_filter()
+        bounds_clauses, bounds_params = self._bounds_filter()
+        params = params + base_params
+
+        output = ", ".join(
+            f"{c} / {COORD_SCALE}.0 AS {c}" if c in ("lat", "lon") else c
+            for c in self.columns
+        )
+        inner_columns = ", ".join(self.columns)
+
+        if self.sampling_step == 1:
+            # 샘플링이 없으면 윈도 함수 없이 단일 조건으로 처리
+            where = " AND ".join(base_clauses + bounds_clauses)
+            query = f"""{with_clause}
+                SELECT {output}
+                FROM {source}
+                WHERE {where}
+                ORDER BY mmsi, datetime
+            """
+            return query, params + bounds_params
+
+        # 샘플링 순번은 좌표 검사 전 행 기준으로 매김 (기존 동작 유지)
+        where = " AND ".join(base_clauses)
+        outer = " AND ".join(["(rn - 1) % ? = 0"] + bounds_clauses)
+        query = f"""{with_clause}
+            SELECT {output}
+            FROM (
+                SELECT {inner_columns},
+                       ROW_NUMBER() OVER (PARTITION BY mmsi ORDER BY datetime) as rn
+                FROM {source}
+                WHERE {where}
+            )
+            WHERE {outer}
+            ORDER BY mmsi, datetime
+        """
+        return query, params + [self.sampling_step] + bounds_params
+
+    def for_vessel(self, mmsi):
+        """같은 조건으로 한 선박만 조회하는 빌더 (공간 인덱스 구간도 해당 선박만)"""
+        vessel = copy.copy(self)
+        vessel.mmsi_list = [mmsi]
+        if self.ranges is not None:
+            vessel.ranges = [r for r in self.ranges if r[0] == mmsi]
+        return vessel
+
+    def build_next_vessel(self, after=None):
+        """MMSI 순서상 after 다음 선박 중 조건에 맞는 행이 있는 선박 쿼리
+
+        (mmsi, datetime) 인덱스를 MMSI 순서로 탐색하면서 기간/상태/좌표 조건을 함께 검사하므로
+        조건에 맞는 행이 없는 선박은 건너뜀. 샘플링 후 좌표 검사로 행이 모두 빠지는 선박은
+        남을 수 있지만 그 선박의 페이지 조회는 빈 결과라 결과에는 영향 없음
+        """
+        clauses, params = self._base_filter()
+        bounds_clauses, bounds_params = self._bounds_filter()
+        clauses += bounds_clauses
+        params += bounds_params
+        if after is not None:
+            clauses.append("mmsi > ?")
+            params.append(after)
+        query = f"""
+            SELECT mmsi FROM {self.table_name}
+            WHERE {" AND ".join(clauses)}
+            ORDER BY mmsi
+            LIMIT 1
+        """
+        return query, params
+
+    def build_page(self, after=None, limit=None):
+        """한 선박(for_vessel) 조회를 (datetime, rowid) 순서로 이어 읽는 쿼리
+
+        Args:
+            after: 이전 페이지 마지막 행의 (datetime, rowid), None 이면 처음부터
+            limit: 최대 행 수
+
+        결과 컬럼은 columns + row_id. 샘플링 순번은 after 다음 행부터 다시 매기지만
+        after 행은 샘플링으로 선택된 행이므로 순번을 1 밀면 전체 조회와 같은 행이 선택됨
+        """
+        with_clause, source, params = self._source(row_id=True)
+        base_clauses, base_params = self._base_filter()
+        bounds_clauses, bounds_params = self._bounds_filter()
+        params = params + base_params
+        if after is not None:
+            # (mmsi=?, datetime>?) 인덱스 범위 탐색
+            base_clauses.append("(datetime, row_id) > (?, ?)")
+            params.extend(after)
+
+        output = ", ".join(
+            f"{c} / {COORD_SCALE}.0 AS {c}" if c in ("lat", "lon") else c
+            for c in self.columns
+        )
+        inner_columns = ", ".join(self.columns)
+        limit_clause = "" if limit is None else "LIMIT ?"
+        limit_params = [] if limit is None else [limit]
+
+        if self.sampling_step == 1:
+            where = " AND ".join(base_clauses + bounds_clauses)
+            query = f"""{with_clause}
+                SELECT {output}, row_id
+                FROM {source}
+                WHERE {where}
+                ORDER BY datetime, row_id
+                {limit_clause}
+            """
+            return query, params + bounds_params + limit_params
+
+        where = " AND ".join(base_clauses)
+        outer = " AND ".join(["(rn - 1 + ?) % ? = 0"] + bounds_clauses)
+        query = f"""{with_clause}
+            SELECT {output}, row_id
+            FROM (
+                SELECT {inner_columns}, row_id,
+                       ROW_NUMBER() OVER (ORDER BY datetime, row_id) as rn
+                FROM {source}
+                WHERE {where}
+            )
+            WHERE {outer}
+            ORDER BY datetime, row_id
+            {limit_clause}
+        """
+        offset = 0 if after is None else 1
+        return query, params + [offset, self.sampling_step] + bounds_params + limit_params
+
+    def build_positions(self):
+        """집계용 (lat, lon, status) 쿼리 - 정수 좌표 그대로, 정렬 없음"""
+        if self.sampling_step != 1:
+            raise ValueError("build_positions 는 샘플링 없이 사용")
+        with_clause, source, params = self._source()
+        base_clauses, base_params = self._base_filter()
+        bounds_clauses, bounds_params = self._bounds_filter()
+        where = " AND ".join(base_clauses + bounds_clauses)
+        query = f"""{with_clause}
+            SELECT lat, lon, status
+            FROM {source}
+            WHERE {where}
+        """
+        return query, params + base_params + bounds_params
+
+    def build_stats(self):
+        """같은 조건(기간/영역)의 통계 쿼리 - stats_query 와 같은 컬럼
+
+        영역 통계는 유효 좌표 범위 안의 MMSI 0 이 아닌 행만 집계
+        """
+        with_clause, source, params = self._source()
+        base_clauses, base_params = self._base_filter()
+        bounds_clauses, bounds_params = self._bounds_filter()
+        where = " AND ".join(base_clauses + bounds_clauses)
+        query = f"""{with_clause}
+            SELECT
+                COUNT(*) as total_count,
+                COUNT(DISTINCT mmsi) as unique_vessels,
+                SUM(CASE WHEN status = 1 THEN 1 ELSE 0 END) as fishing_count,
+                SUM(CASE WHEN status = 2 THEN 1 ELSE 0 END) as non_fishing_count,
+                MIN(datetime) as min_datetime,
+                MAX(datetime) as max_datetime
+            FROM {source}
+            WHERE {where}
+        """
+        return query, params + base_params + bounds_params
+
+
+def mmsi_count_query(table_name, start_datetime, end_datetime, limit):
+    """기간 내 MMSI별 레코드 수 쿼리"""
+    query = f"""
+        SELECT mmsi, COUNT(*) as count
+        FROM {table_name}
+        WHERE datetime >= ? AND datetime <= ?
+          AND mmsi != 0
+        GROUP BY mmsi
+        ORDER BY count DESC
+        LIMIT ?
+    """
+    return query, [start_datetime, end_datetime, limit]
+
+
+def stats_query(table_name, start_datetime, end_datetime):
+    """기간 내 통계 쿼리"""
+    query = f"""
+        SELECT
+            COUNT(*) as total_count,
+            COUNT(DISTINCT mmsi) as unique_vessels,
+            SUM(CASE WHEN status = 1 THEN 1 ELSE 0 END) as fishing_count,
+            SUM(CASE WHEN status = 2 THEN 1 ELSE 0 END) as non_fishing_count,
+            MIN(datetime) as min_datetime,
+            MAX(datetime) as max_datetime
+        FROM {table_name}
+        WHERE datetime >= ? AND datetime <= ?
+    """
+    return query, [start_datetime, end_datetime]
@@ -0,0 +1,180 @@
+"""
+조회 작업 실행기
+async 라우트 안에서 sqlite3/pandas 작업을 바로 실행하면 이벤트 루프가 멈추므로
+전용 스레드 풀에서 실행하고 결과를 기다림
+- 동시 실행 수와 대기열 길이 제한 (초과 시 503)
+- 요청별 제한 시간 초과 시 작업 스레드의 SQLite 연결을 conn.interrupt() 로 중단 (504)
+- 클라이언트 연결이 끊기면 같은 방식으로 중단
+
+SQLite 연결은 프로세스 밖에서 중단할 수 없으므로 프로세스 풀 대신 스레드 풀을 사용
+(sqlite3 는 쿼리 실행 중 GIL 을 놓기 때문에 스레드로도 병렬 실행됨)
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, Request
+
+
+class QueryTimeout(Exception):
+    """제한 시간 초과"""
+
+
+class QueryCancelled(Exception):
+    """클라이언트 연결 종료로 취소"""
+
+
+class ExecutorBusy(Exception):
+    """대기열이 가득 참"""
+
+
+class _Job:
+    """실행 중인 작업의 스레드 정보 (중단 대상 확인용)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread_id = None
+        self.cancelled = False
+
+
+class QueryExecutor:
+    """sqlite3 작업 전용 스레드 풀
+
+    Args:
+        pool: ConnectionPool (작업 스레드의 연결 중단에 사용)
+        max_workers: 동시에 실행할 작업 수
+        max_pending: 실행을 기다릴 수 있는 작업 수
+        timeout: 기본 제한 시간 (초), None 이면 제한 없음
+        poll_interval: 완료/연결 종료 확인 간격 (초)
+    """
+
+    def __init__(self, pool, max_workers=4, max_pending=32, timeout=120.0, poll_interval=0.25):
+        self.pool = pool
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="query")
+        self._lock = threading.Lock()
+        self._active = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def _interrupt(self, job):
+        """작업이 아직 실행 중이면 해당 스레드의 SQLite 쿼리 중단"""
+        with job.lock:
+            job.cancelled = True
+            if job.thread_id is not None:
+                self.pool.interrupt(job.thread_id)
+
+    async def run(self, func, *args, timeout=None, request=None, **kwargs):
+        """func(*args, **kwargs) 를 작업 스레드에서 실행하고 결과 반환
+
+        Args:
+            timeout: 제한 시간 (초), None 이면 기본값
+            request: 연결 종료를 확인할 starlette Request
+        """
+        with self._lock:
+            if self._active >= self.max_workers + self.max_pending:
+                self.rejected += 1
+                raise ExecutorBusy()
+            self._active += 1
+
+        job = _Job()
+
+        def call():
+            with job.lock:
+                if job.cancelled:
+                    raise QueryCancelled()
+                job.thread_id = threading.get_ident()
+            try:
+                with self.pool.tracking():
+                    return func(*args, **kwargs)
+            finally:
+                with job.lock:
+                    job.thread_id = None
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, call)
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else loop.time() + timeout
+
+        try:
+            while True:
+                wait = self.poll_interval
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        self._interrupt(job)
+                        self.timeouts += 1
+                        raise QueryTimeout()
+                    wait = min(wait, remaining)
+
+                done, _ = await asyncio.wait({future}, timeout=wait)
+                if done:
+                    self.completed += 1
+                    return future.result()
+
+                if request is not None and await request.is_disconnected():
+                    self._interrupt(job)
+                    self.cancelled += 1
+                    raise QueryCancelled()
+        except asyncio.CancelledError:
+            self._interrupt(job)
+            raise
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def offload(self, timeout=None):
+        """동기 라우트 함수를 실행기에서 실행하는 async 라우트로 변환하는 데코레이터
+
+        라우트 시그니처에 Request 파라미터를 추가해 연결 종료를 확인하고,
+        실행기 예외를 HTTP 오류(503/504/499)로 변환
+        """
+        def decorator(func):
+            signature = inspect.signature(func)
+            request_param = inspect.Parameter(
+                "_http_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+            )
+
+            @functools.wraps(func)
+            async def endpoint(*args, _http_request, **kwargs):
+                try:
+                    # 라우트 파라미터 이름(request 등)과 겹치지 않도록 partial 로 전달
+                    return await self.run(functools.partial(func, *args, **kwargs),
+                                          timeout=timeout, request=_http_request)
+                except ExecutorBusy:
+                    raise HTTPException(status_code=503, detail="조회 요청이 많습니다. 잠시 후 다시 시도하세요")
+                except QueryTimeout:
+                    raise HTTPException(status_code=504, detail="조회 제한 시간을 초과했습니다")
+                except QueryCancelled:
+                    raise HTTPException(status_code=499, detail="클라이언트 연결이 종료되었습니다")
+
+            endpoint.__signature__ = signature.replace(
+                parameters=list(signature.parameters.values()) + [request_param]
+            )
+            return endpoint
+
+        return decorator
+
+    def stats(self):
+        """실행기 상태 (헬스 체크용)"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "completed": self.completed,
+                "timeouts": self.timeouts,
+                "cancelled": self.cancelled,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
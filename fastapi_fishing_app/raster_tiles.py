@@ -0,0 +1,298 @@
+"""
+항적 래스터 타일 (PNG) 생성 / 디스크 캐시
+벡터 타일로도 포인트가 너무 많은 저줌 개요용으로 서버에서 타일 이미지를 그려서 전송
+- 타일(+버퍼) 범위의 포인트를 NumPy 로 픽셀 좌표 변환 후 선(연속 포인트 사이 보간)과 점(원형 스탬프)을
+  픽셀별 건수로 누적하고, 상태별 색(비조업 -> 조업 순서)으로 합성
+- 선은 vector_tiles 와 같은 규칙(MMSI/상태 변경, 30분 이상 간격)에서 끊음
+- PNG 인코딩은 외부 의존성 없이 zlib 으로 직접 구현 (RGBA 8비트)
+
+디스크 캐시 (내용 주소 방식):
+    <폴더>/objects/<해시 앞 2자리>/<SHA-1>.png     타일 본문 (같은 내용은 한 파일, 예: 빈 타일)
+    <폴더>/index/<필터 해시>/filter.json            필터 조건 (적재 시 겹치는 기간 무효화용)
+    <폴더>/index/<필터 해시>/<z>/<x>/<y>            타일 본문의 SHA-1
+과거 기간 타일은 한 번 그린 뒤 파일로 응답하고, SHA-1 을 ETag 로 사용
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+from serializers import STATUS_FISHING
+from vector_tiles import EXTENT, project, segment_breaks
+
+PNG_MEDIA_TYPE = "image/png"
+TILE_SIZE = 256
+
+# 상태별 색 (지도 화면의 조업/비조업 색과 같음), 비조업을 먼저 그리고 조업을 위에 그림
+FISHING_COLOR = (0xd6, 0x27, 0x28)
+NON_FISHING_COLOR = (0x1f, 0x77, 0xb4)
+
+# 픽셀 불투명도 = ALPHA_BASE + ALPHA_GAIN * log2(건수), 최대 1
+ALPHA_BASE = 0.45
+ALPHA_GAIN = 0.12
+
+PNG_LEVEL = 6
+
+
+def point_radius_for_zoom(z):
+    """줌 레벨별 점 반지름 (픽셀)"""
+    return 0 if z <= 8 else 1 if z <= 12 else 2
+
+
+def _stamp(radius):
+    """반지름 r 원형 스탬프의 (dx, dy) 오프셋"""
+    r = np.arange(-radius, radius + 1)
+    dx, dy = np.meshgrid(r, r)
+    inside = dx ** 2 + dy ** 2 <= radius ** 2 + radius
+    return dx[inside], dy[inside]
+
+
+def _line_pixels(x, y, pairs):
+    """연속 포인트 쌍(pairs: 앞 포인트 번호) 사이를 1픽셀 간격으로 보간한 좌표와 쌍 번호"""
+    x0, y0 = x[pairs], y[pairs]
+    dx, dy = x[pairs + 1] - x0, y[pairs + 1] - y0
+    steps = np.ceil(np.maximum(np.abs(dx), np.abs(dy))).astype(np.int64) + 1
+    owner = np.repeat(np.arange(len(pairs)), steps)
+    starts = np.cumsum(steps) - steps
+    t = (np.arange(len(owner)) - starts[owner]) / np.maximum(steps[owner] - 1, 1)
+    return x0[owner] + t * dx[owner], y0[owner] + t * dy[owner], pairs[owner]
+
+
+def _counts(x, y, size=TILE_SIZE):
+    """픽셀 좌표 -> 타일 픽셀별 건수 (타일 밖은 제외)"""
+    px, py = np.floor(x).astype(np.int64), np.floor(y).astype(np.int64)
+    inside = (px >= 0) & (px < size) & (py >= 0) & (py < size)
+    return np.bincount(py[inside] * size + px[inside], minlength=size * size)
+
+
+def render_tile(mmsi, epoch, lat, lon, status, z, x, y, lines=True, size=TILE_SIZE):
+    """(mmsi, epoch) 순으로 정렬된 항적 컬럼 -> RGBA 배열 (size x size x 4)
+
+    Args:
+        epoch: epoch 초 배열 (선을 끊는 시간 간격 판단용)
+        status: DB 상태값 배열
+        lines: False 이면 점만 그림
+    """
+    premultiplied = np.zeros((size * size, 3), dtype=np.float64)
+    alpha = np.zeros(size * size, dtype=np.float64)
+    if len(mmsi):
+        ex, ey = project(lat, lon, z, x, y)
+        px, py = ex * (size / EXTENT), ey * (size / EXTENT)
+        fishing = status == STATUS_FISHING
+
+        # 점: 원형 스탬프를 모든 포인트에 적용
+        sx, sy = _stamp(point_radius_for_zoom(z))
+        point_x = (px[:, None] + sx[None, :]).ravel()
+        point_y = (py[:, None] + sy[None, :]).ravel()
+        point_owner = np.repeat(np.arange(len(px)), len(sx))
+
+        # 선: 끊지 않는 연속 포인트 쌍 사이 보간 (쌍의 상태는 앞 포인트 상태)
+        if lines and len(mmsi) > 1:
+            pairs = np.flatnonzero(~segment_breaks(mmsi, epoch, status))
+            line_x, line_y, line_owner = _line_pixels(px, py, pairs)
+        else:
+            line_x = line_y = np.empty(0)
+            line_owner = np.empty(0, dtype=np.int64)
+
+        all_x = np.concatenate((point_x, line_x))
+        all_y = np.concatenate((point_y, line_y))
+        owner_fishing = fishing[np.concatenate((point_owner, line_owner))]
+
+        for selected, color in ((~owner_fishing, NON_FISHING_COLOR), (owner_fishing, FISHING_COLOR)):
+            counts = _counts(all_x[selected], all_y[selected], size)
+            drawn = counts > 0
+            a = np.zeros(size * size)
+            a[drawn] = np.minimum(ALPHA_BASE + ALPHA_GAIN * np.log2(counts[drawn]), 1.0)
+            premultiplied = np.asarray(color, dtype=np.float64) * a[:, None] + premultiplied * (1 - a[:, None])
+            alpha = a + alpha * (1 - a)
+
+    rgba = np.zeros((size * size, 4), dtype=np.uint8)
+    drawn = alpha > 0
+    rgba[drawn, :3] = np.round(premultiplied[drawn] / alpha[drawn, None]).astype(np.uint8)
+    rgba[:, 3] = np.round(alpha * 255).astype(np.uint8)
+    return rgba.reshape(size, size, 4)
+
+
+def _png_chunk(kind, data):
+    return (struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff))
+
+
+def encode_png(rgba, level=PNG_LEVEL):
+    """RGBA uint8 배열 (높이 x 너비 x 4) -> PNG 바이트 (필터 없음)"""
+    height, width = rgba.shape[:2]
+    raw = np.zeros((height, 1 + width * 4), dtype=np.uint8)
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)),
+        _png_chunk(b"IDAT", zlib.compress(raw.tobytes(), level)),
+        _png_chunk(b"IEND", b""),
+    ))
+
+
+def encode_tile(columns, z, x, y, lines=True):
+    """(mmsi, datetime, lat, lon, status) 컬럼 -> PNG 바이트
+
+    Args:
+        columns: (mmsi, datetime, lat, lon, status) 배열/튜플, (mmsi, datetime) 순으로 정렬
+    """
+    mmsi, dt, lat, lon, status = columns
+    status = np.asarray(status)
+    if status.dtype == object:
+        # 상태가 NULL 인 포인트는 비조업 색으로
+        status = np.where(np.equal(status, None), -1, status)
+    rgba = render_tile(
+        np.asarray(mmsi, dtype=np.int64),
+        np.asarray(dt, dtype="datetime64[s]").astype(np.int64),
+        np.asarray(lat, dtype=np.float64),
+        np.asarray(lon, dtype=np.float64),
+        status.astype(np.int64),
+        z, x, y, lines=lines,
+    )
+    return encode_png(rgba)
+
+
+def rows_to_columns(rows):
+    """커서 행 목록 -> 컬럼 튜플"""
+    if not rows:
+        return ((), (), (), (), ())
+    return tuple(zip(*rows))
+
+
+def default_directory(db_path):
+    """DB 경로 -> 기본 디스크 캐시 폴더 (<DB 이름>_tiles)"""
+    return os.path.splitext(os.path.abspath(db_path))[0] + "_tiles"
+
+
+def _write_atomic(path, data):
+    """임시 파일에 쓴 뒤 이름 변경 (동시에 읽는 요청이 반쯤 쓴 파일을 보지 않도록)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class TileDiskCache:
+    """내용 주소 방식 타일 디스크 캐시 (필터 해시 + 타일 좌표 -> 본문 SHA-1 -> 파일)
+
+    Args:
+        directory: 캐시 폴더 (없으면 처음 저장할 때 생성)
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def _index_path(self, filter_hash, z, x, y):
+        return os.path.join(self.directory, "index", filter_hash, str(z), str(x), str(y))
+
+    def object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], digest + ".png")
+
+    def get(self, filter_hash, z, x, y):
+        """캐시된 타일 본문의 SHA-1 (없으면 None)"""
+        try:
+            with open(self._index_path(filter_hash, z, x, y), encoding="ascii") as f:
+                digest = f.read().strip()
+        except FileNotFoundError:
+            digest = None
+        if digest is not None and not os.path.exists(self.object_path(digest)):
+            digest = None
+        with self._lock:
+            if digest is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return digest
+
+    def read(self, digest):
+        with open(self.object_path(digest), "rb") as f:
+            return f.read()
+
+    def put(self, filter_hash, z, x, y, body, filters=None):
+        """타일 저장 후 SHA-1 반환
+
+        Args:
+            filters: 필터 조건 dict (start_datetime/end_datetime 포함, 처음 저장할 때 filter.json 으로 기록)
+        """
+        digest = hashlib.sha1(body).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            _write_atomic(path, body)
+        if filters is not None:
+            meta = os.path.join(self.directory, "index", filter_hash, "filter.json")
+            if not os.path.exists(meta):
+                _write_atomic(meta, json.dumps(filters, ensure_ascii=False, default=str).encode("utf-8"))
+        _write_atomic(self._index_path(filter_hash, z, x, y), digest.encode("ascii"))
+        with self._lock:
+            self.writes += 1
+        return digest
+
+    def invalidate(self, start_datetime, end_datetime):
+        """기간 [start, end] 와 겹치는 필터의 타일 색인 삭제 후 참조가 없는 본문 정리
+
+        Returns:
+            삭제한 필터 수
+        """
+        index = os.path.join(self.directory, "index")
+        if not os.path.isdir(index):
+            return 0
+        removed = 0
+        for name in os.listdir(index):
+            try:
+                with open(os.path.join(index, name, "filter.json"), encoding="utf-8") as f:
+                    filters = json.load(f)
+                overlaps = (filters["start_datetime"] <= end_datetime
+                            and filters["end_datetime"] >= start_datetime)
+            except (OSError, ValueError, KeyError):
+                overlaps = True
+            if overlaps:
+                shutil.rmtree(os.path.join(index, name), ignore_errors=True)
+                removed += 1
+        if removed:
+            self.prune()
+        return removed
+
+    def prune(self):
+        """색인에서 참조하지 않는 본문 파일 삭제
+
+        Returns:
+            삭제한 파일 수
+        """
+        referenced = set()
+        for root, _, files in os.walk(os.path.join(self.directory, "index")):
+            for name in files:
+                if name == "filter.json" or name.endswith(".tmp"):
+                    continue
+                try:
+                    with open(os.path.join(root, name), encoding="ascii") as f:
+                        referenced.add(f.read().strip())
+                except OSError:
+                    pass
+        deleted = 0
+        for root, _, files in os.walk(os.path.join(self.directory, "objects")):
+            for name in files:
+                if name.endswith(".png") and name[:-4] not in referenced:
+                    try:
+                        os.remove(os.path.join(root, name))
+                        deleted += 1
+                    except OSError:
+                        pass
+        return deleted
+
+    def stats(self):
+        """헬스 체크용 상태"""
+        with self._lock:
+            return {"directory": self.directory, "hits": self.hits,
+                    "misses": self.misses, "writes": self.writes}
@@ -0,0 +1,138 @@
+"""
+조회 결과 캐시
+같은 기간/MMSI/상태 조건의 반복 조회를 DB 재실행 없이 응답
+- 키: 요청 파라미터를 정규화(목록 정렬, 기간 문자열 변환)한 JSON 의 해시
+- 총 바이트 수 기준 LRU 제거
+- DB 버전(파일 서명)이 바뀌면 전체 무효화
+- 조회 시작 전에 읽은 버전을 put 에 넘기면, 조회 중 DB 가 바뀐 경우 저장하지 않음
+- 적중/실패/제거/무효화 횟수 집계
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+# put(version=...) 을 지정하지 않았음을 나타내는 값 (버전 함수가 None 을 반환할 수 있으므로 별도 값 사용)
+_UNSET = object()
+
+
+def normalize_list(values, cast=str):
+    """목록 파라미터 정규화 (중복 제거 후 정렬, 비어 있으면 None)"""
+    if not values:
+        return None
+    return sorted({cast(v) for v in values})
+
+
+def make_key(name, **params):
+    """엔드포인트 이름 + 파라미터 -> 캐시 키 (파라미터 순서와 무관)"""
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return name + ":" + hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def estimate_size(value):
+    """캐시 항목 크기 (바이트), bytes 가 아니면 JSON 직렬화 길이로 추정"""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+class ResultCache:
+    """바이트 수 제한 LRU 캐시 + DB 버전 기반 무효화
+
+    Args:
+        max_bytes: 캐시 최대 크기 (바이트)
+        version: 현재 DB 버전을 반환하는 함수 (예: ConnectionPool.file_signature)
+        max_item_bytes: 이보다 큰 항목은 저장하지 않음 (기본값: max_bytes 의 1/4)
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, version=None, max_item_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes or max_bytes // 4
+        self.version = version
+
+        self._items = OrderedDict()     # key -> (value, size)
+        self._size = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def current_version(self):
+        """현재 DB 버전 (조회 전에 읽어 put(version=...) 에 전달)"""
+        if self.version is None:
+            return None
+        try:
+            return self.version()
+        except OSError:
+            return None
+
+    def _check_version(self):
+        """DB 버전이 바뀌었으면 전체 무효화 (lock 보유 상태에서 호출)"""
+        if self.version is None:
+            return
+        current = self.current_version()
+        if current != self._version:
+            if self._items:
+                self.invalidations += 1
+            self._items.clear()
+            self._size = 0
+            self._version = current
+
+    def get(self, key):
+        """캐시 값 (없으면 None)"""
+        with self._lock:
+            self._check_version()
+            entry = self._items.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, size=None, version=_UNSET):
+        """값 저장 후 최대 크기를 넘으면 오래된 항목부터 제거
+
+        Args:
+            version: 조회를 시작할 때의 DB 버전 (current_version), 현재 버전과 다르면 저장하지 않음
+        """
+        size = estimate_size(value) if size is None else size
+        if size > self.max_item_bytes:
+            return
+        with self._lock:
+            self._check_version()
+            if version is not _UNSET and self.version is not None and version != self._version:
+                # 조회 중 DB 가 바뀜 - 이전 버전의 결과를 새 버전 값으로 저장하지 않음
+                return
+            if key in self._items:
+                self._size -= self._items.pop(key)[1]
+            self._items[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes and self._items:
+                _, (_, old_size) = self._items.popitem(last=False)
+                self._size -= old_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+    def stats(self):
+        """캐시 상태 (헬스 체크용)"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._items),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
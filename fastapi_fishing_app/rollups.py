@@ -0,0 +1,272 @@
+"""
+시간 단위 집계(rollup) 테이블
+/api/stats, /api/mmsi, /api/download/mmsi 가 원본 테이블 대신 시간/MMSI/상태별 건수로 응답하도록 함
+- traj_rollup_hourly: (시간, MMSI, 상태)별 건수와 최소/최대 시각
+- traj_rollup_state : 원본 테이블별로 집계가 끝난 마지막 rowid (증분 갱신 기준)
+
+원본 테이블은 추가(append)만 된다고 가정하며, 수정/삭제가 있었다면 --rebuild 로 다시 만들어야 함
+조회 시 집계 이후 추가된 행(rowid > 마지막 rowid)과 일부만 포함된 경계 시간은 원본에서 직접 계산
+
+사용법:
+    python rollups.py [DB 경로] [--rebuild] [--batch 5000000]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+from migrate_db import DEFAULT_DB_PATH, find_trajectory_table
+
+ROLLUP_TABLE = "traj_rollup_hourly"
+STATE_TABLE = "traj_rollup_state"
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+HOUR_FORMAT = "%Y-%m-%d %H"
+
+# 증분 갱신 시 한 트랜잭션에서 처리할 rowid 범위
+DEFAULT_BATCH_ROWS = 5000000
+
+
+def ensure_tables(conn):
+    """집계 테이블 생성"""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+            hour TEXT NOT NULL,
+            mmsi INTEGER NOT NULL,
+            status INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            min_datetime TEXT,
+            max_datetime TEXT,
+            PRIMARY KEY (hour, mmsi, status)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            source_table TEXT PRIMARY KEY,
+            last_rowid INTEGER NOT NULL,
+            updated_at TEXT
+        )
+    """)
+    conn.commit()
+
+
+def watermark(conn, table_name):
+    """집계가 끝난 마지막 rowid (집계 테이블이 없으면 None)"""
+    try:
+        row = conn.execute(
+            f"SELECT last_rowid FROM {STATE_TABLE} WHERE source_table = ?", [table_name]
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def update_rollups(conn, table_name, batch_rows=DEFAULT_BATCH_ROWS, progress=None):
+    """마지막 rowid 이후 추가된 행을 집계 테이블에 반영
+
+    Args:
+        conn: 쓰기 가능한 연결
+        table_name: 원본 항적 테이블
+        batch_rows: 한 트랜잭션에서 처리할 rowid 범위
+        progress: (처리한 rowid, 마지막 rowid) 를 받는 콜백
+
+    Returns:
+        반영한 rowid 범위 크기
+    """
+    ensure_tables(conn)
+
+    start = last = watermark(conn, table_name) or 0
+    max_rowid = conn.execute(f"SELECT MAX(rowid) FROM {table_name}").fetchone()[0] or 0
+
+    while last < max_rowid:
+        upper = min(last + batch_rows, max_rowid)
+        with conn:
+            conn.execute(f"""
+                INSERT INTO {ROLLUP_TABLE} (hour, mmsi, status, count, min_datetime, max_datetime)
+                SELECT substr(datetime, 1, 13), mmsi, status, COUNT(*), MIN(datetime), MAX(datetime)
+                FROM {table_name}
+                WHERE rowid > ? AND rowid <= ?
+                GROUP BY 1, 2, 3
+                ON CONFLICT (hour, mmsi, status) DO UPDATE SET
+                    count = count + excluded.count,
+                    min_datetime = MIN(min_datetime, excluded.min_datetime),
+                    max_datetime = MAX(max_datetime, excluded.max_datetime)
+            """, [last, upper])
+            conn.execute(f"""
+                INSERT INTO {STATE_TABLE} (source_table, last_rowid, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT (source_table) DO UPDATE SET
+                    last_rowid = excluded.last_rowid,
+                    updated_at = excluded.updated_at
+            """, [table_name, upper, datetime.now().strftime(DATETIME_FORMAT)])
+        last = upper
+        if progress:
+            progress(last, max_rowid)
+
+    if watermark(conn, table_name) is None:
+        # 빈 테이블도 집계 완료 상태로 기록
+        with conn:
+            conn.execute(f"INSERT INTO {STATE_TABLE} VALUES (?, ?, ?)",
+                         [table_name, last, datetime.now().strftime(DATETIME_FORMAT)])
+
+    return last - start
+
+
+def rebuild_rollups(conn, table_name, batch_rows=DEFAULT_BATCH_ROWS, progress=None):
+    """집계 테이블을 비우고 처음부터 다시 생성"""
+    ensure_tables(conn)
+    with conn:
+        conn.execute(f"DELETE FROM {ROLLUP_TABLE}")
+        conn.execute(f"DELETE FROM {STATE_TABLE} WHERE source_table = ?", [table_name])
+    return update_rollups(conn, table_name, batch_rows, progress)
+
+
+def split_range(start_datetime, end_datetime):
+    """기간을 집계로 답할 완전한 시간 구간과 원본에서 읽을 경계 구간으로 분할
+
+    Returns:
+        (첫 시간 키, 마지막 시간 키, [(경계 시작, 경계 끝), ...])
+        완전한 시간이 없으면 시간 키는 None 이고 전체 기간이 경계 구간
+    """
+    start = datetime.strptime(start_datetime, DATETIME_FORMAT)
+    end = datetime.strptime(end_datetime, DATETIME_FORMAT)
+
+    first = start.replace(minute=0, second=0)
+    if first < start:
+        first += timedelta(hours=1)
+    last = end.replace(minute=0, second=0)
+    if end < last + timedelta(minutes=59, seconds=59):
+        last -= timedelta(hours=1)
+
+    if first > last:
+        return None, None, [(start_datetime, end_datetime)]
+
+    edges = []
+    if start < first:
+        edges.append((start_datetime, (first - timedelta(seconds=1)).strftime(DATETIME_FORMAT)))
+    last_end = last + timedelta(minutes=59, seconds=59)
+    if last_end < end:
+        edges.append(((last_end + timedelta(seconds=1)).strftime(DATETIME_FORMAT), end_datetime))
+
+    return first.strftime(HOUR_FORMAT), last.strftime(HOUR_FORMAT), edges
+
+
+def _sources(table_name, start_datetime, end_datetime, last_rowid, raw_columns, rollup_columns,
+             rollup_filter="", raw_filter=""):
+    """집계 테이블 + 원본(경계 시간, 미집계 행) UNION ALL 서브쿼리"""
+    first_hour, last_hour, edges = split_range(start_datetime, end_datetime)
+
+    parts = []
+    params = []
+
+    def add_raw(where, where_params):
+        parts.append(f"""
+            SELECT {raw_columns}
+            FROM {table_name}
+            WHERE {where} {raw_filter}
+        """)
+        params.extend(where_params)
+
+    if first_hour is None:
+        add_raw("datetime >= ? AND datetime <= ?", [start_datetime, end_datetime])
+        return " UNION ALL ".join(parts), params
+
+    parts.append(f"""
+        SELECT {rollup_columns}
+        FROM {ROLLUP_TABLE}
+        WHERE hour >= ? AND hour <= ? {rollup_filter}
+    """)
+    params.extend([first_hour, last_hour])
+
+    # 일부만 포함된 경계 시간은 원본에서 계산
+    for edge_start, edge_end in edges:
+        add_raw("datetime >= ? AND datetime <= ?", [edge_start, edge_end])
+
+    # 완전한 시간 중 아직 집계되지 않은 행: rowid 범위로 찾음
+    # (+datetime 으로 datetime 인덱스 대신 rowid 범위 탐색을 사용하도록 함)
+    add_raw("rowid > ? AND +datetime >= ? AND +datetime <= ?",
+            [last_rowid, f"{first_hour}:00:00", f"{last_hour}:59:59"])
+
+    return " UNION ALL ".join(parts), params
+
+
+def mmsi_count_query(table_name, start_datetime, end_datetime, limit, last_rowid):
+    """집계 테이블을 사용하는 기간 내 MMSI별 레코드 수 쿼리"""
+    source, params = _sources(
+        table_name, start_datetime, end_datetime, last_rowid,
+        raw_columns="mmsi, 1 AS count",
+        rollup_columns="mmsi, count",
+        rollup_filter="AND mmsi != 0",
+        raw_filter="AND mmsi != 0",
+    )
+    query = f"""
+        SELECT mmsi, SUM(count) as count
+        FROM ({source})
+        GROUP BY mmsi
+        ORDER BY count DESC
+        LIMIT ?
+    """
+    return query, params + [limit]
+
+
+def stats_query(table_name, start_datetime, end_datetime, last_rowid):
+    """집계 테이블을 사용하는 기간 내 통계 쿼리 (query_builder.stats_query 와 같은 컬럼)"""
+    source, params = _sources(
+        table_name, start_datetime, end_datetime, last_rowid,
+        raw_columns="mmsi, status, 1 AS count, datetime AS min_datetime, datetime AS max_datetime",
+        rollup_columns="mmsi, status, count, min_datetime, max_datetime",
+    )
+    query = f"""
+        SELECT
+            COALESCE(SUM(count), 0) as total_count,
+            COUNT(DISTINCT mmsi) as unique_vessels,
+            SUM(CASE WHEN status = 1 THEN count ELSE 0 END) as fishing_count,
+            SUM(CASE WHEN status = 2 THEN count ELSE 0 END) as non_fishing_count,
+            MIN(min_datetime) as min_datetime,
+            MAX(max_datetime) as max_datetime
+        FROM ({source})
+    """
+    return query, params
+
+
+def main():
+    parser = argparse.ArgumentParser(description="시간 단위 집계 테이블 생성/갱신")
+    parser.add_argument("db_path", nargs="?", default=DEFAULT_DB_PATH, help="데이터베이스 경로")
+    parser.add_argument("--rebuild", action="store_true", help="집계 테이블을 처음부터 다시 생성")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH_ROWS, help="트랜잭션당 rowid 범위")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        print(f"❌ 파일 없음: {args.db_path}")
+        sys.exit(1)
+
+    conn = sqlite3.connect(args.db_path, timeout=30)
+    try:
+        table_name = find_trajectory_table(conn)
+        print(f"📋 항적 테이블: {table_name}")
+
+        # 파티션 파일로 옮긴 행은 원본 테이블에 없으므로 처음부터 다시 만들 수 없음
+        from partitions import has_partitions
+        if (args.rebuild or watermark(conn, table_name) is None) and has_partitions(conn, table_name):
+            print("❌ 시간 파티션으로 나눈 테이블은 처음부터 다시 만들 수 없습니다 (증분 갱신만 가능)")
+            sys.exit(1)
+
+        def progress(done, total):
+            print(f"   - rowid {done:,} / {total:,}")
+
+        started = time.perf_counter()
+        if args.rebuild:
+            applied = rebuild_rollups(conn, table_name, args.batch, progress)
+        else:
+            applied = update_rollups(conn, table_name, args.batch, progress)
+
+        print(f"✅ 집계 반영: rowid {applied:,}개 범위 ({time.perf_counter() - started:.1f}초)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+스키마 레지스트리
+항적 테이블 이름과 컬럼 목록을 한 번 조회해 캐시하고,
+DB 파일이 변경되었을 때만 다시 조회
+"""
+
+import threading
+import time
+
+# 항적 테이블로 인식하기 위한 필수 컬럼
+REQUIRED_COLUMNS = ("mmsi", "datetime", "lat", "lon", "status")
+
+
+class SchemaRegistry:
+    """항적 테이블/컬럼 정보 캐시
+
+    Args:
+        pool: ConnectionPool 인스턴스
+        check_interval: DB 파일 변경 여부를 확인하는 최소 간격 (초)
+    """
+
+    def __init__(self, pool, check_interval=5):
+        self.pool = pool
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked_at = 0.0
+        self._tables = []
+        self._columns = {}
+        self._table_name = None
+
+    def refresh(self, conn=None):
+        """sqlite_master에서 테이블/컬럼 정보를 다시 읽음"""
+        if conn is None:
+            with self.pool.connection() as conn:
+                return self.refresh(conn)
+
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        tables = [row[0] for row in cursor.fetchall()]
+
+        columns = {}
+        for table in tables:
+            cursor.execute(f'PRAGMA table_info("{table}")')
+            columns[table] = [row[1] for row in cursor.fetchall()]
+
+        # 필수 컬럼을 모두 가진 첫 번째 테이블을 항적 테이블로 사용 (없으면 첫 테이블)
+        table_name = next(
+            (t for t in tables
+             if all(c in [col.lower() for col in columns[t]] for c in REQUIRED_COLUMNS)),
+            tables[0] if tables else None
+        )
+
+        with self._lock:
+            self._tables = tables
+            self._columns = columns
+            self._table_name = table_name
+            self._signature = self.pool.file_signature()
+            self._checked_at = time.monotonic()
+
+    def _ensure_fresh(self, conn=None):
+        """확인 간격이 지났고 DB 파일이 바뀌었으면 갱신"""
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked_at < self.check_interval:
+            return
+
+        signature = self.pool.file_signature()
+        if signature != self._signature:
+            self.refresh(conn)
+        else:
+            self._checked_at = now
+
+    def tables(self, conn=None):
+        """전체 테이블 목록"""
+        self._ensure_fresh(conn)
+        return list(self._tables)
+
+    def table_name(self, conn=None):
+        """항적 테이블 이름"""
+        self._ensure_fresh(conn)
+        if self._table_name is None:
+            raise LookupError("데이터베이스에 테이블이 없습니다")
+        return self._table_name
+
+    def columns(self, table=None, conn=None):
+        """테이블 컬럼 목록 (기본값: 항적 테이블)"""
+        self._ensure_fresh(conn)
+        return list(self._columns.get(table or self._table_name, []))
+
+    def has_table(self, name, conn=None):
+        """테이블 존재 여부"""
+        self._ensure_fresh(conn)
+        return name in self._columns
@@ -0,0 +1,150 @@
+"""
+항적 응답 직렬화
+- JSON: 커서 행(tuple) 또는 NumPy 컬럼 배열을 pandas/pydantic 을 거치지 않고 바로 JSON 바이트로 변환
+  (출력 형식은 TrajectoryPoint 모델을 JSON으로 직렬화한 결과와 동일)
+- 바이너리: 컬럼별 배열(struct-of-arrays)로 묶은 압축 형식 (TRAJECTORY_BINARY_MEDIA_TYPE)
+"""
+
+import json
+import struct
+
+import numpy as np
+
+# 따옴표/이스케이프 처리된 JSON 문자열 (C 구현, 한글은 그대로 유지)
+_encode_str = json.encoder.encode_basestring
+
+# 상태값 -> 상태 이름 (1 이외는 모두 비조업)
+STATUS_FISHING = 1
+STATUS_NAMES = {STATUS_FISHING: "조업"}
+DEFAULT_STATUS_NAME = "비조업"
+
+_STATUS_NAME_JSON = {k: _encode_str(v) for k, v in STATUS_NAMES.items()}
+_DEFAULT_STATUS_NAME_JSON = _encode_str(DEFAULT_STATUS_NAME)
+
+_POINT_FORMAT = (
+    '{{"mmsi":{},"datetime":{},"lat":{},"lon":{},"status":{},"status_name":{}}}'
+).format
+
+
+def status_name(status):
+    """상태값에 해당하는 이름"""
+    return STATUS_NAMES.get(status, DEFAULT_STATUS_NAME)
+
+
+def _number(value):
+    """숫자를 JSON 표현으로 (NULL 은 null)"""
+    return "null" if value is None else repr(value)
+
+
+def columns_to_rows(columns):
+    """NumPy 컬럼 배열(또는 리스트) 묶음을 행 이터레이터로 변환
+
+    Args:
+        columns: (mmsi, datetime, lat, lon, status) 순서의 컬럼 시퀀스
+    """
+    # tolist()는 NumPy 스칼라를 파이썬 기본형으로 한 번에 변환
+    return zip(*(c.tolist() if hasattr(c, "tolist") else c for c in columns))
+
+
+def encode_trajectory_rows(rows):
+    """(mmsi, datetime, lat, lon, status) 행들을 JSON 배열 바이트로 변환
+
+    Returns:
+        (JSON 바이트, 행 수)
+    """
+    status_json = _STATUS_NAME_JSON.get
+    default_name = _DEFAULT_STATUS_NAME_JSON
+    parts = []
+    append = parts.append
+
+    for mmsi, dt, lat, lon, status in rows:
+        append(_POINT_FORMAT(
+            _encode_str(str(mmsi)),
+            _encode_str(str(dt)),
+            _number(lat),
+            _number(lon),
+            _number(status),
+            status_json(status, default_name),
+        ))
+
+    return ("[" + ",".join(parts) + "]").encode("utf-8"), len(parts)
+
+
+def trajectory_points(rows):
+    """pydantic 검증용 dict 목록 (느린 경로)"""
+    return [
+        {
+            "mmsi": str(mmsi),
+            "datetime": str(dt),
+            "lat": float(lat),
+            "lon": float(lon),
+            "status": int(status),
+            "status_name": status_name(status),
+        }
+        for mmsi, dt, lat, lon, status in rows
+    ]
+
+
+# 컬럼형 바이너리 형식 (리틀 엔디언, 모든 배열은 4바이트 정렬)
+#   헤더 16바이트: magic "TRJ1", 포인트 수 N (uint32), MMSI 구간 수 M (uint32), 예약 (uint32)
+#   MMSI 사전   : M x (mmsi uint32, 연속 포인트 수 uint32) - 행 순서대로 같은 MMSI 가 이어지는 구간
+#   lat         : N x float32
+#   lon         : N x float32
+#   epoch       : N x uint32 (UTC 기준 초, datetime 문자열을 그대로 UTC로 간주)
+#   status      : N x uint8
+TRAJECTORY_BINARY_MEDIA_TYPE = "application/vnd.fishing-trajectory.columnar"
+TRAJECTORY_BINARY_MAGIC = b"TRJ1"
+_BINARY_HEADER = struct.Struct("<4sIII")
+
+
+def wants_binary(format_param=None, accept=None):
+    """쿼리 파라미터(format=binary) 또는 Accept 헤더로 바이너리 응답 요청 여부 판단"""
+    if format_param:
+        return format_param.lower() == "binary"
+    return bool(accept) and TRAJECTORY_BINARY_MEDIA_TYPE in accept
+
+
+def encode_trajectory_columns(mmsi, dt, lat, lon, status):
+    """컬럼 배열을 바이너리 형식으로 변환
+
+    Args:
+        mmsi: MMSI 배열 (행 순서)
+        dt: 'YYYY-MM-DD HH:MM:SS' 문자열 배열
+        lat, lon: 실수 좌표 배열
+        status: DB 상태값 배열
+    """
+    mmsi = np.asarray(mmsi, dtype=np.int64)
+    count = len(mmsi)
+
+    # 값이 바뀌는 위치로 MMSI 구간(run) 계산
+    if count:
+        starts = np.flatnonzero(np.concatenate(([True], mmsi[1:] != mmsi[:-1])))
+        run_lengths = np.diff(np.append(starts, count))
+        dictionary = np.empty((len(starts), 2), dtype="<u4")
+        dictionary[:, 0] = mmsi[starts]
+        dictionary[:, 1] = run_lengths
+    else:
+        dictionary = np.empty((0, 2), dtype="<u4")
+
+    epoch = np.asarray(dt, dtype="datetime64[s]").astype(np.int64)
+
+    return b"".join((
+        _BINARY_HEADER.pack(TRAJECTORY_BINARY_MAGIC, count, len(dictionary), 0),
+        dictionary.tobytes(),
+        np.asarray(lat, dtype="<f4").tobytes(),
+        np.asarray(lon, dtype="<f4").tobytes(),
+        epoch.astype("<u4").tobytes(),
+        np.asarray(status, dtype=np.uint8).tobytes(),
+    ))
+
+
+def encode_trajectory_binary(rows):
+    """(mmsi, datetime, lat, lon, status) 행들을 바이너리 형식으로 변환
+
+    Returns:
+        (바이너리 바이트, 행 수)
+    """
+    if not rows:
+        return encode_trajectory_columns([], [], [], [], []), 0
+    columns = list(zip(*rows))
+    return encode_trajectory_columns(*columns), len(rows)
@@ -0,0 +1,200 @@
+"""
+항적 단순화
+SQL 샘플링(MMSI별 N개 중 1개) 대신 모양을 보존하면서 포인트 수를 줄이는 방법
+- time  : 시간 간격(초) 구간마다 첫 포인트만 유지
+- dp    : Douglas-Peucker (허용 거리 m 이내의 포인트 제거)
+- vw    : Visvalingam-Whyatt (유효 면적이 허용 거리² 미만인 포인트 제거)
+- budget: 선박별 최대 포인트 수 (Visvalingam 면적이 작은 순서로 제거)
+
+모든 방법에서 선박별 첫/마지막 포인트와 상태(조업/비조업)가 바뀌는 포인트는 유지
+좌표 계산은 선박별 NumPy 배열 연산으로 처리
+"""
+
+import math
+
+import numpy as np
+
+MODES = ("time", "dp", "vw", "budget")
+
+# 위경도 1도당 거리 (m), 경도는 위도에 따라 cos(lat) 배
+METERS_PER_DEG_LAT = 110540.0
+METERS_PER_DEG_LON = 111320.0
+
+
+def validate_mode(mode):
+    """단순화 방법 이름 확인 (None 이면 단순화하지 않음)"""
+    if mode is None:
+        return None
+    mode = mode.lower()
+    if mode not in MODES:
+        raise ValueError(f"지원하지 않는 단순화 방법: {mode} ({', '.join(MODES)})")
+    return mode
+
+
+def douglas_peucker(x, y, tolerance):
+    """Douglas-Peucker 단순화, 남길 포인트 마스크 반환
+
+    분할 구간마다 선분과의 거리를 배열 연산으로 한 번에 계산
+    """
+    count = len(x)
+    keep = np.zeros(count, dtype=bool)
+    if count == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    if count < 3:
+        return keep
+
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        dx = x[end] - x[start]
+        dy = y[end] - y[start]
+        seg_x = x[start + 1:end] - x[start]
+        seg_y = y[start + 1:end] - y[start]
+        length = math.hypot(dx, dy)
+        if length == 0:
+            dist = np.hypot(seg_x, seg_y)
+        else:
+            dist = np.abs(dx * seg_y - dy * seg_x) / length
+        index = int(np.argmax(dist))
+        if dist[index] > tolerance:
+            split = start + 1 + index
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def _triangle_areas(x, y):
+    """각 내부 포인트와 앞뒤 포인트가 이루는 삼각형 면적"""
+    return 0.5 * np.abs(
+        (x[:-2] - x[2:]) * (y[1:-1] - y[:-2]) - (x[:-2] - x[1:-1]) * (y[2:] - y[:-2])
+    )
+
+
+def visvalingam(x, y, min_area=None, max_points=None, fixed=None):
+    """Visvalingam-Whyatt 단순화, 남길 포인트 마스크 반환
+
+    매 단계 면적이 양옆보다 작은(지역 최소) 포인트들을 한꺼번에 제거하는 방식
+    (인접한 포인트는 같은 단계에서 함께 제거되지 않음)
+
+    Args:
+        min_area: 이 면적 미만인 포인트 제거
+        max_points: 남길 최대 포인트 수 (면적이 작은 순서로 제거)
+        fixed: 반드시 남길 포인트 마스크
+    """
+    count = len(x)
+    keep = np.ones(count, dtype=bool)
+    index = np.arange(count)
+
+    while len(index) > 2:
+        areas = _triangle_areas(x[index], y[index])
+        if fixed is not None:
+            areas[fixed[index[1:-1]]] = np.inf
+
+        # 양옆보다 면적이 작은 포인트 (같은 값이면 앞쪽 우선)
+        padded = np.concatenate(([np.inf], areas, [np.inf]))
+        minima = (areas < padded[:-2]) & (areas <= padded[2:]) & np.isfinite(areas)
+
+        if max_points is not None:
+            excess = len(index) - max_points
+            if excess <= 0:
+                break
+            candidates = np.flatnonzero(minima)
+            if min_area is not None:
+                candidates = candidates[areas[candidates] < min_area]
+            candidates = candidates[np.argsort(areas[candidates], kind="stable")[:excess]]
+        else:
+            candidates = np.flatnonzero(minima & (areas < min_area))
+
+        if len(candidates) == 0:
+            break
+        remove = index[candidates + 1]
+        keep[remove] = False
+        index = np.flatnonzero(keep)
+
+    return keep
+
+
+def _project(lat, lon):
+    """위경도 -> 평면 좌표 (m, 항적 범위 중앙 위도 기준 등장방형 투영)"""
+    lat0 = math.radians(float(np.mean(lat))) if len(lat) else 0.0
+    return lon * METERS_PER_DEG_LON * math.cos(lat0), lat * METERS_PER_DEG_LAT
+
+
+def _boundaries(mmsi):
+    """MMSI가 바뀌는 위치 기준 선박별 (시작, 끝) 구간 (끝 미포함)"""
+    breaks = np.flatnonzero(mmsi[1:] != mmsi[:-1]) + 1
+    bounds = np.concatenate(([0], breaks, [len(mmsi)]))
+    return zip(bounds[:-1].tolist(), bounds[1:].tolist())
+
+
+def _fixed_points(mmsi, status):
+    """선박별 첫/마지막 포인트와 상태가 바뀌는 포인트"""
+    fixed = np.zeros(len(mmsi), dtype=bool)
+    if len(mmsi):
+        fixed[0] = fixed[-1] = True
+        changed = (mmsi[1:] != mmsi[:-1]) | (status[1:] != status[:-1])
+        fixed[1:] |= changed
+        fixed[:-1] |= changed
+    return fixed
+
+
+def simplify_mask(mmsi, epoch, lat, lon, status, mode, tolerance=50.0, interval=60, max_points=500):
+    """(mmsi, datetime) 순으로 정렬된 항적 컬럼에서 남길 포인트 마스크
+
+    Args:
+        mmsi, epoch, lat, lon, status: 컬럼 배열 (epoch 는 초)
+        mode: time | dp | vw | budget
+        tolerance: dp/vw 허용 거리 (m)
+        interval: time 구간 간격 (초)
+        max_points: budget 선박별 최대 포인트 수
+    """
+    mode = validate_mode(mode)
+    fixed = _fixed_points(mmsi, status)
+
+    if mode == "time":
+        bucket = epoch // max(int(interval), 1)
+        first = np.ones(len(mmsi), dtype=bool)
+        first[1:] = (mmsi[1:] != mmsi[:-1]) | (bucket[1:] != bucket[:-1])
+        return first | fixed
+
+    x, y = _project(lat, lon)
+    keep = fixed.copy()
+    for start, end in _boundaries(mmsi):
+        vx, vy, vfixed = x[start:end], y[start:end], fixed[start:end]
+
+        if mode == "budget":
+            keep[start:end] = visvalingam(vx, vy, max_points=max(int(max_points), 2), fixed=vfixed)
+            continue
+
+        # 상태 구간별로 단순화 (구간 경계는 항상 유지)
+        pieces = np.flatnonzero(vfixed)
+        for a, b in zip(pieces[:-1].tolist(), pieces[1:].tolist()):
+            if b - a < 2:
+                continue
+            if mode == "dp":
+                mask = douglas_peucker(vx[a:b + 1], vy[a:b + 1], tolerance)
+            else:
+                mask = visvalingam(vx[a:b + 1], vy[a:b + 1], min_area=tolerance ** 2)
+            keep[start + a:start + b + 1] |= mask
+
+    return keep
+
+
+def simplify_rows(rows, mode, tolerance=50.0, interval=60, max_points=500):
+    """(mmsi, datetime, lat, lon, status) 행 목록 단순화 (행 형식은 그대로 유지)"""
+    if not rows or mode is None:
+        return rows
+    mmsi, dt, lat, lon, status = (list(c) for c in zip(*(r[:5] for r in rows)))
+    keep = simplify_mask(
+        np.asarray(mmsi, dtype=np.int64),
+        np.asarray(dt, dtype="datetime64[s]").astype(np.int64),
+        np.asarray(lat, dtype=np.float64),
+        np.asarray(lon, dtype=np.float64),
+        np.asarray(status, dtype=np.int64),
+        mode, tolerance=tolerance, interval=interval, max_points=max_points,
+    )
+    return [rows[i] for i in np.flatnonzero(keep).tolist()]
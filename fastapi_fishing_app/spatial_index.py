@@ -0,0 +1,338 @@
+"""
+항적 공간 인덱스 (SQLite R*Tree)
+(MMSI, 시간)별 좌표 범위를 R*Tree 에 저장해 관심 영역(bbox/다각형) 조회 시
+영역을 지나간 선박-시간 구간의 행만 읽도록 함
+- traj_rtree_hourly: rtree_i32 (위도, 경도, epoch 시간) 3차원 범위 + MMSI
+- traj_rtree_state : 원본 테이블별로 인덱싱이 끝난 마지막 rowid (증분 갱신 기준)
+
+원본 테이블은 추가(append)만 된다고 가정하며, 수정/삭제가 있었다면 --rebuild 로 다시 만들어야 함
+인덱싱 이후 추가된 행(rowid > 마지막 rowid)은 조회 시 원본에서 직접 후보를 찾음
+
+사용법:
+    python spatial_index.py [DB 경로] [--rebuild] [--batch 5000000]
+"""
+
+import argparse
+import calendar
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+from migrate_db import DEFAULT_DB_PATH, find_trajectory_table
+from query_builder import COORD_SCALE, DEFAULT_BOUNDS, scaled_bounds
+
+RTREE_TABLE = "traj_rtree_hourly"
+STATE_TABLE = "traj_rtree_state"
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 증분 갱신 시 한 트랜잭션에서 처리할 rowid 범위
+DEFAULT_BATCH_ROWS = 5000000
+
+# 조회 쿼리에 넣을 선박-시간 구간 최대 개수 (초과 시 선박별 한 구간으로 합침)
+MAX_RANGES = 5000
+
+
+def ensure_tables(conn):
+    """공간 인덱스 테이블 생성 (lat/lon 은 원본과 같은 x 1e7 정수)"""
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE} USING rtree_i32(
+            id,
+            min_lat, max_lat,
+            min_lon, max_lon,
+            min_hour, max_hour,
+            +mmsi
+        )
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            source_table TEXT PRIMARY KEY,
+            last_rowid INTEGER NOT NULL,
+            updated_at TEXT
+        )
+    """)
+    conn.commit()
+
+
+def watermark(conn, table_name):
+    """인덱싱이 끝난 마지막 rowid (공간 인덱스가 없으면 None)"""
+    try:
+        row = conn.execute(
+            f"SELECT last_rowid FROM {STATE_TABLE} WHERE source_table = ?", [table_name]
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def update_index(conn, table_name, batch_rows=DEFAULT_BATCH_ROWS, progress=None):
+    """마지막 rowid 이후 추가된 행의 (MMSI, 시간)별 범위를 R*Tree 에 추가
+
+    같은 (MMSI, 시간)이 여러 배치에 걸쳐 있으면 범위가 여러 개 저장됨 (조회 결과는 같음)
+
+    Returns:
+        반영한 rowid 범위 크기
+    """
+    ensure_tables(conn)
+
+    start = last = watermark(conn, table_name) or 0
+    max_rowid = conn.execute(f"SELECT MAX(rowid) FROM {table_name}").fetchone()[0] or 0
+
+    while last < max_rowid:
+        upper = min(last + batch_rows, max_rowid)
+        with conn:
+            conn.execute(f"""
+                INSERT INTO {RTREE_TABLE}
+                    (min_lat, max_lat, min_lon, max_lon, min_hour, max_hour, mmsi)
+                SELECT MIN(lat), MAX(lat), MIN(lon), MAX(lon), hour, hour, mmsi
+                FROM (
+                    SELECT mmsi, lat, lon,
+                           CAST(strftime('%s', datetime) AS INTEGER) / 3600 AS hour
+                    FROM {table_name}
+                    WHERE rowid > ? AND rowid <= ?
+                      AND lat IS NOT NULL AND lon IS NOT NULL
+                )
+                GROUP BY mmsi, hour
+            """, [last, upper])
+            conn.execute(f"""
+                INSERT INTO {STATE_TABLE} (source_table, last_rowid, updated_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT (source_table) DO UPDATE SET
+                    last_rowid = excluded.last_rowid,
+                    updated_at = excluded.updated_at
+            """, [table_name, upper, datetime.now().strftime(DATETIME_FORMAT)])
+        last = upper
+        if progress:
+            progress(last, max_rowid)
+
+    if watermark(conn, table_name) is None:
+        # 빈 테이블도 인덱싱 완료 상태로 기록
+        with conn:
+            conn.execute(f"INSERT INTO {STATE_TABLE} VALUES (?, ?, ?)",
+                         [table_name, last, datetime.now().strftime(DATETIME_FORMAT)])
+
+    return last - start
+
+
+def rebuild_index(conn, table_name, batch_rows=DEFAULT_BATCH_ROWS, progress=None):
+    """공간 인덱스를 비우고 처음부터 다시 생성"""
+    ensure_tables(conn)
+    with conn:
+        conn.execute(f"DELETE FROM {RTREE_TABLE}")
+        conn.execute(f"DELETE FROM {STATE_TABLE} WHERE source_table = ?", [table_name])
+    return update_index(conn, table_name, batch_rows, progress)
+
+
+def hour_number(datetime_str):
+    """'YYYY-MM-DD HH:MM:SS' -> epoch 시간 (SQLite strftime('%s') / 3600 과 같은 값)"""
+    return calendar.timegm(time.strptime(datetime_str, DATETIME_FORMAT)) // 3600
+
+
+def _hour_range(hour):
+    """epoch 시간 -> (시작, 끝) datetime 문자열"""
+    start = time.gmtime(hour * 3600)
+    return (time.strftime("%Y-%m-%d %H:00:00", start),
+            time.strftime("%Y-%m-%d %H:59:59", start))
+
+
+def _merge(pairs):
+    """(MMSI, 시간) 목록 -> 연속된 시간을 합친 [(MMSI, 첫 시간, 마지막 시간)]"""
+    merged = []
+    for mmsi, hour in sorted(pairs):
+        if merged and merged[-1][0] == mmsi and merged[-1][2] + 1 >= hour:
+            merged[-1][2] = max(merged[-1][2], hour)
+        else:
+            merged.append([mmsi, hour, hour])
+    return merged
+
+
+def candidate_ranges(conn, table_name, start_datetime, end_datetime, bounds, last_rowid,
+                     max_ranges=MAX_RANGES):
+    """영역(bounds)을 지나간 선박-시간 구간 목록
+
+    Args:
+        bounds: (lat_min, lat_max, lon_min, lon_max) 실수 좌표
+        last_rowid: 공간 인덱스 watermark (이후 행은 원본에서 직접 찾음)
+
+    Returns:
+        [(MMSI, 시작 datetime, 끝 datetime), ...] (조회 기간으로 잘림),
+        구간이 너무 많아 인덱스로 줄일 수 없으면 None
+    """
+    lat_min, lat_max, lon_min, lon_max = scaled_bounds(bounds)
+    if lat_min > lat_max or lon_min > lon_max:
+        return []
+    first_hour, last_hour = hour_number(start_datetime), hour_number(end_datetime)
+
+    pairs = set()
+    cursor = conn.execute(f"""
+        SELECT mmsi, min_hour FROM {RTREE_TABLE}
+        WHERE max_lat >= ? AND min_lat <= ?
+          AND max_lon >= ? AND min_lon <= ?
+          AND max_hour >= ? AND min_hour <= ?
+    """, [lat_min, lat_max, lon_min, lon_max, first_hour, last_hour])
+    pairs.update(cursor.fetchall())
+
+    # 아직 인덱싱되지 않은 행 (+datetime 으로 rowid 범위 탐색을 사용하도록 함)
+    cursor = conn.execute(f"""
+        SELECT DISTINCT mmsi, CAST(strftime('%s', datetime) AS INTEGER) / 3600
+        FROM {table_name}
+        WHERE rowid > ? AND +datetime >= ? AND +datetime <= ?
+          AND lat >= ? AND lat <= ? AND lon >= ? AND lon <= ?
+    """, [last_rowid, start_datetime, end_datetime, lat_min, lat_max, lon_min, lon_max])
+    pairs.update(cursor.fetchall())
+
+    merged = _merge(pairs)
+    if len(merged) > max_ranges:
+        # 선박별로 첫/마지막 시간 사이를 한 구간으로 합침 (정렬되어 있으므로 마지막 값이 최대)
+        per_vessel = {}
+        for mmsi, first, last in merged:
+            per_vessel.setdefault(mmsi, [mmsi, first, last])[2] = last
+        merged = list(per_vessel.values())
+        if len(merged) > max_ranges:
+            return None
+
+    ranges = []
+    for mmsi, first, last in merged:
+        range_start = max(_hour_range(first)[0], start_datetime)
+        range_end = min(_hour_range(last)[1], end_datetime)
+        ranges.append((mmsi, range_start, range_end))
+    return ranges
+
+
+# ---- 관심 영역 파라미터 ----
+
+def parse_bbox(value):
+    """bbox 파라미터 -> (lat_min, lat_max, lon_min, lon_max)
+
+    'lat_min,lat_max,lon_min,lon_max' 문자열 또는 숫자 4개 목록
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    try:
+        lat_min, lat_max, lon_min, lon_max = (float(v) for v in value)
+    except (TypeError, ValueError):
+        raise ValueError("bbox 는 lat_min,lat_max,lon_min,lon_max 형식이어야 합니다")
+    if lat_min > lat_max or lon_min > lon_max:
+        raise ValueError("bbox 최소값이 최대값보다 큽니다")
+    return lat_min, lat_max, lon_min, lon_max
+
+
+def parse_polygon(value):
+    """polygon 파라미터 -> ((lat, lon), ...)
+
+    'lat,lon;lat,lon;...' 문자열 또는 [[lat, lon], ...] 목록, 꼭짓점 3개 이상
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [p.split(",") for p in value.split(";") if p.strip()]
+    try:
+        points = tuple((float(lat), float(lon)) for lat, lon in value)
+    except (TypeError, ValueError):
+        raise ValueError("polygon 은 lat,lon;lat,lon;... 형식이어야 합니다")
+    if len(points) < 3:
+        raise ValueError("polygon 은 꼭짓점이 3개 이상이어야 합니다")
+    return points
+
+
+def area_bounds(bbox=None, polygon=None, bounds=DEFAULT_BOUNDS):
+    """유효 좌표 범위와 bbox, 다각형 외곽 범위의 교집합"""
+    lat_min, lat_max, lon_min, lon_max = bounds
+    areas = [bbox] if bbox else []
+    if polygon:
+        lats = [p[0] for p in polygon]
+        lons = [p[1] for p in polygon]
+        areas.append((min(lats), max(lats), min(lons), max(lons)))
+    for a_lat_min, a_lat_max, a_lon_min, a_lon_max in areas:
+        lat_min, lat_max = max(lat_min, a_lat_min), min(lat_max, a_lat_max)
+        lon_min, lon_max = max(lon_min, a_lon_min), min(lon_max, a_lon_max)
+    return lat_min, lat_max, lon_min, lon_max
+
+
+def polygon_param(polygon):
+    """SQL in_polygon() 에 넘길 다각형 문자열"""
+    return json.dumps([list(p) for p in polygon], separators=(",", ":"))
+
+
+@lru_cache(maxsize=64)
+def _polygon_edges(polygon_json):
+    """다각형 문자열 -> 정수 좌표 변 목록 ((lat1, lon1, lat2, lon2), ...)"""
+    points = [(lat * COORD_SCALE, lon * COORD_SCALE) for lat, lon in json.loads(polygon_json)]
+    return tuple((*points[i - 1], *points[i]) for i in range(len(points)))
+
+
+def _in_polygon(lat, lon, polygon_json):
+    """점이 다각형 내부에 있으면 1 (ray casting, lat/lon 은 x 1e7 정수)"""
+    if lat is None or lon is None:
+        return 0
+    inside = False
+    for lat1, lon1, lat2, lon2 in _polygon_edges(polygon_json):
+        if (lat1 > lat) != (lat2 > lat):
+            if lon < (lon2 - lon1) * (lat - lat1) / (lat2 - lat1) + lon1:
+                inside = not inside
+    return int(inside)
+
+
+def in_polygon_array(lat, lon, polygon_json):
+    """_in_polygon 의 NumPy 버전 - 정수 좌표 배열 -> 내부 여부 bool 배열 (같은 계산 순서)"""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    inside = np.zeros(len(lat), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for lat1, lon1, lat2, lon2 in _polygon_edges(polygon_json):
+            crosses = (lat1 > lat) != (lat2 > lat)
+            inside ^= crosses & (lon < (lon2 - lon1) * (lat - lat1) / (lat2 - lat1) + lon1)
+    return inside
+
+
+def register_functions(conn):
+    """연결에 in_polygon(lat, lon, polygon) SQL 함수 등록 (ConnectionPool on_connect 용)"""
+    conn.create_function("in_polygon", 3, _in_polygon, deterministic=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="항적 공간 인덱스(R*Tree) 생성/갱신")
+    parser.add_argument("db_path", nargs="?", default=DEFAULT_DB_PATH, help="데이터베이스 경로")
+    parser.add_argument("--rebuild", action="store_true", help="공간 인덱스를 처음부터 다시 생성")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH_ROWS, help="트랜잭션당 rowid 범위")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db_path):
+        print(f"❌ 파일 없음: {args.db_path}")
+        sys.exit(1)
+
+    conn = sqlite3.connect(args.db_path, timeout=30)
+    try:
+        table_name = find_trajectory_table(conn)
+        print(f"📋 항적 테이블: {table_name}")
+
+        # 파티션 파일로 옮긴 행은 원본 테이블에 없으므로 처음부터 다시 만들 수 없음
+        from partitions import has_partitions
+        if (args.rebuild or watermark(conn, table_name) is None) and has_partitions(conn, table_name):
+            print("❌ 시간 파티션으로 나눈 테이블은 처음부터 다시 만들 수 없습니다 (증분 갱신만 가능)")
+            sys.exit(1)
+
+        def progress(done, total):
+            print(f"   - rowid {done:,} / {total:,}")
+
+        started = time.perf_counter()
+        if args.rebuild:
+            applied = rebuild_index(conn, table_name, args.batch, progress)
+        else:
+            applied = update_index(conn, table_name, args.batch, progress)
+
+        print(f"✅ 공간 인덱스 반영: rowid {applied:,}개 범위 ({time.perf_counter() - started:.1f}초)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
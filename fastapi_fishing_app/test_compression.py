@@ -0,0 +1,59 @@
+"""
+응답 압축 미들웨어(compression) 회귀 테스트
+304 응답의 ETag 가 재검증한 200 응답의 ETag 와 같은지 확인
+- 압축하지 않는 형식(PNG 타일)과 minimum_size 미만의 작은 JSON 은 인코딩 표시 없이
+- 압축한 JSON 은 인코딩 표시(-gzip)를 포함한 같은 ETag
+
+실행: python -m pytest -q test_compression.py
+"""
+
+import pytest
+from fastapi import FastAPI, Header, Response
+from fastapi.testclient import TestClient
+
+import http_cache
+from compression import CompressionMiddleware
+
+ETAG = http_cache.make_etag("test", None)
+
+BODIES = {
+    "tile.png": (b"\x89PNG\r\n\x1a\n" + bytes(4096), "image/png"),
+    "small.json": (b'{"total_count": 1}', "application/json"),
+    "large.json": (b"[" + b",".join([b'{"mmsi": "440000001"}'] * 200) + b"]", "application/json"),
+}
+
+
+def make_client():
+    """main.py 엔드포인트와 같이 If-None-Match 가 일치하면 304 를 보내는 앱"""
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/{name}")
+    def resource(name: str, if_none_match: str = Header(None)):
+        headers = {"ETag": ETAG}
+        if http_cache.etag_matches(if_none_match, ETAG):
+            return Response(status_code=304, headers=headers)
+        body, media_type = BODIES[name]
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("name, compressed", [
+    ("tile.png", False),
+    ("small.json", False),
+    ("large.json", True),
+])
+def test_not_modified_etag_matches_ok_response(name, compressed):
+    client = make_client()
+    headers = {"Accept-Encoding": "gzip"}
+
+    ok = client.get(f"/{name}", headers=headers)
+    assert ok.status_code == 200
+    assert (ok.headers.get("content-encoding") == "gzip") == compressed
+    assert ok.headers["etag"] == (ETAG[:-1] + '-gzip"' if compressed else ETAG)
+
+    not_modified = client.get(f"/{name}", headers=dict(headers, **{"If-None-Match": ok.headers["etag"]}))
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == ok.headers["etag"]
+    assert "content-encoding" not in not_modified.headers
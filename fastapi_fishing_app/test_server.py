@@ -35,7 +35,7 @@ except ImportError:
     print("   Run: pip install pydantic")
 
 import os
-db_path = r"C:\Users\User\Desktop\fishing_trajectory.db"
+db_path = os.environ.get("FISHING_DB_PATH", r"C:\Users\User\Desktop\fishing_trajectory.db")
 print(f"\n데이터베이스 파일 확인:")
 if os.path.exists(db_path):
     print(f"✅ 파일 존재: {db_path}")
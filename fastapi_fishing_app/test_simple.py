@@ -35,7 +35,7 @@ if missing_packages:
 
 # 3. 데이터베이스 파일 확인
 import os
-db_path = r"C:\Users\User\Desktop\fishing_trajectory.db"
+db_path = os.environ.get("FISHING_DB_PATH", r"C:\Users\User\Desktop\fishing_trajectory.db")
 print(f"데이터베이스 경로: {db_path}")
 if os.path.exists(db_path):
     size = os.path.getsize(db_path)
@@ -0,0 +1,83 @@
+"""
+항적 조회 결과 진행형 스트리밍
+전체 결과를 만든 뒤 보내는 대신 커서에서 읽는 대로 청크 단위로 보내 클라이언트가 바로 그리기 시작
+- ndjson: 한 줄 = 항적 포인트 JSON 배열 (/api/trajectory 와 같은 객체)
+- binary: 프레임 = 길이(uint32, 리틀 엔디언) + 컬럼형 바이너리 블록 (serializers.py 형식)
+- 첫 청크는 작게 보내 첫 포인트까지의 시간을 줄이고, 이후 청크는 크게 보내 청크별 오버헤드를 줄임
+- 서버 메모리는 청크 하나 크기만큼만 사용
+"""
+
+import struct
+
+from hot_store import to_rows
+from serializers import encode_trajectory_rows, encode_trajectory_binary, encode_trajectory_columns
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+TRAJECTORY_STREAM_MEDIA_TYPE = "application/vnd.fishing-trajectory.columnar-stream"
+
+# 첫 청크 / 이후 청크 행 수
+FIRST_CHUNK_ROWS = 1000
+CHUNK_ROWS = 20000
+
+_FRAME_LENGTH = struct.Struct("<I")
+
+
+def encode_chunk(rows, binary=False):
+    """(mmsi, datetime, lat, lon, status) 행 청크 -> NDJSON 한 줄 또는 바이너리 프레임"""
+    if binary:
+        block, _ = encode_trajectory_binary(rows)
+        return _FRAME_LENGTH.pack(len(block)) + block
+    body, _ = encode_trajectory_rows(rows)
+    return body + b"\n"
+
+
+def iter_cursor_chunks(cursor, first=FIRST_CHUNK_ROWS, size=CHUNK_ROWS):
+    """커서 결과를 첫 청크는 first 행, 이후는 size 행씩"""
+    rows = cursor.fetchmany(first)
+    while rows:
+        yield rows
+        rows = cursor.fetchmany(size)
+
+
+def stream_trajectory(pool, query, params, binary=False, prepare=None,
+                      first=FIRST_CHUNK_ROWS, size=CHUNK_ROWS):
+    """쿼리 결과를 청크 단위 바이트 스트림으로 생성
+
+    csv_export.stream_query_csv 와 같이 스트림 전용 연결을 사용하고,
+    쿼리는 응답을 시작하기 전에 실행해 오류가 HTTP 오류로 전달되도록 함
+
+    Args:
+        prepare: 쿼리 전에 전용 연결에 적용할 함수 (예: 파티션 ATTACH)
+    """
+    conn = pool.connect()
+    try:
+        if prepare is not None:
+            prepare(conn)
+        cursor = conn.execute(query, params)
+    except Exception:
+        conn.close()
+        raise
+
+    def generate():
+        try:
+            for rows in iter_cursor_chunks(cursor, first, size):
+                yield encode_chunk(rows, binary)
+        finally:
+            conn.close()
+
+    return generate()
+
+
+def stream_columns(columns, binary=False, first=FIRST_CHUNK_ROWS, size=CHUNK_ROWS):
+    """HotStore.trajectory() 컬럼 배열을 같은 청크 형식으로 (바이너리는 행 변환 없이 슬라이스 그대로)"""
+    count = len(columns[0])
+    start, step = 0, first
+    while start < count:
+        chunk = [column[start:start + step] for column in columns]
+        if binary:
+            block = encode_trajectory_columns(*chunk)
+            yield _FRAME_LENGTH.pack(len(block)) + block
+        else:
+            body, _ = encode_trajectory_rows(to_rows(chunk))
+            yield body + b"\n"
+        start, step = start + step, size
@@ -0,0 +1,543 @@
+"""
+항해 구간(trip) 테이블
+선박별 항적을 시간 간격 / 항구 근접 규칙으로 항해 단위로 나눠 구간별 요약을 저장하고,
+/api/trips 가 원본 포인트를 읽지 않고 이 테이블로 목록/필터 조회에 응답하도록 함
+- traj_trips      : 구간별 MMSI, 시작/끝 시각과 좌표, 좌표 범위, 포인트 수, 이동 거리, 조업 시간
+- traj_ports      : 항구 목록 (이름, 위경도, 반경 m) - 반경 안의 포인트는 정박으로 보고 구간에서 제외
+- traj_trips_state: 원본 테이블별로 반영이 끝난 마지막 rowid 와 시간 간격 기준 (증분 갱신 기준)
+
+구간 규칙 ((mmsi, datetime) 순서, MMSI 0 / 좌표 미상 행은 제외):
+- 같은 선박의 연속 포인트 간격이 gap 초를 넘으면 새 구간
+- 항구 반경 안의 포인트는 어느 구간에도 넣지 않고, 항구를 거친 뒤의 포인트는 새 구간
+  (traj_ports 는 처음에 비어 있으므로 --ports 로 항구 CSV 를 등록해야 적용됨,
+   등록하지 않으면 시간 간격으로만 나눠서 정박 중 포인트도 구간에 포함됨)
+- 구간의 포인트 범위는 (mmsi, 시작 시각 ~ 끝 시각) 이므로 /api/trajectory 로 그대로 다시 조회 가능
+- 이동 거리는 구간 안 연속 포인트 사이 거리의 합, 조업 시간은 조업 상태 포인트에서 다음 포인트까지 시간의 합
+
+증분 갱신: 새 행이 있는 선박만 새 행의 가장 이른 시각을 포함하는 구간부터 다시 나눔
+(늦게 들어온 지난 기간 행도 반영, 이 구간이 파티션으로 옮겨진 기간이면 파티션을 ATTACH 해서 읽음)
+다시 나눈 구간은 trip_id 가 바뀔 수 있음
+
+사용법:
+    python trips.py [DB 경로] --ports ports.csv        # 항구 등록 후 전체 생성 (최초 1회)
+    python trips.py [DB 경로] [--rebuild] [--gap-hours 6] [--ports ports.csv] [--batch 5000000]
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from migrate_db import DEFAULT_DB_PATH, find_trajectory_table
+from partitions import Route, load_catalog, max_attached, union_source
+from query_builder import COORD_SCALE, scaled_bounds
+from serializers import STATUS_FISHING
+from simplify import METERS_PER_DEG_LAT, METERS_PER_DEG_LON
+
+TRIPS_TABLE = "traj_trips"
+PORTS_TABLE = "traj_ports"
+STATE_TABLE = "traj_trips_state"
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 새 구간으로 나누는 연속 포인트 시간 간격 (초)
+DEFAULT_GAP_SECONDS = 6 * 3600
+# 항구 CSV 에 반경이 없을 때 사용 (m)
+DEFAULT_PORT_RADIUS_M = 2000.0
+
+# 증분 갱신 시 한 트랜잭션에서 처리할 rowid 범위
+DEFAULT_BATCH_ROWS = 5000000
+# 전체 생성 시 커서에서 한 번에 읽는 행 수
+READ_CHUNK_ROWS = 500000
+
+# 구간에 넣는 포인트 조건 (좌표 미상 91/181 과 NULL 제외)
+VALID_POINT = (
+    f"mmsi != 0 AND lat BETWEEN {-90 * COORD_SCALE} AND {90 * COORD_SCALE}"
+    f" AND lon BETWEEN {-180 * COORD_SCALE} AND {180 * COORD_SCALE}"
+)
+
+TRIP_COLUMNS = (
+    "mmsi", "start_datetime", "end_datetime", "start_lat", "start_lon", "end_lat", "end_lon",
+    "lat_min", "lat_max", "lon_min", "lon_max", "point_count", "distance_m", "fishing_seconds",
+)
+
+
+def ensure_tables(conn):
+    """항해 구간 / 항구 / 상태 테이블 생성 (좌표는 원본과 같은 x 1e7 정수)"""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TRIPS_TABLE} (
+            trip_id INTEGER PRIMARY KEY,
+            mmsi INTEGER NOT NULL,
+            start_datetime TEXT NOT NULL,
+            end_datetime TEXT NOT NULL,
+            start_lat INTEGER, start_lon INTEGER,
+            end_lat INTEGER, end_lon INTEGER,
+            lat_min INTEGER, lat_max INTEGER,
+            lon_min INTEGER, lon_max INTEGER,
+            point_count INTEGER NOT NULL,
+            distance_m REAL NOT NULL,
+            fishing_seconds INTEGER NOT NULL
+        )
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TRIPS_TABLE}_mmsi ON {TRIPS_TABLE} (mmsi, start_datetime)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{TRIPS_TABLE}_start ON {TRIPS_TABLE} (start_datetime)")
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {PORTS_TABLE} (
+            name TEXT NOT NULL,
+            lat REAL NOT NULL,
+            lon REAL NOT NULL,
+            radius_m REAL NOT NULL
+        )
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            source_table TEXT PRIMARY KEY,
+            last_rowid INTEGER NOT NULL,
+            gap_seconds INTEGER NOT NULL,
+            updated_at TEXT
+        )
+    """)
+    conn.commit()
+
+
+def watermark(conn, table_name):
+    """구간 반영이 끝난 마지막 rowid (구간 테이블이 없으면 None)"""
+    try:
+        row = conn.execute(
+            f"SELECT last_rowid FROM {STATE_TABLE} WHERE source_table = ?", [table_name]
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def gap_seconds(conn, table_name):
+    """구간을 만들 때 사용한 시간 간격 기준 (없으면 기본값)"""
+    try:
+        row = conn.execute(
+            f"SELECT gap_seconds FROM {STATE_TABLE} WHERE source_table = ?", [table_name]
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return DEFAULT_GAP_SECONDS
+    return row[0] if row else DEFAULT_GAP_SECONDS
+
+
+def load_ports(conn):
+    """항구 목록 [(이름, 위도, 경도, 반경 m), ...] (테이블이 없으면 빈 목록)"""
+    try:
+        return conn.execute(f"SELECT name, lat, lon, radius_m FROM {PORTS_TABLE}").fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+
+def read_ports_csv(path):
+    """항구 CSV (name, lat, lon[, radius_m] 헤더) -> 항구 목록"""
+    ports = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            try:
+                radius = float(row.get("radius_m") or DEFAULT_PORT_RADIUS_M)
+                ports.append((row["name"], float(row["lat"]), float(row["lon"]), radius))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"항구 CSV 형식 오류 (name, lat, lon[, radius_m]): {row}")
+    return ports
+
+
+def set_ports(conn, ports):
+    """항구 목록 교체 (기존 구간에는 반영되지 않으므로 rebuild_trips 필요)"""
+    ensure_tables(conn)
+    with conn:
+        conn.execute(f"DELETE FROM {PORTS_TABLE}")
+        conn.executemany(f"INSERT INTO {PORTS_TABLE} VALUES (?, ?, ?, ?)", ports)
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    """두 좌표 사이 거리 (m), 등장방형 근사 - 연속 포인트 / 항구 반경 정도의 짧은 거리용"""
+    x = (lon2 - lon1) * METERS_PER_DEG_LON * np.cos(np.radians((lat1 + lat2) / 2))
+    y = (lat2 - lat1) * METERS_PER_DEG_LAT
+    return np.hypot(x, y)
+
+
+def port_mask(lat, lon, ports):
+    """항구 반경 안의 포인트 (실수 좌표 배열 -> bool 배열)"""
+    inside = np.zeros(len(lat), dtype=bool)
+    for _, port_lat, port_lon, radius in ports:
+        # 위도 차이로 먼저 거른 뒤 거리 계산
+        near = np.flatnonzero(np.abs(lat - port_lat) <= radius / METERS_PER_DEG_LAT)
+        if len(near):
+            inside[near[distance_m(lat[near], lon[near], port_lat, port_lon) <= radius]] = True
+    return inside
+
+
+def segment(mmsi, epoch, lat, lon, status, gap=DEFAULT_GAP_SECONDS, ports=()):
+    """(mmsi, epoch) 순으로 정렬된 포인트 -> 구간별 요약 (구간이 없으면 None)
+
+    Args:
+        epoch: epoch 초 배열
+        lat, lon: 실수 좌표 배열
+        status: DB 상태값 배열 (NULL 은 NaN)
+
+    Returns:
+        dict - first/last: 구간 첫/마지막 포인트 번호, point_count, distance_m, fishing_seconds,
+        lat_min/lat_max/lon_min/lon_max
+    """
+    in_port = port_mask(lat, lon, ports)
+    active = np.flatnonzero(~in_port)
+    if not len(active):
+        return None
+
+    m, t = mmsi[active], epoch[active]
+    a_lat, a_lon = lat[active], lon[active]
+    ports_before = np.cumsum(in_port)
+
+    # 구간 시작: 선박 변경, 시간 간격 초과, 직전 구간 포인트와의 사이에 항구 포인트가 있음
+    start = np.ones(len(active), dtype=bool)
+    start[1:] = ((m[1:] != m[:-1]) | (t[1:] - t[:-1] > gap)
+                 | (ports_before[active[1:]] != ports_before[active[:-1]]))
+    starts = np.flatnonzero(start)
+    ends = np.append(starts[1:], len(active)) - 1
+    trip = np.cumsum(start) - 1
+
+    # 구간 안의 연속 포인트 쌍 -> 구간별 합계
+    pair = ~start[1:]
+    owner = trip[1:][pair]
+    step = distance_m(a_lat[:-1], a_lon[:-1], a_lat[1:], a_lon[1:])[pair]
+    fishing = (status[active[:-1]] == STATUS_FISHING)[pair]
+    elapsed = (t[1:] - t[:-1])[pair]
+
+    return {
+        "first": active[starts],
+        "last": active[ends],
+        "point_count": ends - starts + 1,
+        "distance_m": np.bincount(owner, step, minlength=len(starts)),
+        "fishing_seconds": np.bincount(owner, elapsed * fishing, minlength=len(starts)),
+        "lat_min": np.minimum.reduceat(a_lat, starts),
+        "lat_max": np.maximum.reduceat(a_lat, starts),
+        "lon_min": np.minimum.reduceat(a_lon, starts),
+        "lon_max": np.maximum.reduceat(a_lon, starts),
+    }
+
+
+def _columns(rows):
+    """(mmsi, datetime, lat, lon, status) 행 -> 컬럼 배열 dict (좌표는 저장 단위 정수)"""
+    mmsi, dt, lat, lon, status = zip(*rows) if rows else ((),) * 5
+    return {
+        "mmsi": np.array(mmsi, dtype=np.int64),
+        "datetime": np.array(dt, dtype=object),
+        "lat": np.array(lat, dtype=np.int64),
+        "lon": np.array(lon, dtype=np.int64),
+        "status": np.array(status, dtype=np.float64),
+    }
+
+
+def _concat(a, b):
+    return {name: np.concatenate((a[name], b[name])) for name in a}
+
+
+def _slice(columns, start, end=None):
+    return {name: values[start:end] for name, values in columns.items()}
+
+
+def _insert(conn, columns, gap, ports):
+    """컬럼 배열의 포인트를 구간으로 나눠 저장, 저장한 구간 수 반환"""
+    if not len(columns["mmsi"]):
+        return 0
+    lat, lon = columns["lat"] / COORD_SCALE, columns["lon"] / COORD_SCALE
+    epoch = columns["datetime"].astype("datetime64[s]").astype(np.int64)
+    trips = segment(columns["mmsi"], epoch, lat, lon, columns["status"], gap, ports)
+    if trips is None:
+        return 0
+
+    first, last = trips["first"], trips["last"]
+    scale = float(COORD_SCALE)
+    rows = zip(
+        columns["mmsi"][first].tolist(),
+        columns["datetime"][first].tolist(),
+        columns["datetime"][last].tolist(),
+        columns["lat"][first].tolist(), columns["lon"][first].tolist(),
+        columns["lat"][last].tolist(), columns["lon"][last].tolist(),
+        np.rint(trips["lat_min"] * scale).astype(np.int64).tolist(),
+        np.rint(trips["lat_max"] * scale).astype(np.int64).tolist(),
+        np.rint(trips["lon_min"] * scale).astype(np.int64).tolist(),
+        np.rint(trips["lon_max"] * scale).astype(np.int64).tolist(),
+        trips["point_count"].tolist(),
+        np.round(trips["distance_m"], 1).tolist(),
+        trips["fishing_seconds"].astype(np.int64).tolist(),
+    )
+    conn.executemany(
+        f"INSERT INTO {TRIPS_TABLE} ({', '.join(TRIP_COLUMNS)}) VALUES ({', '.join('?' * len(TRIP_COLUMNS))})",
+        rows,
+    )
+    return len(first)
+
+
+def _source(conn, table_name, since=None):
+    """원본 테이블 + since 이후 기간이 있는 파티션을 읽는 FROM 절 (필요한 파티션을 ATTACH)
+
+    Raises:
+        ValueError: 읽어야 할 파티션이 연결당 ATTACH 제한보다 많을 때
+    """
+    partitions = [p for p in load_catalog(conn, table_name)
+                  if since is None or p.end_datetime >= since]
+    if not partitions:
+        return f'"{table_name}"'
+    limit = max_attached(conn)
+    if len(partitions) > limit:
+        raise ValueError(f"읽어야 할 파티션이 {len(partitions)}개입니다 (최대 {limit}개)")
+    db_path = conn.execute("PRAGMA database_list").fetchone()[2]
+    columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{table_name}")')]
+    route = Route(union_source(table_name, columns, partitions), partitions, db_path)
+    route.attach(conn)
+    return route.source
+
+
+def _detach(conn, table_name):
+    """_source 가 ATTACH 한 파티션 분리 (같은 연결로 파티션 파일에 쓰는 작업과 겹치지 않도록)"""
+    Route(table_name).attach(conn)
+
+
+def _set_state(conn, table_name, last_rowid, gap):
+    conn.execute(f"""
+        INSERT INTO {STATE_TABLE} (source_table, last_rowid, gap_seconds, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (source_table) DO UPDATE SET
+            last_rowid = excluded.last_rowid,
+            gap_seconds = excluded.gap_seconds,
+            updated_at = excluded.updated_at
+    """, [table_name, last_rowid, gap, datetime.now().strftime(DATETIME_FORMAT)])
+
+
+def rebuild_trips(conn, table_name, gap=None, progress=None):
+    """구간 테이블을 비우고 처음부터 다시 생성 (파티션으로 옮긴 기간도 함께 읽음)
+
+    (mmsi, datetime) 순서로 READ_CHUNK_ROWS 행씩 읽어 선박 단위로 나누므로 메모리는 청크 + 선박 하나 크기
+
+    Args:
+        gap: 시간 간격 기준 (초), None 이면 기존 기준 또는 기본값
+        progress: (읽은 행 수, 저장한 구간 수) 를 받는 콜백
+
+    Returns:
+        저장한 구간 수
+    """
+    ensure_tables(conn)
+    gap = gap_seconds(conn, table_name) if gap is None else gap
+    ports = load_ports(conn)
+    max_rowid = conn.execute(f'SELECT MAX(rowid) FROM "{table_name}"').fetchone()[0] or 0
+    source = _source(conn, table_name)
+
+    read = saved = 0
+    conn.execute("BEGIN")
+    try:
+        conn.execute(f"DELETE FROM {TRIPS_TABLE}")
+        cursor = conn.execute(f"""
+            SELECT mmsi, datetime, lat, lon, status FROM {source}
+            WHERE rowid <= ? AND {VALID_POINT}
+            ORDER BY mmsi, datetime, rowid
+        """, [max_rowid])
+
+        pending = _columns([])
+        while True:
+            rows = cursor.fetchmany(READ_CHUNK_ROWS)
+            if not rows:
+                break
+            read += len(rows)
+            pending = _concat(pending, _columns(rows))
+            # 마지막 선박은 다음 청크에 이어질 수 있으므로 남김
+            cut = int(np.searchsorted(pending["mmsi"], pending["mmsi"][-1]))
+            saved += _insert(conn, _slice(pending, 0, cut), gap, ports)
+            pending = _slice(pending, cut)
+            if progress:
+                progress(read, saved)
+        saved += _insert(conn, pending, gap, ports)
+
+        _set_state(conn, table_name, max_rowid, gap)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _detach(conn, table_name)
+    return saved
+
+
+def update_trips(conn, table_name, batch_rows=DEFAULT_BATCH_ROWS, progress=None):
+    """마지막 rowid 이후 추가된 행이 있는 선박의 구간을 다시 나눔 (구간 테이블이 없으면 전체 생성)
+
+    선박별로 새 행의 가장 이른 시각 이전에 시작한 마지막 구간부터 지우고 다시 나누므로
+    시간 순서가 아닌 늦은 행도 반영됨
+
+    Args:
+        conn: 쓰기 가능한 연결
+        table_name: 원본 항적 테이블
+        batch_rows: 한 트랜잭션에서 처리할 rowid 범위
+        progress: (처리한 rowid, 마지막 rowid) 를 받는 콜백
+
+    Returns:
+        반영한 rowid 범위 크기
+    """
+    start = last = watermark(conn, table_name)
+    if last is None:
+        rebuild_trips(conn, table_name)
+        return watermark(conn, table_name)
+
+    gap = gap_seconds(conn, table_name)
+    ports = load_ports(conn)
+    max_rowid = conn.execute(f'SELECT MAX(rowid) FROM "{table_name}"').fetchone()[0] or 0
+
+    while last < max_rowid:
+        upper = min(last + batch_rows, max_rowid)
+        touched = conn.execute(f"""
+            SELECT mmsi, MIN(datetime) FROM "{table_name}"
+            WHERE rowid > ? AND rowid <= ? AND {VALID_POINT}
+            GROUP BY mmsi
+        """, [last, upper]).fetchall()
+
+        # 선박별 다시 나누기 시작 시각: 새 행 이전에 시작한 마지막 구간의 시작 (없으면 새 행 시각)
+        resume = []
+        for mmsi, earliest in touched:
+            row = conn.execute(
+                f"SELECT MAX(start_datetime) FROM {TRIPS_TABLE} WHERE mmsi = ? AND start_datetime <= ?",
+                [mmsi, earliest]
+            ).fetchone()
+            resume.append((mmsi, row[0] or earliest))
+
+        source = _source(conn, table_name, min(r[1] for r in resume)) if resume else None
+        conn.execute("BEGIN")
+        try:
+            columns = _columns([])
+            for mmsi, since in resume:
+                conn.execute(f"DELETE FROM {TRIPS_TABLE} WHERE mmsi = ? AND start_datetime >= ?",
+                             [mmsi, since])
+                rows = conn.execute(f"""
+                    SELECT mmsi, datetime, lat, lon, status FROM {source}
+                    WHERE mmsi = ? AND datetime >= ? AND rowid <= ? AND {VALID_POINT}
+                    ORDER BY datetime, rowid
+                """, [mmsi, since, upper]).fetchall()
+                columns = _concat(columns, _columns(rows))
+            _insert(conn, columns, gap, ports)
+            _set_state(conn, table_name, upper, gap)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            _detach(conn, table_name)
+        last = upper
+        if progress:
+            progress(last, max_rowid)
+
+    return last - start
+
+
+def trips_query(start_datetime, end_datetime, mmsi_list=None, bounds=None,
+                min_distance_m=0.0, min_fishing_seconds=0, limit=1000):
+    """기간과 겹치는 구간 목록 쿼리 (시작 시각 순)
+
+    Args:
+        bounds: (lat_min, lat_max, lon_min, lon_max) - 구간 좌표 범위가 겹치는 구간만
+    """
+    conditions = ["start_datetime <= ?", "end_datetime >= ?"]
+    params = [end_datetime, start_datetime]
+    if mmsi_list:
+        conditions.append(f"mmsi IN ({', '.join('?' * len(mmsi_list))})")
+        params.extend(int(m) for m in mmsi_list)
+    if bounds is not None:
+        lat_min, lat_max, lon_min, lon_max = scaled_bounds(bounds)
+        conditions.append("lat_max >= ? AND lat_min <= ? AND lon_max >= ? AND lon_min <= ?")
+        params.extend([lat_min, lat_max, lon_min, lon_max])
+    if min_distance_m:
+        conditions.append("distance_m >= ?")
+        params.append(min_distance_m)
+    if min_fishing_seconds:
+        conditions.append("fishing_seconds >= ?")
+        params.append(min_fishing_seconds)
+
+    query = f"""
+        SELECT trip_id, {', '.join(TRIP_COLUMNS)}
+        FROM {TRIPS_TABLE}
+        WHERE {' AND '.join(conditions)}
+        ORDER BY start_datetime, mmsi
+        LIMIT ?
+    """
+    return query, params + [limit]
+
+
+def trip_record(row):
+    """trips_query 결과 행 -> API 응답 dict"""
+    (trip_id, mmsi, start_datetime, end_datetime, start_lat, start_lon, end_lat, end_lon,
+     lat_min, lat_max, lon_min, lon_max, point_count, distance, fishing_seconds) = row
+    return {
+        "trip_id": trip_id,
+        "mmsi": str(mmsi),
+        "start_datetime": start_datetime,
+        "end_datetime": end_datetime,
+        "start": [start_lat / COORD_SCALE, start_lon / COORD_SCALE],
+        "end": [end_lat / COORD_SCALE, end_lon / COORD_SCALE],
+        "bbox": [lat_min / COORD_SCALE, lat_max / COORD_SCALE, lon_min / COORD_SCALE, lon_max / COORD_SCALE],
+        "point_count": point_count,
+        "distance_km": round(distance / 1000, 3),
+        "fishing_seconds": fishing_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="항해 구간 테이블 생성/갱신")
+    parser.add_argument("db_path", nargs="?", default=DEFAULT_DB_PATH, help="데이터베이스 경로")
+    parser.add_argument("--rebuild", action="store_true", help="구간 테이블을 처음부터 다시 생성")
+    parser.add_argument("--gap-hours", type=float, help="새 구간으로 나누는 포인트 간격 (시간, 지정하면 다시 생성)")
+    parser.add_argument("--ports", help="항구 CSV (name, lat, lon[, radius_m]), 지정하면 항구 목록 교체 후 다시 생성")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH_ROWS, help="트랜잭션당 rowid 범위")
+    args = parser.parse_args()
+
+    for path in (args.db_path, args.ports):
+        if path is not None and not os.path.exists(path):
+            print(f"❌ 파일 없음: {path}")
+            sys.exit(1)
+
+    conn = sqlite3.connect(args.db_path, timeout=30)
+    try:
+        table_name = find_trajectory_table(conn)
+        print(f"📋 항적 테이블: {table_name}")
+
+        rebuild = args.rebuild or args.gap_hours is not None or args.ports is not None
+        if args.ports is not None:
+            try:
+                ports = read_ports_csv(args.ports)
+            except ValueError as e:
+                print(f"❌ {e}")
+                sys.exit(1)
+            set_ports(conn, ports)
+            print(f"⚓ 항구 {len(ports):,}개 등록")
+        if not load_ports(conn):
+            print("⚠️ 등록된 항구가 없어 시간 간격으로만 구간을 나눕니다 (--ports ports.csv 로 등록)")
+
+        started = time.perf_counter()
+        try:
+            if rebuild or watermark(conn, table_name) is None:
+                gap = None if args.gap_hours is None else int(args.gap_hours * 3600)
+
+                def progress(read, saved):
+                    print(f"   - {read:,}행 처리 / 구간 {saved:,}개")
+
+                saved = rebuild_trips(conn, table_name, gap, progress)
+                print(f"✅ 항해 구간 생성: {saved:,}개 ({time.perf_counter() - started:.1f}초)")
+            else:
+                def progress(done, total):
+                    print(f"   - rowid {done:,} / {total:,}")
+
+                applied = update_trips(conn, table_name, args.batch, progress)
+                print(f"✅ 항해 구간 반영: rowid {applied:,}개 범위 ({time.perf_counter() - started:.1f}초)")
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+항적 Mapbox Vector Tile (MVT) 생성
+- 타일 범위(+버퍼) 안의 포인트만 조회해 MMSI/상태 구간별 LineString 으로 묶음
+- 줌 레벨에 따라 SQL 샘플링 간격과 단순화 허용 오차를 조절 (저줌일수록 적은 포인트)
+- 필터 해시 + 타일 좌표를 키로 생성 결과를 메모리 LRU 캐시에 보관 (result_cache.ResultCache)
+
+MVT 인코딩(protobuf)은 외부 의존성 없이 직접 구현 (vector_tile.proto v2)
+"""
+
+import hashlib
+import json
+import math
+
+import numpy as np
+
+from query_builder import DEFAULT_BOUNDS
+from serializers import status_name
+from simplify import douglas_peucker
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+LAYER_NAME = "trajectory"
+EXTENT = 4096
+# 타일 경계 밖으로 포함할 여백 (EXTENT 단위, 선이 타일 경계에서 끊겨 보이지 않도록)
+BUFFER = 64
+
+# 이 시간(초) 이상 떨어진 연속 포인트는 선을 끊음 (버퍼 밖으로 나갔다 들어온 경우 포함)
+MAX_GAP_SECONDS = 1800
+
+
+def sampling_step_for_zoom(z):
+    """줌 레벨별 SQL 샘플링 간격"""
+    if z <= 6:
+        return 20
+    if z <= 8:
+        return 10
+    if z <= 10:
+        return 4
+    if z <= 12:
+        return 2
+    return 1
+
+
+def tolerance_for_zoom(z):
+    """줌 레벨별 단순화 허용 오차 (EXTENT 단위, 저줌일수록 큼)"""
+    return 16.0 if z <= 8 else 8.0 if z <= 12 else 2.0
+
+
+def tile_bounds(z, x, y):
+    """타일 좌표 -> (lat_min, lat_max, lon_min, lon_max)"""
+    n = 2 ** z
+
+    def lat(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return lat(y + 1), lat(y), x / n * 360.0 - 180.0, (x + 1) / n * 360.0 - 180.0
+
+
+def buffered_bounds(z, x, y, buffer=BUFFER):
+    """버퍼를 포함한 타일 범위와 유효 좌표 범위의 교집합 (겹치지 않으면 None)"""
+    margin = buffer / EXTENT
+    lat_min, _, _, _ = tile_bounds(z, x, y + margin)
+    _, lat_max, _, _ = tile_bounds(z, x, y - margin)
+    lon_min = (x - margin) / 2 ** z * 360.0 - 180.0
+    lon_max = (x + 1 + margin) / 2 ** z * 360.0 - 180.0
+
+    valid = DEFAULT_BOUNDS
+    bounds = (max(lat_min, valid[0]), min(lat_max, valid[1]),
+              max(lon_min, valid[2]), min(lon_max, valid[3]))
+    if bounds[0] > bounds[1] or bounds[2] > bounds[3]:
+        return None
+    return bounds
+
+
+def project(lat, lon, z, x, y):
+    """위경도 배열 -> 타일 내부 좌표 (EXTENT 단위 정수)"""
+    n = 2 ** z
+    lat_rad = np.radians(np.clip(lat, -85.0511, 85.0511))
+    wx = (np.asarray(lon) + 180.0) / 360.0 * n
+    wy = (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / math.pi) / 2.0 * n
+    px = np.round((wx - x) * EXTENT).astype(np.int64)
+    py = np.round((wy - y) * EXTENT).astype(np.int64)
+    return px, py
+
+
+def segment_breaks(mmsi, epoch, status):
+    """연속 포인트 쌍마다 선을 끊는지 여부 (MMSI/상태가 바뀌거나 시간 간격이 큼), 길이 N-1"""
+    return ((mmsi[1:] != mmsi[:-1]) |
+            (status[1:] != status[:-1]) |
+            (np.diff(epoch) > MAX_GAP_SECONDS))
+
+
+def _segments(mmsi, epoch, status):
+    """MMSI/상태가 바뀌거나 시간 간격이 큰 위치에서 끊은 구간 [(시작, 끝)] (끝 미포함)"""
+    count = len(mmsi)
+    if count == 0:
+        return []
+    breaks = np.flatnonzero(segment_breaks(mmsi, epoch, status)) + 1
+    bounds = np.concatenate(([0], breaks, [count]))
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+# ---- protobuf / MVT 인코딩 ----
+
+def _varint(value):
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _field_varint(field, value):
+    return _varint(field << 3) + _varint(value)
+
+
+def _field_bytes(field, data):
+    return _varint((field << 3) | 2) + _varint(len(data)) + data
+
+
+def _packed(values):
+    return b"".join(_varint(v) for v in values)
+
+
+def _geometry(px, py):
+    """좌표 배열 -> MVT geometry 명령 (MoveTo 1회 + LineTo N-1회)"""
+    dx = np.diff(px, prepend=0)
+    dy = np.diff(py, prepend=0)
+    params = np.empty(len(px) * 2, dtype=np.int64)
+    params[0::2] = (dx << 1) ^ (dx >> 63)
+    params[1::2] = (dy << 1) ^ (dy >> 63)
+    params = params.tolist()
+
+    commands = [(1 & 0x7) | (1 << 3)] + params[:2]
+    if len(px) > 1:
+        commands += [(2 & 0x7) | ((len(px) - 1) << 3)] + params[2:]
+    return commands
+
+
+class _LayerBuilder:
+    """MVT 레이어 (키/값 사전 관리)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.features = []
+        self.keys = {}
+        self.values = {}
+
+    def _key(self, key):
+        return self.keys.setdefault(key, len(self.keys))
+
+    def _value(self, value):
+        return self.values.setdefault(value, len(self.values))
+
+    def add_feature(self, geom_type, geometry, properties):
+        tags = []
+        for key, value in properties.items():
+            tags += [self._key(key), self._value(value)]
+        feature = (
+            _field_varint(1, len(self.features) + 1) +
+            _field_bytes(2, _packed(tags)) +
+            _field_varint(3, geom_type) +
+            _field_bytes(4, _packed(geometry))
+        )
+        self.features.append(feature)
+
+    def encode(self):
+        body = _field_varint(15, 2) + _field_bytes(1, self.name.encode("utf-8"))
+        for feature in self.features:
+            body += _field_bytes(2, feature)
+        for key in self.keys:
+            body += _field_bytes(3, key.encode("utf-8"))
+        for value in self.values:
+            if isinstance(value, str):
+                encoded = _field_bytes(1, value.encode("utf-8"))
+            else:
+                encoded = _field_varint(6, _zigzag(int(value)))   # sint_value
+            body += _field_bytes(4, encoded)
+        body += _field_varint(5, EXTENT)
+        return _field_bytes(3, body)
+
+
+def encode_tile(rows, z, x, y):
+    """(mmsi, datetime, lat, lon, status) 행 -> MVT 바이트
+
+    rows 는 (mmsi, datetime) 순으로 정렬되어 있어야 함
+    """
+    layer = _LayerBuilder(LAYER_NAME)
+    if rows:
+        mmsi, dt, lat, lon, status = zip(*rows)
+        mmsi = np.asarray(mmsi, dtype=np.int64)
+        epoch = np.asarray(dt, dtype="datetime64[s]").astype(np.int64)
+        status = np.asarray(status, dtype=np.int64)
+        px, py = project(np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64), z, x, y)
+        tolerance = tolerance_for_zoom(z)
+
+        for start, end in _segments(mmsi, epoch, status):
+            sx, sy = px[start:end], py[start:end]
+
+            # 같은 정수 좌표로 겹치는 연속 포인트 제거 후 단순화
+            if len(sx) > 1:
+                moved = np.concatenate(([True], (np.diff(sx) != 0) | (np.diff(sy) != 0)))
+                sx, sy = sx[moved], sy[moved]
+            if len(sx) > 2:
+                keep = douglas_peucker(sx, sy, tolerance)
+                sx, sy = sx[keep], sy[keep]
+
+            properties = {
+                "mmsi": int(mmsi[start]),
+                "status": int(status[start]),
+                "status_name": status_name(int(status[start])),
+            }
+            geom_type = 1 if len(sx) == 1 else 2   # POINT / LINESTRING
+            layer.add_feature(geom_type, _geometry(sx, sy), properties)
+
+    if not layer.features:
+        return b""
+    return layer.encode()
+
+
+def filter_hash(**filters):
+    """타일 필터 조건의 정규화 해시"""
+    canonical = json.dumps(filters, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]